@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Backfill the structured price of existing artist profiles.
+
+Profiles written before tarif_amount / tarif_currency / tarif_unit existed only
+carry the free-text tarif_soiree. Every profile is parsed again (pricing.py)
+and the ones whose stored fields differ are updated with batched, unordered
+bulk writes. Each update is conditional on tarif_soiree being unchanged, so a
+profile edited while the backfill runs keeps the fields its own write stored.
+Re-running the script only touches what is out of date.
+
+    python backfill_tarifs.py --dry-run
+    python backfill_tarifs.py --batch-size 1000 --json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pymongo import UpdateOne
+
+from pricing import parse_tarif
+
+PROFILE_TARIF = {"_id": 1, "tarif_soiree": 1, "tarif_amount": 1, "tarif_currency": 1, "tarif_unit": 1}
+
+
+async def backfill_tarifs(db, batch_size: int = 500, dry_run: bool = False) -> Dict:
+    """Store the parsed tarif_soiree of every profile whose structured fields are out of date"""
+    started = time.perf_counter()
+    report = {"dry_run": dry_run, "scanned": 0, "up_to_date": 0, "updated": 0, "unparsed": 0}
+    batch: List[UpdateOne] = []
+
+    async def flush():
+        if batch and not dry_run:
+            result = await db.artist_profiles.bulk_write(batch, ordered=False)
+            report["updated"] += result.modified_count
+        elif batch:
+            report["updated"] += len(batch)
+        batch.clear()
+
+    async for profile in db.artist_profiles.find({}, PROFILE_TARIF).batch_size(batch_size):
+        report["scanned"] += 1
+        text = profile.get("tarif_soiree")
+        fields = parse_tarif(text).fields()
+        if text and fields["tarif_amount"] is None:
+            report["unparsed"] += 1
+        if all(profile.get(name) == value and name in profile for name, value in fields.items()):
+            report["up_to_date"] += 1
+            continue
+        batch.append(UpdateOne({"_id": profile["_id"], "tarif_soiree": text}, {"$set": fields}))
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=500, help="profiles per bulk write")
+    parser.add_argument("--dry-run", action="store_true", help="count the profiles to update without writing")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from settings import Settings
+
+    load_dotenv(Path(__file__).parent / ".env")
+    settings = Settings.from_env()
+    client = AsyncIOMotorClient(settings.mongo_url, **settings.mongo_client_options())
+    try:
+        report = await backfill_tarifs(client[settings.db_name], batch_size=args.batch_size, dry_run=args.dry_run)
+    finally:
+        client.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"💶 Tarif backfill{' (dry run)' if args.dry_run else ''}")
+    print(f"   Scanned: {report['scanned']} profiles, already up to date: {report['up_to_date']}")
+    print(f"   Without a recognisable amount: {report['unparsed']}")
+    print(f"✅ {'Would update' if args.dry_run else 'Updated'} {report['updated']} profiles "
+          f"in {report['duration_seconds']} s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latency and throughput of the hot endpoints, served in-process.
+
+The FastAPI app is driven through httpx's ASGI transport (no network, no
+server process) against either a local mongod (--mongo-url) or the in-memory
+mongomock-motor stand-in. A dataset of artists x availability days from
+generate_data.py is loaded first, then each scenario is run with a fixed
+number of requests and concurrent workers:
+
+  * toggle      - POST /api/availability-days/toggle (artist adds/removes a day)
+  * month       - GET  /api/availability-days?start_date&end_date (one month)
+  * dashboard   - GET  /api/admin/dashboard?month=YYYY-MM
+  * artists     - GET  /api/artists
+  * date_popup  - GET  /api/availability-days/{date}/summary
+  * export      - GET  /api/export/csv
+
+Run from the backend directory:
+    python -m benchmarks.endpoints --artists 200 --days 30 --requests 100 --output endpoints.json
+
+mongomock is much slower than mongod on large scans, so compare runs made
+against the same backend only. The report also carries the worker's import
+time summary (benchmarks.startup), so import regressions show up next to
+latency ones.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import secrets
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+import httpx  # noqa: E402
+
+import generate_data  # noqa: E402
+import server  # noqa: E402
+from benchmarks.startup import import_profile  # noqa: E402
+
+SCENARIOS = ("toggle", "month", "dashboard", "artists", "date_popup", "export")
+DOMAIN = "bench.example.com"
+ADMIN_EMAIL = generate_data.admin_email(DOMAIN)
+
+
+def open_database(mongo_url: str, db_name: str):
+    if mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(mongo_url)[db_name]
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is not installed: pip install mongomock-motor, or pass --mongo-url")
+    return AsyncMongoMockClient()[db_name]
+
+
+async def seed(db, artists: int, days: int, seed_value: int, wipe: bool = False) -> List[date]:
+    """Seed `artists` artists with `days` availability days each over the next 90 days; return the open dates"""
+    # Scenarios sign their own tokens: the accounts only need a valid hash nobody knows the password of
+    password_hash = server.get_pwd_context().hash(secrets.token_urlsafe())
+    result = await generate_data.generate(
+        db,
+        artists=artists,
+        days_per_artist=days,
+        blocked_dates=6,
+        invitations=50,
+        horizon_days=90,
+        seed=seed_value,
+        password_hash=password_hash,
+        domain=DOMAIN,
+        wipe=wipe,
+    )
+    return result["open_days"]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def build_requests(scenario: str, count: int, artists: int, open_days: List[date], rng: random.Random):
+    """(method, url, json body, token subject) for each request of a scenario"""
+    admin = ADMIN_EMAIL
+    month_start = open_days[0].replace(day=1)
+    month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    requests = []
+    for n in range(count):
+        if scenario == "toggle":
+            artist = generate_data.artist_email(n % artists, DOMAIN)
+            requests.append(("POST", "/api/availability-days/toggle", {"date": rng.choice(open_days).isoformat()}, artist))
+        elif scenario == "month":
+            url = f"/api/availability-days?start_date={month_start.isoformat()}&end_date={month_end.isoformat()}"
+            requests.append(("GET", url, None, admin))
+        elif scenario == "dashboard":
+            requests.append(("GET", f"/api/admin/dashboard?month={month_start.strftime('%Y-%m')}", None, admin))
+        elif scenario == "artists":
+            requests.append(("GET", "/api/artists", None, admin))
+        elif scenario == "date_popup":
+            requests.append(("GET", f"/api/availability-days/{rng.choice(open_days).isoformat()}/summary", None, admin))
+        elif scenario == "export":
+            requests.append(("GET", "/api/export/csv", None, admin))
+    return requests
+
+
+async def run_scenario(client: httpx.AsyncClient, requests, concurrency: int, tokens: Dict[str, str]):
+    latencies: List[float] = []
+    errors = 0
+    response_bytes = 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors, response_bytes
+        for method, url, body, subject in queue:
+            headers = {"Authorization": f"Bearer {tokens[subject]}"}
+            start = time.perf_counter()
+            response = await client.request(method, url, json=body, headers=headers)
+            latencies.append((time.perf_counter() - start) * 1000)
+            response_bytes += len(response.content)
+            if response.status_code >= 400:
+                errors += 1
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else None,
+        "mean_ms": round(statistics.fmean(latencies), 3),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p90_ms": round(percentile(latencies, 0.90), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "max_ms": round(latencies[-1], 3),
+        "mean_response_bytes": round(response_bytes / len(latencies)),
+    }
+
+
+async def run(args):
+    state = server.app.state
+    state.db = open_database(args.mongo_url, args.db_name)
+    seed_start = time.perf_counter()
+    open_days = await seed(state.db, args.artists, args.days, args.seed, wipe=True)
+    seed_seconds = time.perf_counter() - seed_start
+
+    subjects = [ADMIN_EMAIL] + [generate_data.artist_email(i, DOMAIN) for i in range(args.artists)]
+    tokens = {subject: server.create_access_token({"sub": subject}, state.settings.secret_key) for subject in subjects}
+    rng = random.Random(args.seed)
+
+    results = {}
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for scenario in args.scenarios:
+            warmup = build_requests(scenario, args.warmup, args.artists, open_days, rng)
+            await run_scenario(client, warmup, 1, tokens)
+            requests = build_requests(scenario, args.requests, args.artists, open_days, rng)
+            results[scenario] = await run_scenario(client, requests, args.concurrency, tokens)
+
+    return {
+        "benchmark": "endpoints",
+        "backend": "mongod" if args.mongo_url else "mongomock",
+        "artists": args.artists,
+        "days_per_artist": args.days,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "seed_seconds": round(seed_seconds, 3),
+        "results": results,
+        "imports": import_profile(top=5),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artists", type=int, default=200)
+    parser.add_argument("--days", type=int, default=30, help="availability days per artist")
+    parser.add_argument("--requests", type=int, default=100, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--mongo-url", help="benchmark against this mongod instead of mongomock")
+    parser.add_argument("--db-name", default="benchmark", help="scratch database to seed (it is wiped first)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    # One access log line per request would dominate the output
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Load test: realistic artist and admin journeys with a concurrency ramp.
+
+Virtual users (VUs) run user journeys in a loop with exponential think times:
+
+  * artist - log in once, open the month dashboard, toggle 1-3 days
+  * admin  - log in once, open the month dashboard, open two date popups,
+             list the artists, and export the CSV in one journey out of ten
+
+VUs sharing an account (every admin VU, artists beyond --artists) share its
+session, like browser tabs, so the per-account login throttle is not hit.
+
+Concurrency is ramped in steps (--steps 5,10,20,40): VUs are added at the start
+of each step and keep running until the end of the test. For every step the
+report gives throughput, error rate and latency percentiles per request type,
+and the saturation point: the first step where throughput stops growing by at
+least 10%, p95 exceeds --slo-ms or the error rate exceeds --max-error-rate.
+Logins are slow by design (bcrypt), so the p95 checked against the SLO is the
+one of every other request.
+
+By default the app runs in-process (httpx ASGI transport, mongomock-motor,
+data from generate_data.py), each VU with its own client IP so the login
+throttle sees distinct clients. The driver then shares the event loop with
+the app, so absolute numbers are pessimistic; for capacity planning run it
+against a real worker seeded with generate_data.py:
+
+    python generate_data.py --artists 2000 --days 60 --password loadtest --domain load.example.com
+    python -m benchmarks.load --base-url http://localhost:8001 --steps 10,20,40,80,160
+
+Run from the backend directory:
+    python -m benchmarks.load --steps 5,10,20,40 --step-seconds 20 --output load.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "loadtest")
+
+import httpx  # noqa: E402
+
+import generate_data  # noqa: E402
+from benchmarks.endpoints import open_database, percentile  # noqa: E402
+
+DEFAULT_DOMAIN = "load.example.com"
+
+
+class Recorder:
+    """Request outcomes grouped by ramp step and request name"""
+
+    def __init__(self):
+        self.step = 0
+        self.samples: Dict[int, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        self.errors: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        step = self.step
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            response = None
+        self.samples[step][name].append((time.perf_counter() - start) * 1000)
+        if response is None or response.status_code >= 400:
+            self.errors[step][name] += 1
+        return response
+
+
+class Sessions:
+    """Access tokens per account, shared by the VUs using that account"""
+
+    def __init__(self, recorder: Recorder, password: str):
+        self.recorder = recorder
+        self.password = password
+        self.headers: Dict[str, Dict[str, str]] = {}
+        self.locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+
+    async def login(self, client: httpx.AsyncClient, email: str) -> Optional[Dict[str, str]]:
+        async with self.locks[email]:
+            if email not in self.headers:
+                response = await self.recorder.request(
+                    client, "login", "POST", "/api/auth/login", json={"email": email, "password": self.password}
+                )
+                if response is None or response.status_code != 200:
+                    return None
+                self.headers[email] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            return self.headers[email]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, sessions: Sessions, email: str,
+                 open_days: List[date], think_seconds: float, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.sessions = sessions
+        self.email = email
+        self.open_days = open_days
+        self.think_seconds = think_seconds
+        self.rng = rng
+        self.headers: Optional[Dict[str, str]] = None
+
+    async def think(self):
+        if self.think_seconds:
+            await asyncio.sleep(min(self.rng.expovariate(1 / self.think_seconds), self.think_seconds * 5))
+
+    async def get(self, name: str, url: str):
+        return await self.recorder.request(self.client, name, "GET", url, headers=self.headers)
+
+    def month(self) -> str:
+        return self.rng.choice(self.open_days).strftime("%Y-%m")
+
+    async def run(self, stop: asyncio.Event):
+        while not stop.is_set():
+            if self.headers is None:
+                self.headers = await self.sessions.login(self.client, self.email)
+                if self.headers is None:
+                    await asyncio.sleep(1)
+                    continue
+            await self.journey()
+            await self.think()
+
+
+class ArtistUser(VirtualUser):
+    async def journey(self):
+        await self.get("artist_dashboard", f"/api/artist/dashboard?month={self.month()}")
+        for _ in range(self.rng.randint(1, 3)):
+            await self.think()
+            await self.recorder.request(
+                self.client, "toggle", "POST", "/api/availability-days/toggle",
+                json={"date": self.rng.choice(self.open_days).isoformat()}, headers=self.headers,
+            )
+
+
+class AdminUser(VirtualUser):
+    async def journey(self):
+        await self.get("admin_dashboard", f"/api/admin/dashboard?month={self.month()}")
+        for _ in range(2):
+            await self.think()
+            await self.get("date_popup", f"/api/availability-days/{self.rng.choice(self.open_days).isoformat()}/summary")
+        await self.think()
+        await self.get("artists", "/api/artists/summary")
+        if self.rng.random() < 0.1:
+            await self.think()
+            await self.get("export", "/api/export/csv")
+
+
+def summarize_step(concurrency: int, seconds: float, samples: Dict[str, List[float]], errors: Dict[str, int]):
+    requests = {}
+    all_latencies = []
+    slo_latencies = []
+    for name, latencies in sorted(samples.items()):
+        latencies = sorted(latencies)
+        all_latencies.extend(latencies)
+        if name != "login":
+            slo_latencies.extend(latencies)
+        requests[name] = {
+            "count": len(latencies),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(percentile(latencies, 0.50), 2),
+            "p95_ms": round(percentile(latencies, 0.95), 2),
+            "p99_ms": round(percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2),
+        }
+    all_latencies.sort()
+    slo_latencies.sort()
+    total = len(all_latencies)
+    total_errors = sum(errors.values())
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "throughput_rps": round(total / seconds, 2),
+        "error_rate": round(total_errors / total, 4) if total else None,
+        "mean_ms": round(statistics.fmean(all_latencies), 2) if total else None,
+        "p95_ms": round(percentile(all_latencies, 0.95), 2) if total else None,
+        "p99_ms": round(percentile(all_latencies, 0.99), 2) if total else None,
+        "p95_ms_excluding_login": round(percentile(slo_latencies, 0.95), 2) if slo_latencies else None,
+        "by_request": requests,
+    }
+
+
+def find_saturation(steps: List[Dict], slo_ms: float, max_error_rate: float) -> Dict:
+    previous = None
+    for step in steps:
+        reasons = []
+        if not step["requests"]:
+            reasons.append("no completed requests")
+        else:
+            slo_p95 = step["p95_ms_excluding_login"]
+            if slo_p95 is not None and slo_p95 > slo_ms:
+                reasons.append(f"p95 {slo_p95} ms > {slo_ms} ms")
+            if step["error_rate"] > max_error_rate:
+                reasons.append(f"error rate {step['error_rate']} > {max_error_rate}")
+            if previous and step["throughput_rps"] < previous["throughput_rps"] * 1.1:
+                reasons.append("throughput grew less than 10%")
+        if reasons:
+            return {
+                "saturated_at_concurrency": step["concurrency"],
+                "max_healthy_concurrency": previous["concurrency"] if previous else None,
+                "reasons": reasons,
+            }
+        previous = step
+    return {"saturated_at_concurrency": None, "max_healthy_concurrency": previous["concurrency"] if previous else None, "reasons": []}
+
+
+async def prepare_in_process(args):
+    import server
+
+    state = server.app.state
+    state.db = open_database(None, os.environ["DB_NAME"])
+    password_hash = await state.password_pool.hash(args.password)
+    result = await generate_data.generate(
+        state.db, artists=args.artists, days_per_artist=args.days, invitations=100,
+        horizon_days=180, seed=args.seed, password_hash=password_hash, domain=args.domain,
+    )
+
+    def new_client(index: int) -> httpx.AsyncClient:
+        # One client IP per VU, like distinct browsers behind distinct addresses
+        transport = httpx.ASGITransport(app=server.app, client=(f"10.0.{index // 250}.{index % 250 + 1}", 40000))
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout)
+
+    return result["open_days"], new_client
+
+
+async def prepare_remote(args, sessions: Sessions):
+    """Open dates of the next 90 days on a running server (blocked dates cannot be toggled)"""
+
+    def new_client(index: int) -> httpx.AsyncClient:
+        return httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout)
+
+    async with new_client(0) as client:
+        headers = await sessions.login(client, generate_data.admin_email(args.domain))
+        if headers is None:
+            sys.exit(f"Cannot log in as {generate_data.admin_email(args.domain)}; seed with generate_data.py --password")
+        response = await client.get("/api/blocked-dates", params={"limit": 2000}, headers=headers)
+        blocked = {item["date"] for item in response.json()}
+
+    today = date.today()
+    upcoming = [date.fromordinal(today.toordinal() + offset) for offset in range(1, 91)]
+    return [day for day in upcoming if day.isoformat() not in blocked], new_client
+
+
+async def run(args):
+    recorder = Recorder()
+    sessions = Sessions(recorder, args.password)
+    if args.base_url:
+        open_days, new_client = await prepare_remote(args, sessions)
+    else:
+        open_days, new_client = await prepare_in_process(args)
+    # Setup logins are not part of the first step
+    recorder.samples.clear()
+    recorder.errors.clear()
+
+    rng = random.Random(args.seed)
+    stop = asyncio.Event()
+    clients: List[httpx.AsyncClient] = []
+    tasks = []
+    steps = []
+
+    try:
+        for step_index, concurrency in enumerate(args.steps):
+            recorder.step = step_index
+            while len(tasks) < concurrency:
+                index = len(tasks)
+                client = new_client(index)
+                clients.append(client)
+                # One admin per --admin-ratio VUs; everyone else is an artist
+                if index % args.admin_ratio == 0:
+                    user_class, email = AdminUser, generate_data.admin_email(args.domain)
+                else:
+                    user_class, email = ArtistUser, generate_data.artist_email(index % args.artists, args.domain)
+                user = user_class(client, recorder, sessions, email, open_days, args.think, random.Random(rng.random()))
+                tasks.append(asyncio.ensure_future(user.run(stop)))
+
+            await asyncio.sleep(args.step_seconds)
+            steps.append(summarize_step(
+                concurrency, args.step_seconds, recorder.samples[step_index], recorder.errors[step_index]
+            ))
+            logging.getLogger(__name__).info("step %d: %s", concurrency, {
+                key: steps[-1][key] for key in ("throughput_rps", "error_rate", "p95_ms_excluding_login", "p99_ms")
+            })
+    finally:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for client in clients:
+            await client.aclose()
+
+    return {
+        "benchmark": "load",
+        "target": args.base_url or "in-process",
+        "steps": steps,
+        "saturation": find_saturation(steps, args.slo_ms, args.max_error_rate),
+        "settings": {
+            "step_seconds": args.step_seconds,
+            "think_seconds": args.think,
+            "admin_ratio": args.admin_ratio,
+            "slo_ms": args.slo_ms,
+            "max_error_rate": args.max_error_rate,
+            "seed": args.seed,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=lambda value: [int(part) for part in value.split(",")], default=[5, 10, 20, 40])
+    parser.add_argument("--step-seconds", type=float, default=20)
+    parser.add_argument("--think", type=float, default=0.5, help="mean think time between requests, in seconds")
+    parser.add_argument("--admin-ratio", type=int, default=10, help="one admin VU per N VUs")
+    parser.add_argument("--slo-ms", type=float, default=500, help="p95 above this marks saturation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--base-url", help="load a running server instead of the in-process app")
+    parser.add_argument("--password", default="loadtest", help="password of the generated accounts")
+    parser.add_argument("--domain", default=DEFAULT_DOMAIN, help="email domain of the generated accounts")
+    parser.add_argument("--artists", type=int, default=500, help="artists to generate (in-process) or available (remote)")
+    parser.add_argument("--days", type=int, default=40, help="availability days per generated artist (in-process)")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    # Access logs and per-request warnings would drown the step summaries
+    for name in ("httpx", "server", "query_monitor", "loop_monitor"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: list response serialization, validated models vs the orjson fast path.
+
+Compares, for the same synthetic rows:
+  * model_path   - build a Pydantic model per row, then let FastAPI re-validate the
+                   list against the response_model and render it with JSONResponse
+  * fast_path    - build plain dict rows and render them with ORJSONResponse
+
+Run from the backend directory:
+    python -m benchmarks.serialization --rows 5000 --repeat 7 --output serialization.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# server.py reads these at import time; the benchmark never talks to Mongo
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fastapi.responses import JSONResponse, ORJSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import server  # noqa: E402
+
+
+def make_artist_rows(count: int):
+    rows = []
+    for i in range(count):
+        user = {"id": f"artist-{i:06d}", "email": f"artist{i}@example.com"}
+        profile = {
+            "user_id": user["id"],
+            "nom_de_scene": f"Artiste {i}",
+            "telephone": "+33 6 12 34 56 78",
+            "lien": f"https://soundcloud.com/artiste-{i}",
+            "tarif_soiree": "500 € / set",
+            "logo_url": f"/api/uploads/logos/{i}.jpg",
+            "gallery_urls": [f"/api/uploads/gallery/{i}-{n}.jpg" for n in range(3)],
+            "bio": "Bio " * 40,
+            "category": "DJ" if i % 2 else "Groupe",
+        }
+        rows.append((user, profile, i % 30))
+    return rows
+
+
+def make_invitation_rows(count: int):
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        {
+            "id": f"invitation-{i:06d}",
+            "email": f"invite{i}@example.com",
+            "token": f"token-{i:032d}",
+            "status": "envoyée",
+            "expires_at": now + timedelta(days=7),
+            "created_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+async def model_path_artists(rows) -> bytes:
+    models = [server.ArtistWithProfile(**server.artist_with_profile_row(*row)) for row in rows]
+    content = await serialize_response(field=ARTISTS_FIELD, response_content=models)
+    return JSONResponse(content).body
+
+
+async def fast_path_artists(rows) -> bytes:
+    return ORJSONResponse([server.artist_with_profile_row(*row) for row in rows]).body
+
+
+async def model_path_invitations(rows) -> bytes:
+    models = [server.Invitation(**row) for row in rows]
+    content = await serialize_response(field=INVITATIONS_FIELD, response_content=models)
+    return JSONResponse(content).body
+
+
+async def fast_path_invitations(rows) -> bytes:
+    return ORJSONResponse(rows).body
+
+
+ARTISTS_FIELD = create_response_field(name="artists", type_=List[server.ArtistWithProfile])
+INVITATIONS_FIELD = create_response_field(name="invitations", type_=List[server.Invitation])
+
+
+async def measure(fn, rows, repeat: int):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = await fn(rows)
+        timings.append((time.perf_counter() - start) * 1000)
+        size = len(body)
+    return {
+        "median_ms": round(statistics.median(timings), 3),
+        "min_ms": round(min(timings), 3),
+        "max_ms": round(max(timings), 3),
+        "bytes": size,
+    }
+
+
+async def run(rows: int, repeat: int):
+    artist_rows = make_artist_rows(rows)
+    invitation_rows = make_invitation_rows(rows)
+
+    results = {}
+    for name, model_fn, fast_fn, data in [
+        ("artists", model_path_artists, fast_path_artists, artist_rows),
+        ("invitations", model_path_invitations, fast_path_invitations, invitation_rows),
+    ]:
+        model = await measure(model_fn, data, repeat)
+        fast = await measure(fast_fn, data, repeat)
+        results[name] = {
+            "model_path": model,
+            "fast_path": fast,
+            "speedup": round(model["median_ms"] / fast["median_ms"], 2) if fast["median_ms"] else None,
+        }
+
+    return {"benchmark": "serialization", "rows": rows, "repeat": repeat, "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.rows, args.repeat))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark: worker cold start.
+
+Two measurements, each in a fresh interpreter:
+
+  * imports       - `python -X importtime -c "import server"`, summarised as
+                    the total import time of server, its slowest direct imports
+                    and the self time per top-level package. Modules that must
+                    stay lazy (email, bcrypt, upload writes) are listed if
+                    anything imports them at startup.
+  * first request - wall time from spawning a worker process to the response of
+                    its first authenticated request (GET /api/auth/me), median
+                    of --runs runs, compared with --target-ms. With --mongo-url
+                    the app lifespan (pool warm-up, indexes, bcrypt) runs too;
+                    otherwise the database is mongomock-motor and the lifespan
+                    is skipped.
+
+Run from the backend directory:
+    python -m benchmarks.startup --runs 5 --target-ms 1500 --output startup.json
+
+--check exits with status 1 when the target is missed or a lazy module is
+imported at startup. benchmarks.endpoints includes the import summary in its
+report.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# Imported on first use by server.py; none of them may load at worker startup
+LAZY_MODULES = ("sendgrid", "passlib", "aiofiles")
+DEFAULT_TARGET_MS = 1500
+CHILD_EMAIL = "startup@bench.example.com"
+
+
+def worker_env(mongo_url: Optional[str] = None, db_name: str = "startup") -> Dict[str, str]:
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", db_name)
+    if mongo_url:
+        env["MONGO_URL"] = mongo_url
+        env["DB_NAME"] = db_name
+    return env
+
+
+def parse_importtime(stderr: str):
+    """(depth, module, self µs, cumulative µs) for each `-X importtime` line"""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize_imports(entries, module: str = "server", top: int = 15) -> Dict:
+    # A module's line comes after those of the modules it imported
+    children: List = []
+    subtree: List = []
+    pending: List = []
+    root = None
+    for entry in entries:
+        depth, name = entry[0], entry[1]
+        pending.append(entry)
+        if depth == 0:
+            if name == module:
+                root = entry
+                subtree = pending
+                children = [e for e in pending if e[0] == 1]
+            pending = []
+    if root is None:
+        raise RuntimeError(f"{module} does not appear in the -X importtime output")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for _, name, self_us, _ in subtree:
+        packages[name.split(".")[0]] += self_us
+    loaded = {name for _, name, _, _ in entries}
+
+    return {
+        "module": module,
+        "total_ms": round(root[3] / 1000, 1),
+        "self_ms": round(root[2] / 1000, 1),
+        "interpreter_ms": round(sum(e[3] for e in entries if e[0] == 0 and e is not root) / 1000, 1),
+        "modules": len(subtree),
+        "slowest_imports": [
+            {"module": name, "cumulative_ms": round(cumulative_us / 1000, 1)}
+            for _, name, _, cumulative_us in sorted(children, key=lambda e: e[3], reverse=True)[:top]
+        ],
+        "packages_self_ms": {
+            name: round(self_us / 1000, 1)
+            for name, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "lazy_modules_loaded": [name for name in LAZY_MODULES if name in loaded],
+    }
+
+
+def import_profile(module: str = "server", top: int = 15) -> Dict:
+    """Import `module` in a fresh interpreter with -X importtime and summarise the output"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=worker_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return summarize_imports(parse_importtime(completed.stderr), module, top)
+
+
+async def asgi_get(app, path: str, headers: Dict[str, str]) -> int:
+    """Status of one GET served by `app`, without an HTTP client library"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(name.lower().encode(), value.encode()) for name, value in headers.items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("startup", 80),
+    }
+    sent = False
+    response_status = 0
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.Event().wait()  # never disconnects
+        sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal response_status
+        if message["type"] == "http.response.start":
+            response_status = message["status"]
+
+    await app(scope, receive, send)
+    return response_status
+
+
+async def child(mongo_url: Optional[str]):
+    """Runs inside the measured worker process: boot the app, serve one request, report phases"""
+    fixture_start = time.perf_counter()
+    fixture = None
+    if not mongo_url:
+        from mongomock_motor import AsyncMongoMockClient
+        fixture = AsyncMongoMockClient()["startup"]
+        await fixture.users.insert_one({
+            "id": "startup-admin", "email": CHILD_EMAIL, "role": "admin",
+            "password_hash": "", "created_at": "2025-01-01T00:00:00+00:00",
+        })
+    fixture_ms = (time.perf_counter() - fixture_start) * 1000
+
+    start = time.perf_counter()
+    import server
+    import_ms = (time.perf_counter() - start) * 1000
+
+    boot = time.perf_counter()
+    app = server.create_app()
+    lifespan = None
+    if fixture is not None:
+        app.state.db = fixture
+    else:
+        lifespan = server.lifespan(app)
+        await lifespan.__aenter__()
+    boot_ms = (time.perf_counter() - boot) * 1000
+
+    if lifespan is not None:
+        seed_start = time.perf_counter()
+        await app.state.db.users.update_one(
+            {"email": CHILD_EMAIL},
+            {"$setOnInsert": {"id": "startup-admin", "role": "admin", "password_hash": ""}},
+            upsert=True,
+        )
+        fixture_ms += (time.perf_counter() - seed_start) * 1000
+
+    request_start = time.perf_counter()
+    token = server.create_access_token({"sub": CHILD_EMAIL}, app.state.settings.secret_key)
+    response_status = await asgi_get(app, "/api/auth/me", {"Authorization": f"Bearer {token}"})
+    request_ms = (time.perf_counter() - request_start) * 1000
+
+    print(json.dumps({
+        "status": response_status,
+        "fixture_ms": fixture_ms,
+        "import_ms": import_ms,
+        "boot_ms": boot_ms,
+        "first_request_ms": request_ms,
+    }), flush=True)
+    if lifespan is not None:
+        await app.state.db.users.delete_one({"email": CHILD_EMAIL})
+        await lifespan.__aexit__(None, None, None)
+
+
+def time_to_first_request(mongo_url: Optional[str], db_name: str) -> Dict:
+    """Spawn one worker process and time it up to its first response"""
+    command = [sys.executable, "-m", "benchmarks.startup", "--child"]
+    if mongo_url:
+        command += ["--mongo-url", mongo_url]
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        command, cwd=BACKEND_DIR, env=worker_env(mongo_url, db_name), stdout=subprocess.PIPE, text=True
+    )
+    line = process.stdout.readline()
+    wall_ms = (time.perf_counter() - start) * 1000
+    process.wait()
+    if not line:
+        raise RuntimeError(f"worker exited with status {process.returncode} before its first response")
+    phases = json.loads(line)
+    if phases["status"] != 200:
+        raise RuntimeError(f"first request returned {phases['status']}")
+    # The test fixture (mongomock import and seeding) is not part of a worker's startup
+    return {
+        "total_ms": wall_ms - phases["fixture_ms"],
+        "import_ms": phases["import_ms"],
+        "boot_ms": phases["boot_ms"],
+        "first_request_ms": phases["first_request_ms"],
+    }
+
+
+def run(args) -> Dict:
+    imports = import_profile(top=args.top)
+    runs = [time_to_first_request(args.mongo_url, args.db_name) for _ in range(args.runs)]
+    totals = sorted(run["total_ms"] for run in runs)
+    median_ms = statistics.median(totals)
+    return {
+        "benchmark": "startup",
+        "backend": "mongod" if args.mongo_url else "mongomock",
+        "imports": imports,
+        "first_request": {
+            "runs": args.runs,
+            "target_ms": args.target_ms,
+            "median_ms": round(median_ms, 1),
+            "max_ms": round(totals[-1], 1),
+            "median_import_ms": round(statistics.median(run["import_ms"] for run in runs), 1),
+            "median_boot_ms": round(statistics.median(run["boot_ms"] for run in runs), 1),
+            "median_request_ms": round(statistics.median(run["first_request_ms"] for run in runs), 1),
+            "meets_target": median_ms <= args.target_ms,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="worker processes started for the first-request timing")
+    parser.add_argument("--target-ms", type=float, default=DEFAULT_TARGET_MS, help="time-to-first-request target (median)")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports and packages listed")
+    parser.add_argument("--mongo-url", help="boot against this mongod, running the full lifespan")
+    parser.add_argument("--db-name", default="startup")
+    parser.add_argument("--check", action="store_true", help="exit with status 1 when the target is missed")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.mongo_url))
+        return
+
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    if args.check and (not report["first_request"]["meets_target"] or report["imports"]["lazy_modules_loaded"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Response compression (gzip, and Brotli when the `brotli` package is installed).
+
+Only allow-listed content types above a minimum size are compressed. Streamed
+responses are compressed chunk by chunk with a sync flush after each chunk, so
+clients still receive data progressively. Every compressed response feeds
+CompressionStats, so the compression level can be tuned from the observed
+ratio and CPU cost.
+"""
+
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+DEFAULT_CONTENT_TYPES = (
+    "application/json",
+    "text/csv",
+    "text/plain",
+    "text/html",
+    "text/css",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+# Suffixes of precompressed upload variants, in order of preference
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+class CompressionStats:
+    """Counters per encoding: responses, bytes in/out and CPU seconds spent compressing"""
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, float]] = {}
+        self.skipped: Dict[str, int] = {"content_type": 0, "too_small": 0, "already_encoded": 0}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float, response: bool = False):
+        counters = self.encodings.setdefault(
+            encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0, "cpu_seconds": 0.0}
+        )
+        counters["responses"] += int(response)
+        counters["bytes_in"] += bytes_in
+        counters["bytes_out"] += bytes_out
+        counters["cpu_seconds"] += cpu_seconds
+
+    def snapshot(self) -> Dict[str, object]:
+        encodings = {}
+        for encoding, counters in self.encodings.items():
+            encodings[encoding] = {
+                **counters,
+                "ratio": round(counters["bytes_out"] / counters["bytes_in"], 4) if counters["bytes_in"] else None,
+            }
+        return {"encodings": encodings, "skipped": dict(self.skipped)}
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {encoding: q}"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token.strip().lower()] = quality
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    accepted = accepted_encodings(accept_encoding)
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def precompressed_suffixes(accept_encoding: str):
+    """(encoding, suffix) of the precompressed sibling variants (`file.br` / `file.gz`) the client accepts"""
+    accepted = accepted_encodings(accept_encoding)
+    return [(encoding, suffix) for encoding, suffix in PRECOMPRESSED_SUFFIXES if accepted.get(encoding, 0) > 0]
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        flush_mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush_mode)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        output = self._compressor.process(data)
+        return output + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing eligible responses, streamed or not"""
+
+    def __init__(
+        self,
+        app,
+        stats: CompressionStats,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        content_types=DEFAULT_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.stats = stats
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.content_types = tuple(content_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressingResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+    def new_compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    def is_compressible(self, content_type: Optional[str]) -> bool:
+        if not content_type:
+            return False
+        return content_type.split(";")[0].strip().lower() in self.content_types
+
+
+class _CompressingResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send):
+        self.middleware = middleware
+        self.stats = middleware.stats
+        self.encoding = encoding
+        self.downstream_send = send
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def send(self, message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk tells us whether to compress
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            await self.downstream_send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            await self._start(body, more_body)
+            return
+
+        if self.passthrough:
+            await self.downstream_send(message)
+            return
+
+        await self.downstream_send({
+            "type": "http.response.body",
+            "body": self._compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+    async def _start(self, body: bytes, more_body: bool):
+        start_message, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start_message["headers"])
+
+        skip_reason = None
+        if "content-encoding" in headers:
+            skip_reason = "already_encoded"
+        elif not self.middleware.is_compressible(headers.get("content-type")):
+            skip_reason = "content_type"
+        elif not more_body and len(body) < self.middleware.minimum_size:
+            skip_reason = "too_small"
+
+        if skip_reason:
+            self.stats.skipped[skip_reason] += 1
+            self.passthrough = True
+            await self.downstream_send(start_message)
+            await self.downstream_send({"type": "http.response.body", "body": body, "more_body": more_body})
+            return
+
+        self.compressor = self.middleware.new_compressor(self.encoding)
+        compressed = self._compress(body, final=not more_body, response=True)
+
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            # Final length is unknown while streaming
+            if "content-length" in headers:
+                del headers["content-length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+
+        await self.downstream_send(start_message)
+        await self.downstream_send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    def _compress(self, body: bytes, final: bool, response: bool = False) -> bytes:
+        cpu_start = time.thread_time()
+        compressed = self.compressor.compress(body, final)
+        self.stats.record(self.encoding, len(body), len(compressed), time.thread_time() - cpu_start, response)
+        return compressed
+
+
+def precompress_directory(directory: Path, minimum_size: int = 1024, gzip_level: int = 9, brotli_quality: int = 11):
+    """Write `.gz` (and `.br`) siblings for compressible files, for precompressed static serving"""
+    written = 0
+    for path in directory.rglob("*"):
+        if not path.is_file() or path.suffix in (".gz", ".br") or path.stat().st_size < minimum_size:
+            continue
+        data = path.read_bytes()
+        variants = [(".gz", _GzipCompressor(gzip_level).compress(data, final=True))]
+        if brotli is not None:
+            variants.append((".br", brotli.compress(data, quality=brotli_quality)))
+        for suffix, compressed in variants:
+            # Already-compressed formats (JPEG, PNG) gain nothing; keep only real savings
+            if len(compressed) < len(data) * 0.9:
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                written += 1
+    return written
+
+
+if __name__ == "__main__":
+    # python compression.py uploads/  -> precompress every upload at maximum level
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).parent / "uploads"
+    print(f"✅ Wrote {precompress_directory(target)} precompressed files under {target}")
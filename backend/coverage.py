@@ -0,0 +1,66 @@
+"""
+Coverage gaps: upcoming dates with too few available artists per category.
+
+One aggregation does the whole count: the availability days of the range are
+grouped per artist, each artist's category is joined from artist_profiles
+($lookup, once per artist rather than once per day), and the days are counted
+per (date, category). The response holds one small row per date and category
+whatever the number of artists. Dates nobody is available on count as zero
+and blocked dates are skipped, so planners never download the availability
+rows themselves.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Sequence, Set
+
+# Longest range one request may cover
+MAX_RANGE_DAYS = 366
+
+
+def availability_by_category_pipeline(
+    start_date: str, end_date: str, categories: Sequence[str]
+) -> List[Dict[str, Any]]:
+    """Aggregation on availability_days yielding {_id: {date, category}, artists} for the range"""
+    return [
+        {"$match": {"date": {"$gte": start_date, "$lte": end_date}}},
+        {"$group": {"_id": "$artist_id", "dates": {"$addToSet": "$date"}}},
+        {"$lookup": {"from": "artist_profiles", "localField": "_id", "foreignField": "user_id", "as": "profile"}},
+        {"$unwind": "$profile"},
+        # No profile or no category yet: cannot fill a slot
+        {"$match": {"profile.category": {"$in": list(categories)}}},
+        {"$unwind": "$dates"},
+        {"$group": {"_id": {"date": "$dates", "category": "$profile.category"}, "artists": {"$sum": 1}}},
+    ]
+
+
+def counts_by_date(rows: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, int]]:
+    """{date: {category: available artists}} from the pipeline rows"""
+    per_date: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        per_date.setdefault(row["_id"]["date"], {})[row["_id"]["category"]] = row["artists"]
+    return per_date
+
+
+def days_between(start: date, end: date) -> Iterable[str]:
+    for offset in range((end - start).days + 1):
+        yield (start + timedelta(days=offset)).isoformat()
+
+
+def find_gaps(
+    per_date: Mapping[str, Mapping[str, int]],
+    blocked: Set[str],
+    start: date,
+    end: date,
+    categories: Sequence[str],
+    min_artists: int,
+) -> List[Dict[str, Any]]:
+    """Unblocked dates of [start, end] where a category has fewer than `min_artists` artists"""
+    gaps = []
+    for day in days_between(start, end):
+        if day in blocked:
+            continue
+        day_counts = {category: per_date.get(day, {}).get(category, 0) for category in categories}
+        missing = {category: min_artists - count for category, count in day_counts.items() if count < min_artists}
+        if missing:
+            gaps.append({"date": day, "counts": day_counts, "missing": missing})
+    return gaps
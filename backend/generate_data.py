@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Synthetic data generator for load tests and benchmarks.
+
+Creates one admin, N artists with profiles, M availability days per artist
+(skewed towards Friday and Saturday nights), blocked dates and invitations.
+Documents are built in memory batch by batch and written with concurrent
+`insert_many` calls; every account shares one precomputed password hash, and
+ids come from the seeded random generator, so the same seed always produces
+the same dataset.
+
+    python generate_data.py --artists 10000 --days 100 --seed 42 --password loadtest --wipe
+    python generate_data.py --artists 50 --days 20 --password demo123
+
+With --wipe, existing users, profiles, availability days, blocked dates and
+invitations in DB_NAME are deleted first. Wiping is refused unless DB_NAME is
+clearly a scratch database (see SCRATCH_DB_MARKERS).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from dotenv import load_dotenv
+
+# Relative likelihood of an artist being available, Monday..Sunday
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.5, 2.5, 6.0, 7.0, 2.0)
+CATEGORIES = ("DJ", "Groupe")
+COLORS = ("#3b82f6", "#10b981", "#f59e0b", "#8b5cf6", "#ef4444", "#06b6d4")
+NOTES = ("", "", "", "Disponible pour soirée club", "Libre pour événement privé", "Festival possible")
+TIMEZONE = "Europe/Paris"
+COLLECTIONS = ("users", "artist_profiles", "availability_days", "blocked_dates", "invitations")
+# Words of a database name (split on "_", "-" and ".") marking it as safe to wipe
+SCRATCH_DB_MARKERS = ("test", "tests", "scratch", "tmp", "bench", "benchmark", "loadtest")
+
+
+def is_scratch_database(name: str) -> bool:
+    return any(word in SCRATCH_DB_MARKERS for word in re.split(r"[_.-]", name.lower()))
+
+
+def admin_email(domain: str) -> str:
+    return f"admin@{domain}"
+
+
+def artist_email(index: int, domain: str) -> str:
+    return f"artist{index:06d}@{domain}"
+
+
+class DataGenerator:
+    def __init__(self, seed: int, start: date, horizon_days: int, domain: str, password_hash: str):
+        self.rng = random.Random(seed)
+        self.start = start
+        self.domain = domain
+        self.password_hash = password_hash
+        self.now = datetime.now(timezone.utc)
+        self.horizon = [start + timedelta(days=offset) for offset in range(horizon_days)]
+
+    def new_id(self) -> str:
+        # Same format as str(uuid.uuid4()), built without a UUID object (a third of the cost)
+        h = f"{self.rng.getrandbits(128):032x}"
+        return f"{h[:8]}-{h[8:12]}-4{h[13:16]}-{'89ab'[int(h[16], 16) & 3]}{h[17:20]}-{h[20:]}"
+
+    def pick_blocked_dates(self, count: int) -> List[date]:
+        return sorted(self.rng.sample(self.horizon, min(count, len(self.horizon))))
+
+    def user(self, user_id: str, role: str, email: str, created_at: datetime) -> Dict:
+        return {
+            "id": user_id,
+            "role": role,
+            "email": email,
+            "password_hash": self.password_hash,
+            "email_verified_at": created_at,
+            "timezone": TIMEZONE,
+            "created_at": created_at,
+        }
+
+    def artist(self, index: int):
+        """(user, profile) for the index-th artist"""
+        created_at = self.now - timedelta(minutes=index)
+        user = self.user(self.new_id(), "artist", artist_email(index, self.domain), created_at)
+        category = self.rng.choice(CATEGORIES)
+        profile_id = self.new_id()
+        telephone = f"+33 6 {self.rng.randrange(10**8):08d}"
+        tarif = self.rng.randrange(2, 40) * 50
+        profile = {
+            "id": profile_id,
+            "user_id": user["id"],
+            "nom_de_scene": f"{'DJ ' if category == 'DJ' else ''}Artiste {index}",
+            "telephone": telephone,
+            "lien": f"https://soundcloud.com/artiste-{index}",
+            "tarif_soiree": f"{tarif} € / set",
+            "tarif_amount": float(tarif),
+            "tarif_currency": "EUR",
+            "tarif_unit": "set",
+            "category": category,
+            "logo_url": None,
+            "gallery_urls": [],
+            "bio": f"Artiste {index}, {category.lower()} basé(e) en France.",
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        return user, profile
+
+    def availability_days(self, artist_id: str, open_dates: List[str], exponents: List[float], count: int) -> List[Dict]:
+        # Weighted sampling without replacement: keep the `count` largest random keys u^(1/weight)
+        rng_random = self.rng.random
+        keyed = sorted(zip([rng_random() ** exponent for exponent in exponents], open_dates), reverse=True)
+        days = []
+        for _, day in keyed[:count]:
+            bits = self.rng.getrandbits(16)
+            days.append({
+                "id": self.new_id(),
+                "artist_id": artist_id,
+                "date": day,
+                "note": NOTES[bits % len(NOTES)],
+                "color": COLORS[(bits >> 8) % len(COLORS)],
+                "created_at": self.now,
+            })
+        return days
+
+    def invitation(self, index: int) -> Dict:
+        status = self.rng.choices(("envoyée", "acceptée", "expirée"), weights=(5, 3, 2))[0]
+        created_at = self.now - timedelta(days=self.rng.randrange(60), minutes=index)
+        return {
+            "id": self.new_id(),
+            "email": f"invite{index:06d}@{self.domain}",
+            "token": f"{self.rng.getrandbits(192):048x}",
+            "status": status,
+            "expires_at": created_at + timedelta(days=7),
+            "created_at": created_at,
+        }
+
+
+def batched(documents: Iterator[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def insert_all(collection, documents: Iterator[Dict], batch_size: int, concurrency: int) -> int:
+    """insert_many in batches, keeping up to `concurrency` batches in flight"""
+    inserted = 0
+    pending = set()
+    for batch in batched(documents, batch_size):
+        if len(pending) >= concurrency:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                task.result()
+        pending.add(asyncio.ensure_future(collection.insert_many(batch, ordered=False)))
+        inserted += len(batch)
+    if pending:
+        await asyncio.gather(*pending)
+    return inserted
+
+
+async def generate(
+    db,
+    artists: int = 100,
+    days_per_artist: int = 30,
+    blocked_dates: int = 10,
+    invitations: int = 20,
+    horizon_days: int = 365,
+    start: Optional[date] = None,
+    seed: int = 42,
+    *,
+    password_hash: str,
+    domain: str = "demo.app",
+    batch_size: int = 10_000,
+    concurrency: int = 4,
+    wipe: bool = False,
+) -> Dict:
+    """Write a synthetic dataset into `db` and return counts plus the dates left open to artists
+
+    `password_hash` must be a bcrypt hash: login cannot verify anything else.
+    `wipe` first empties COLLECTIONS, and raises ValueError unless `db` is a
+    scratch database (is_scratch_database).
+    """
+    if wipe and not is_scratch_database(db.name):
+        raise ValueError(f"Refusing to wipe {db.name!r}: not a scratch database name ({', '.join(SCRATCH_DB_MARKERS)})")
+    generator = DataGenerator(seed, start or date.today() + timedelta(days=1), horizon_days, domain, password_hash)
+
+    if wipe:
+        await asyncio.gather(*(db[name].delete_many({}) for name in COLLECTIONS))
+
+    blocked = generator.pick_blocked_dates(blocked_dates)
+    blocked_set = set(blocked)
+    open_days = [day for day in generator.horizon if day not in blocked_set]
+    open_dates = [day.isoformat() for day in open_days]
+    exponents = [1.0 / WEEKDAY_WEIGHTS[day.weekday()] for day in open_days]
+
+    admin = generator.user(generator.new_id(), "admin", admin_email(domain), generator.now)
+    users, profiles = [admin], []
+    for index in range(artists):
+        user, profile = generator.artist(index)
+        users.append(user)
+        profiles.append(profile)
+
+    def availability() -> Iterator[Dict]:
+        for user in users[1:]:
+            yield from generator.availability_days(user["id"], open_dates, exponents, days_per_artist)
+
+    counts = {}
+    counts["users"] = await insert_all(db.users, iter(users), batch_size, concurrency)
+    counts["artist_profiles"] = await insert_all(db.artist_profiles, iter(profiles), batch_size, concurrency)
+    counts["availability_days"] = await insert_all(db.availability_days, availability(), batch_size, concurrency)
+    counts["blocked_dates"] = await insert_all(db.blocked_dates, (
+        {"id": generator.new_id(), "date": day.isoformat(), "note": "Date bloquée", "created_at": generator.now}
+        for day in blocked
+    ), batch_size, concurrency)
+    counts["invitations"] = await insert_all(
+        db.invitations, (generator.invitation(index) for index in range(invitations)), batch_size, concurrency
+    )
+
+    return {"counts": counts, "admin_email": admin["email"], "open_days": open_days}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--artists", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30, help="availability days per artist")
+    parser.add_argument("--blocked", type=int, default=10, help="blocked dates")
+    parser.add_argument("--invitations", type=int, default=20)
+    parser.add_argument("--horizon", type=int, default=365, help="days ahead covered by availability")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--password", required=True, help="password for every generated account (hashed once)")
+    parser.add_argument("--domain", default="demo.app", help="email domain of generated accounts")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight")
+    parser.add_argument("--wipe", action="store_true", help="delete existing documents first (scratch databases only)")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db_name = os.environ['DB_NAME']
+    if args.wipe and not is_scratch_database(db_name):
+        parser.error(f"refusing to wipe {db_name!r}: --wipe needs a scratch DB_NAME containing one of {', '.join(SCRATCH_DB_MARKERS)}")
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from passlib.context import CryptContext
+    password_hash = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(args.password)
+
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[db_name]
+
+    print(f"🚀 Generating {args.artists} artists x {args.days} days (seed {args.seed})...")
+    start = time.perf_counter()
+    result = await generate(
+        db,
+        artists=args.artists,
+        days_per_artist=args.days,
+        blocked_dates=args.blocked,
+        invitations=args.invitations,
+        horizon_days=args.horizon,
+        seed=args.seed,
+        password_hash=password_hash,
+        domain=args.domain,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        wipe=args.wipe,
+    )
+    elapsed = time.perf_counter() - start
+    client.close()
+
+    for collection, count in result["counts"].items():
+        print(f"✅ {collection}: {count}")
+    print(f"\n🎉 Done in {elapsed:.1f}s")
+    print(f"   Admin: {result['admin_email']} (password: {args.password})")
+    print(f"   Artists: {artist_email(0, args.domain)} ... (same password)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
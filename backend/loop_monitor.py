@@ -0,0 +1,105 @@
+"""
+Event-loop lag monitor.
+
+A ticker task on the loop sleeps for a fixed interval and measures how late it
+wakes up: that delay is time the loop spent running something else without
+yielding. A watchdog thread checks the ticker's heartbeat, and when the loop
+has been stuck for longer than the threshold it snapshots the loop thread's
+stack, which is the code that is blocking it (bcrypt, a synchronous HTTP call,
+file I/O...). Each blocking episode is logged with that stack and counted per
+blocking site in the metrics.
+"""
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import List, Optional
+
+from metrics import Registry
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def blocking_site(stack: List[traceback.FrameSummary]) -> str:
+    """Innermost frame from our own code (else the innermost frame), as `file:function:line`"""
+    ours = [frame for frame in stack if frame.filename.startswith(BACKEND_DIR)]
+    frame = (ours or stack)[-1]
+    return f"{os.path.basename(frame.filename)}:{frame.name}:{frame.lineno}"
+
+
+class LoopLagMonitor:
+    def __init__(self, registry: Registry, interval: float = 0.1, threshold: float = 0.1):
+        self.interval = interval
+        self.threshold = threshold
+        self.lag = registry.histogram(
+            "event_loop_lag_seconds", "Delay between scheduled and actual ticker wake-ups", buckets=LAG_BUCKETS
+        )
+        self.blocks = registry.counter(
+            "event_loop_blocks_total", "Event loop stalls above the lag threshold, by blocking site", ("site",)
+        )
+        self._heartbeat = time.monotonic()
+        self._stack: Optional[List[traceback.FrameSummary]] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._tick())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._watchdog:
+            self._watchdog.join(timeout=1)
+
+    async def _tick(self):
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(time.monotonic() - self._heartbeat - self.interval, 0.0)
+            self.lag.observe(value=lag)
+            if lag >= self.threshold:
+                self._report(lag)
+            self._stack = None
+
+    def _watch(self):
+        # Poll at half the threshold so a stall is caught while it is still in progress
+        while not self._stop.wait(self.threshold / 2):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold or self._stack is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._stack = traceback.extract_stack(frame)
+
+    def _report(self, lag: float):
+        stack = self._stack
+        if not stack:
+            # Stall ended before the watchdog looked; we only know how long it was
+            self.blocks.inc("<unknown>")
+            logger.warning("Event loop blocked for %.0f ms", lag * 1000)
+            return
+
+        site = blocking_site(stack)
+        self.blocks.inc(site)
+        logger.warning(
+            "Event loop blocked for %.0f ms at %s\n%s", lag * 1000, site, "".join(traceback.format_list(stack))
+        )
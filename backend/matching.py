@@ -0,0 +1,317 @@
+"""
+In-memory index for ranked artist matching ("find me a DJ for Saturday").
+
+Every worker keeps, for each artist with a profile, the features the ranking
+uses (category, parsed price, upcoming availability, last activity) and the
+display fields of a match row, plus the set of artists available on each
+upcoming date, and the upcoming blocked dates (which never match). A match is
+a set intersection and a top-k selection in memory, without a Mongo round
+trip.
+
+Freshness:
+
+  * writes served by this worker update the index directly (see the hooks
+    called from server.py);
+  * every refresh interval, profiles updated, availability days created and
+    removal tombstones written since the last high-water mark are read back
+    and applied in time order, together with the current blocked dates, which
+    brings in the writes of the other workers (deleted documents leave nothing
+    to read, so handlers deleting availability or artists record a tombstone
+    in `matching_tombstones`, which expires after TOMBSTONE_TTL);
+  * every rebuild interval the index is rebuilt from scratch, which also drops
+    dates that have passed.
+
+The index costs about one set entry per upcoming availability day.
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import projections
+
+logger = logging.getLogger(__name__)
+
+# Weights of the score components, each in [0, 1]
+WEIGHTS = {"price": 0.4, "availability": 0.3, "activity": 0.3}
+# Upcoming availability days that earn the full availability score
+AVAILABILITY_SATURATION = 30
+ACTIVITY_HALF_LIFE_DAYS = 30
+# Price score of an artist without a parsed price, or of any artist without a budget
+NEUTRAL_PRICE_SCORE = 0.5
+# Re-read this much before the previous refresh, for writes committed out of order
+REFRESH_OVERLAP = timedelta(seconds=5)
+# Tombstones outlive any sensible refresh interval; the next rebuild covers older removals anyway
+TOMBSTONE_TTL = timedelta(days=1)
+
+PROFILE_FEATURES = projections.fields(
+    "user_id", "nom_de_scene", "category", "logo_url", *projections.PRICE_FIELDS, "updated_at"
+)
+AVAILABILITY_FEATURES = projections.fields("artist_id", "date", "created_at")
+TOMBSTONE_FIELDS = projections.fields("artist_id", "date", "removed_at")
+
+
+async def record_removal(db, artist_id: str, day: Optional[str] = None):
+    """Tell the other workers' indexes that an availability day (or, without `day`, an artist) is gone"""
+    await db.matching_tombstones.insert_one({"artist_id": artist_id, "date": day, "removed_at": datetime.now(timezone.utc)})
+
+
+def _aware(moment: Optional[datetime]) -> Optional[datetime]:
+    # Mongo hands datetimes back naive (in UTC)
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+@dataclass
+class ArtistFeatures:
+    id: str
+    email: str = ""
+    nom_de_scene: str = ""
+    category: Optional[str] = None
+    logo_url: Optional[str] = None
+    tarif_soiree: Optional[str] = None
+    tarif_amount: Optional[float] = None
+    tarif_currency: Optional[str] = None
+    tarif_unit: Optional[str] = None
+    last_active: Optional[datetime] = None
+    dates: Set[str] = field(default_factory=set)
+
+    def apply_profile(self, profile: Dict[str, Any]):
+        for name in ("nom_de_scene", "category", "logo_url", *projections.PRICE_FIELDS):
+            if name in profile:
+                setattr(self, name, profile[name])
+        self.nom_de_scene = self.nom_de_scene or ""
+        self.touch(profile.get("updated_at"))
+
+    def touch(self, moment: Optional[datetime]):
+        moment = _aware(moment)
+        if moment is not None and (self.last_active is None or moment > self.last_active):
+            self.last_active = moment
+
+
+def score_components(artist: ArtistFeatures, budget: Optional[float], now: datetime) -> Dict[str, float]:
+    """Each ranking feature of `artist` scaled to [0, 1]"""
+    if budget and artist.tarif_amount is not None:
+        # Within budget (the match filters the rest): the cheaper, the better
+        price = 1 - 0.5 * min(artist.tarif_amount / budget, 1)
+    else:
+        price = NEUTRAL_PRICE_SCORE
+    availability = min(len(artist.dates), AVAILABILITY_SATURATION) / AVAILABILITY_SATURATION
+    activity = 0.0
+    if artist.last_active is not None:
+        age_days = max((now - artist.last_active).total_seconds(), 0) / 86400
+        activity = 0.5 ** (age_days / ACTIVITY_HALF_LIFE_DAYS)
+    return {"price": price, "availability": availability, "activity": activity}
+
+
+class MatchingIndex:
+    def __init__(self):
+        self.artists: Dict[str, ArtistFeatures] = {}
+        self.by_date: Dict[str, Set[str]] = defaultdict(set)
+        self.blocked: Set[str] = set()
+        self.ready = False
+        self.built_at: Optional[float] = None
+        self.refreshed_at: Optional[float] = None
+        self._since: Optional[datetime] = None  # high-water mark of the last load or refresh
+
+    # Loading
+
+    async def rebuild(self, db, today: Optional[date] = None):
+        """Load every artist profile and upcoming availability day, then swap the index in"""
+        started = datetime.now(timezone.utc)
+        today_str = (today or started.date()).isoformat()
+
+        users = await db.users.find({"role": "artist"}, projections.USER_CONTACT).to_list(None)
+        emails = {user["id"]: user["email"] for user in users}
+        artists: Dict[str, ArtistFeatures] = {}
+        async for profile in db.artist_profiles.find({}, PROFILE_FEATURES):
+            user_id = profile.get("user_id")
+            if user_id in emails:
+                artist = ArtistFeatures(user_id, email=emails[user_id])
+                artist.apply_profile(profile)
+                artists[user_id] = artist
+
+        blocked = set(await db.blocked_dates.distinct("date", {"date": {"$gte": today_str}}))
+        by_date: Dict[str, Set[str]] = defaultdict(set)
+        async for day in db.availability_days.find({"date": {"$gte": today_str}}, AVAILABILITY_FEATURES):
+            artist = artists.get(day["artist_id"])
+            if artist is not None and day["date"] not in blocked:
+                artist.dates.add(day["date"])
+                artist.touch(day.get("created_at"))
+                by_date[day["date"]].add(artist.id)
+
+        self.artists, self.by_date, self.blocked = artists, by_date, blocked
+        # Writes landing during the load are read again by the next refresh
+        self._since = started - REFRESH_OVERLAP
+        self.ready = True
+        self.built_at = self.refreshed_at = time.time()
+
+    async def refresh(self, db, today: Optional[date] = None):
+        """Apply the profile, availability and blocked date changes since the last load or refresh"""
+        started = datetime.now(timezone.utc)
+        today_str = (today or started.date()).isoformat()
+
+        profiles = await db.artist_profiles.find(
+            {"updated_at": {"$gte": self._since}}, PROFILE_FEATURES
+        ).to_list(None)
+        unknown = [profile["user_id"] for profile in profiles if profile.get("user_id") not in self.artists]
+        emails = {}
+        if unknown:
+            users = await db.users.find({"id": {"$in": unknown}, "role": "artist"}, projections.USER_CONTACT).to_list(None)
+            emails = {user["id"]: user["email"] for user in users}
+        for profile in profiles:
+            user_id = profile.get("user_id")
+            if user_id in self.artists or user_id in emails:
+                self.update_profile(user_id, profile, email=emails.get(user_id))
+
+        days, tombstones, blocked = await asyncio.gather(
+            db.availability_days.find(
+                {"created_at": {"$gte": self._since}, "date": {"$gte": today_str}}, AVAILABILITY_FEATURES
+            ).to_list(None),
+            db.matching_tombstones.find({"removed_at": {"$gte": self._since}}, TOMBSTONE_FIELDS).to_list(None),
+            db.blocked_dates.distinct("date", {"date": {"$gte": today_str}}),
+        )
+        # A day removed then added again (or the reverse) ends up as its latest write left it
+        changes: List[Tuple[datetime, bool, Dict[str, Any]]] = [
+            *((_aware(day.get("created_at")), True, day) for day in days),
+            *((_aware(tombstone["removed_at"]), False, tombstone) for tombstone in tombstones),
+        ]
+        for _, available, change in sorted(changes, key=lambda item: (item[0], item[1])):
+            if change["date"] is None:
+                self.remove_artist(change["artist_id"])
+            else:
+                self.set_available(change["artist_id"], change["date"], available, change.get("created_at"))
+        self.set_blocked_dates(blocked)
+
+        self._since = started - REFRESH_OVERLAP
+        self.refreshed_at = time.time()
+
+    async def run(self, db, refresh_interval: float, rebuild_interval: float):
+        """Build the index, then keep it fresh until cancelled"""
+        while True:
+            try:
+                if not self.ready or time.time() - self.built_at >= rebuild_interval:
+                    started = time.perf_counter()
+                    await self.rebuild(db)
+                    logger.info(
+                        "Matching index built: %d artists, %d dates in %.0f ms",
+                        len(self.artists), len(self.by_date), (time.perf_counter() - started) * 1000,
+                    )
+                else:
+                    await self.refresh(db)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Matching index refresh failed")
+            await asyncio.sleep(refresh_interval)
+
+    # Hooks for the writes served by this worker
+
+    def update_profile(self, user_id: str, profile: Dict[str, Any], email: Optional[str] = None):
+        artist = self.artists.get(user_id)
+        if artist is None:
+            if not email:
+                return  # the next refresh loads it with its email
+            artist = self.artists[user_id] = ArtistFeatures(user_id)
+        if email:
+            artist.email = email
+        artist.apply_profile(profile)
+
+    def set_available(self, artist_id: str, day: str, available: bool, moment: Optional[datetime] = None):
+        artist = self.artists.get(artist_id)
+        if artist is None:
+            return  # no profile yet: not matchable
+        if available and day in self.blocked:
+            return  # blocking a date deletes its availability
+        if available:
+            artist.dates.add(day)
+            self.by_date[day].add(artist_id)
+            artist.touch(moment or datetime.now(timezone.utc))
+        else:
+            artist.dates.discard(day)
+            self.by_date.get(day, set()).discard(artist_id)
+
+    def remove_artist(self, artist_id: str):
+        artist = self.artists.pop(artist_id, None)
+        if artist is not None:
+            for day in artist.dates:
+                self.by_date.get(day, set()).discard(artist_id)
+
+    def block_date(self, day: str):
+        """Blocking a date deletes every availability on it"""
+        self.blocked.add(day)
+        for artist_id in self.by_date.pop(day, set()):
+            self.artists[artist_id].dates.discard(day)
+
+    def unblock_date(self, day: str):
+        self.blocked.discard(day)
+
+    def set_blocked_dates(self, days: Iterable[str]):
+        days = set(days)
+        for day in days - self.blocked:
+            self.block_date(day)
+        self.blocked = days
+
+    # Queries
+
+    def match(
+        self,
+        dates: Iterable[str],
+        category: Optional[str] = None,
+        budget: Optional[float] = None,
+        limit: int = 10,
+        now: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """The `limit` best artists available on every one of `dates`, best first"""
+        now = now or datetime.now(timezone.utc)
+        dates = set(dates)
+        if not dates or dates & self.blocked:
+            return []
+        candidate_sets = sorted((self.by_date.get(day, set()) for day in dates), key=len)
+        candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+
+        scored = []
+        for artist_id in candidates:
+            artist = self.artists[artist_id]
+            if category and artist.category != category:
+                continue
+            if budget is not None and artist.tarif_amount is not None and artist.tarif_amount > budget:
+                continue
+            components = score_components(artist, budget, now)
+            score = sum(WEIGHTS[name] * value for name, value in components.items())
+            scored.append((score, artist_id, components))
+
+        best = heapq.nsmallest(limit, scored, key=lambda item: (-item[0], item[1]))
+        return [self._row(self.artists[artist_id], score, components) for score, artist_id, components in best]
+
+    @staticmethod
+    def _row(artist: ArtistFeatures, score: float, components: Dict[str, float]) -> Dict[str, Any]:
+        return {
+            "id": artist.id,
+            "email": artist.email,
+            "nom_de_scene": artist.nom_de_scene,
+            "category": artist.category,
+            "logo_url": artist.logo_url,
+            "tarif_soiree": artist.tarif_soiree,
+            "tarif_amount": artist.tarif_amount,
+            "tarif_currency": artist.tarif_currency,
+            "tarif_unit": artist.tarif_unit,
+            "score": round(score, 4),
+            "score_components": {name: round(value, 4) for name, value in components.items()},
+            "availability_count": len(artist.dates),
+            "last_active": artist.last_active,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "artists": len(self.artists),
+            "available_days": sum(len(artists) for artists in self.by_date.values()),
+            "age_seconds": round(time.time() - self.refreshed_at, 1) if self.refreshed_at else None,
+        }
@@ -0,0 +1,218 @@
+"""
+Minimal Prometheus metrics: counters, gauges and histograms with labels,
+rendered in the text exposition format by Registry.render().
+
+Recording is a dict lookup plus an uncontended lock, so it is cheap enough for
+the request hot path and for pymongo's monitoring threads. Values owned by
+other components (queue depths, cache counters) are read at scrape time
+through registered collectors instead of being pushed on every change.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+from pymongo import monitoring
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for label_values, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, *label_values: str, value: float):
+        with self._lock:
+            self._values[label_values] = value
+
+    def dec(self, *label_values: str, amount: float = 1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, *label_values: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for label_values, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, label_values, le)} {cumulative}")
+            labels = _format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+
+    def _register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            return self._metrics[metric.name]
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def collector(self, fn):
+        """Register fn() -> iterable of (name, kind, help, labels, value), evaluated at scrape time"""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        declared = set()
+        for collect in self._collectors:
+            for name, kind, documentation, labels, value in collect():
+                if name not in declared:
+                    declared.add(name)
+                    lines.append(f"# HELP {name} {documentation}")
+                    lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class HTTPMetricsMiddleware:
+    """Request latency per route template, request counts and in-flight requests"""
+
+    def __init__(self, app, registry: Registry):
+        self.app = app
+        self.in_flight = registry.gauge("http_requests_in_flight", "HTTP requests currently being served")
+        self.requests = registry.counter(
+            "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+        )
+        self.latency = registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route")
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.in_flight.dec()
+            # The router stores the matched route on the scope; templates keep label cardinality bounded
+            route = scope.get("route")
+            route_template = getattr(route, "path", None) or "<unmatched>"
+            self.requests.inc(scope["method"], route_template, str(status_code))
+            self.latency.observe(scope["method"], route_template, value=elapsed)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo command listener counting and timing commands per collection"""
+
+    def __init__(self, registry: Registry):
+        self.commands = registry.counter(
+            "mongo_commands_total", "Mongo commands by collection, command and outcome", ("collection", "command", "outcome")
+        )
+        self.latency = registry.histogram(
+            "mongo_command_duration_seconds", "Mongo command latency by collection and command", ("collection", "command")
+        )
+        self._collections: Dict[Tuple[int, int], str] = {}
+
+    @staticmethod
+    def collection_of(event: monitoring.CommandStartedEvent) -> str:
+        # getMore names the collection in a separate field; other commands use the command value
+        target = event.command.get("collection") if event.command_name == "getMore" else event.command.get(event.command_name)
+        return target if isinstance(target, str) else ""
+
+    def started(self, event):
+        self._collections[(event.request_id, event.operation_id)] = self.collection_of(event)
+
+    def _finish(self, event, outcome: str):
+        collection = self._collections.pop((event.request_id, event.operation_id), "")
+        self.commands.inc(collection, event.command_name, outcome)
+        self.latency.observe(collection, event.command_name, value=event.duration_micros / 1_000_000)
+
+    def succeeded(self, event):
+        self._finish(event, "success")
+
+    def failed(self, event):
+        self._finish(event, "failure")
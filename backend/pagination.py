@@ -0,0 +1,152 @@
+"""
+Keyset (cursor) pagination shared by the list endpoints.
+
+Pages are ordered by a sort field plus `id` as a tie-breaker (or another
+unique key), and the next page starts strictly after the last (sort value,
+key) pair that was returned. The
+opaque cursor is handed back in the `X-Next-Cursor` response header so list
+bodies keep their plain JSON array shape.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, Response
+
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 2000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_PAGE_SIZE
+    cursor: Optional[str] = None
+    sort_field: str = "created_at"
+    descending: bool = False
+    fields: Optional[List[str]] = None
+
+    @property
+    def sort(self) -> str:
+        return f"-{self.sort_field}" if self.descending else self.sort_field
+
+    def wants(self, field: str) -> bool:
+        return self.fields is None or field in self.fields
+
+    def projection(self, document_fields: Sequence[str], required: Sequence[str] = ()) -> Dict[str, int]:
+        """Mongo projection for the requested fields, always keeping what the cursor needs"""
+        if self.fields is None:
+            return {"_id": 0}
+        keep = {"id", self.sort_field, *required}
+        keep.update(field for field in self.fields if field in document_fields)
+        projection = {field: 1 for field in sorted(keep)}
+        projection["_id"] = 0
+        return projection
+
+
+def page_params(sort_fields: Sequence[str], default_sort: str, allowed_fields: Sequence[str]):
+    """Build a FastAPI dependency parsing limit/cursor/sort/fields for one endpoint"""
+
+    def dependency(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None,
+        sort: str = default_sort,
+        fields: Optional[str] = None,
+    ) -> PageParams:
+        descending = sort.startswith("-")
+        sort_field = sort.lstrip("-")
+        if sort_field not in sort_fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Tri invalide. Utilisez : {', '.join(sort_fields)} (préfixe '-' pour décroissant)",
+            )
+
+        requested_fields = None
+        if fields:
+            requested_fields = [field.strip() for field in fields.split(",") if field.strip()]
+            unknown = [field for field in requested_fields if field not in allowed_fields]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Champs inconnus : {', '.join(unknown)}")
+
+        return PageParams(
+            limit=limit,
+            cursor=cursor,
+            sort_field=sort_field,
+            descending=descending,
+            fields=requested_fields,
+        )
+
+    return dependency
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(page: PageParams, document: Dict[str, Any], key: str = "id") -> str:
+    payload = {"s": page.sort, "v": _encode_value(document.get(page.sort_field)), "id": document[key]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(page: PageParams) -> Tuple[Any, str]:
+    """Return the (sort value, key) the page must start after"""
+    try:
+        padded = page.cursor + "=" * (-len(page.cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        if payload["s"] != page.sort:
+            raise ValueError("cursor sort mismatch")
+        return _decode_value(payload["v"]), payload["id"]
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Curseur de pagination invalide")
+
+
+def keyset_query(query: Dict[str, Any], page: PageParams, key: str = "id") -> Dict[str, Any]:
+    """Restrict `query` to documents after the page cursor"""
+    if not page.cursor:
+        return query
+
+    last_value, last_key = decode_cursor(page)
+    after = "$lt" if page.descending else "$gt"
+    keyset = {"$or": [
+        {page.sort_field: {after: last_value}},
+        {page.sort_field: last_value, key: {after: last_key}},
+    ]}
+    return {"$and": [query, keyset]} if query else keyset
+
+
+async def fetch_page(collection, query: Dict[str, Any], page: PageParams, projection: Optional[Dict[str, int]] = None):
+    """Fetch one page of documents. Returns (documents, next_cursor or None)."""
+    direction = -1 if page.descending else 1
+    cursor = collection.find(keyset_query(query, page), projection or {"_id": 0})
+    cursor = cursor.sort([(page.sort_field, direction), ("id", direction)]).limit(page.limit + 1)
+    documents = await cursor.to_list(page.limit + 1)
+
+    next_cursor = None
+    if len(documents) > page.limit:
+        documents = documents[:page.limit]
+        next_cursor = encode_cursor(page, documents[-1])
+    return documents, next_cursor
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+
+def select_fields(item: Dict[str, Any], page: PageParams) -> Dict[str, Any]:
+    """Trim a response row to the requested fields (id is always kept)"""
+    if page.fields is None:
+        return item
+    return {key: value for key, value in item.items() if key == "id" or key in page.fields}
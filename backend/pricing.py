@@ -0,0 +1,122 @@
+"""
+Structured prices read from the free-text `tarif_soiree` ("500 € / set").
+
+Profile writes store the parsed amount, currency and unit as `tarif_amount`,
+`tarif_currency` and `tarif_unit` next to the display string, so prices are
+filtered and sorted on an indexed number instead of loading every profile.
+Text without a recognisable amount ("sur devis") stores None in all three;
+backfill_tarifs.py fills them in for profiles written before they existed.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from pagination import PageParams, decode_cursor, encode_cursor, keyset_query
+
+PRICE_SORT = "tarif_amount"
+# Profiles upserted without an `id` still have a unique user_id
+PRICE_PAGE_KEY = "user_id"
+
+# Either digit groups of three ("1 200", "1.200", "1,200") or plain digits, an
+# optional decimal part of one or two digits and an optional "k" multiplier
+AMOUNT_PATTERN = re.compile(
+    r"(?<![\d.,])(\d{1,3}(?:[ \u00a0\u202f.,']\d{3})+|\d+)(?:[.,](\d{1,2}))?(?!\d)\s*(k(?![a-z]))?",
+    re.IGNORECASE,
+)
+GROUP_SEPARATORS = re.compile(r"[ \u00a0\u202f.,']")
+
+# (code, pattern), first match wins
+CURRENCIES = (
+    ("EUR", re.compile(r"€|\beur(?:os?)?\b", re.IGNORECASE)),
+    ("USD", re.compile(r"\$|\busd\b", re.IGNORECASE)),
+    ("GBP", re.compile(r"£|\bgbp\b", re.IGNORECASE)),
+    ("CHF", re.compile(r"\bchf\b", re.IGNORECASE)),
+)
+UNITS = (
+    ("set", re.compile(r"\bsets?\b", re.IGNORECASE)),
+    ("heure", re.compile(r"\bheures?\b|/\s*h\b", re.IGNORECASE)),
+    ("jour", re.compile(r"\bjours?\b|\bjourn[ée]es?\b", re.IGNORECASE)),
+    ("soirée", re.compile(r"\bsoir[ée]es?\b|\bsoirs?\b|\bnuits?\b|\bdates?\b", re.IGNORECASE)),
+)
+# The platform quotes evening rates in euros unless the text says otherwise
+DEFAULT_CURRENCY = "EUR"
+DEFAULT_UNIT = "soirée"
+
+
+@dataclass
+class Tarif:
+    amount: Optional[float] = None
+    currency: Optional[str] = None
+    unit: Optional[str] = None
+
+    def fields(self) -> Dict[str, Any]:
+        """The profile fields stored next to tarif_soiree"""
+        return {"tarif_amount": self.amount, "tarif_currency": self.currency, "tarif_unit": self.unit}
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """First amount in `text` ("1 200 € / set" -> 1200.0), None when there is none"""
+    match = AMOUNT_PATTERN.search(text)
+    if not match:
+        return None
+    whole, decimals, thousands = match.groups()
+    amount = float(GROUP_SEPARATORS.sub("", whole) + (f".{decimals}" if decimals else ""))
+    return amount * 1000 if thousands else amount
+
+
+def parse_tarif(text: Optional[str]) -> Tarif:
+    """Amount, currency code and unit of a tarif_soiree ("500 € / set" -> 500.0, EUR, set)"""
+    amount = parse_amount(text) if text else None
+    if amount is None:
+        return Tarif()
+    currency = next((code for code, pattern in CURRENCIES if pattern.search(text)), DEFAULT_CURRENCY)
+    unit = next((code for code, pattern in UNITS if pattern.search(text)), DEFAULT_UNIT)
+    return Tarif(amount, currency, unit)
+
+
+def price_filter(min_price: Optional[float] = None, max_price: Optional[float] = None) -> Dict[str, Any]:
+    """Mongo filter on tarif_amount for a price range; profiles without a parsed price never match"""
+    price: Dict[str, float] = {"$gte": min_price if min_price is not None else 0}
+    if max_price is not None:
+        price["$lte"] = max_price
+    return {"tarif_amount": price}
+
+
+async def fetch_price_page(
+    collection, query: Dict[str, Any], page: PageParams, projection: Dict[str, int]
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of profiles matching `query`, ordered by price with unpriced profiles last.
+
+    Mongo sorts missing prices first, so priced profiles are walked on
+    (tarif_amount, user_id), then unpriced ones on user_id. A cursor whose price
+    is None already points into the unpriced profiles. Returns (profiles,
+    next_cursor or None).
+    """
+    direction = -1 if page.descending else 1
+    projection = {**projection, PRICE_SORT: 1, PRICE_PAGE_KEY: 1}
+    unpriced_only, last_key = False, None
+    if page.cursor:
+        last_price, last_key = decode_cursor(page)
+        unpriced_only = last_price is None
+
+    profiles = []
+    if not unpriced_only:
+        priced = {"$and": [query, {PRICE_SORT: {"$type": "number"}}]}
+        profiles = await collection.find(keyset_query(priced, page, PRICE_PAGE_KEY), projection).sort(
+            [(PRICE_SORT, direction), (PRICE_PAGE_KEY, direction)]
+        ).to_list(page.limit + 1)
+
+    # A price range never matches unpriced profiles
+    if len(profiles) <= page.limit and PRICE_SORT not in query:
+        unpriced = {"$and": [query, {PRICE_SORT: None}]}
+        if unpriced_only:
+            unpriced["$and"].append({PRICE_PAGE_KEY: {"$lt" if page.descending else "$gt": last_key}})
+        room = page.limit + 1 - len(profiles)
+        profiles += await collection.find(unpriced, projection).sort(PRICE_PAGE_KEY, direction).to_list(room)
+
+    next_cursor = None
+    if len(profiles) > page.limit:
+        profiles = profiles[:page.limit]
+        next_cursor = encode_cursor(page, profiles[-1], PRICE_PAGE_KEY)
+    return profiles, next_cursor
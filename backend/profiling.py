@@ -0,0 +1,199 @@
+"""
+On-demand request profiling for admins.
+
+A request carrying `X-Profile: 1` (or `?profile=1`) from an admin is served
+under a sampling profiler: a background thread snapshots the event-loop
+thread's stack at a fixed interval while the request runs. Samples are stored
+in the folded-stack format (`frame;frame;frame count` per line) read by
+flamegraph.pl, speedscope and most flame-graph viewers. The profile id comes
+back in the `X-Profile-Id` header.
+
+Sampling is cheap, but to keep profiling from becoming a load amplifier only
+one request is profiled at a time, profiles are spaced by a minimum interval
+and capped in duration. That gate is checked before the caller is authorized,
+so flagged requests cost an extra token check at most once per interval. The sampler sees the whole loop thread, so requests
+running concurrently with the profiled one show up in its samples too.
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.requests import Request
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_ID_HEADER = "X-Profile-Id"
+PROFILE_STATUS_HEADER = "X-Profile-Status"
+MIN_SAMPLE_INTERVAL = 0.001
+# Longest wait for the sampler thread to exit once stopped
+STOP_TIMEOUT = 1.0
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}"
+
+
+class StackSampler:
+    """Samples one thread's stack into folded-stack counts"""
+
+    def __init__(self, thread_id: int, interval: float, max_seconds: float):
+        self.thread_id = thread_id
+        self.interval = max(interval, MIN_SAMPLE_INTERVAL)
+        self.max_seconds = max_seconds
+        self.samples: Counter = Counter()
+        self.truncated = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    async def stop(self) -> Counter:
+        """Stop sampling; the thread is joined off the event loop"""
+        self._stop.set()
+        await asyncio.get_running_loop().run_in_executor(None, self._thread.join, STOP_TIMEOUT)
+        return Counter(self.samples)
+
+    def _run(self):
+        deadline = time.monotonic() + self.max_seconds
+        while not self._stop.wait(self.interval):
+            if time.monotonic() > deadline:
+                self.truncated = True
+                return
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            if stack:
+                self.samples[";".join(reversed(stack))] += 1
+
+
+class ProfileStore:
+    """The most recent profiles, kept in memory"""
+
+    def __init__(self, max_profiles: int = 20):
+        self.max_profiles = max_profiles
+        self._profiles: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def new_id(self) -> str:
+        return f"{int(time.time())}-{next(self._ids)}"
+
+    def add(self, profile: Dict[str, Any]):
+        self._profiles[profile["id"]] = profile
+        while len(self._profiles) > self.max_profiles:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [
+            {key: value for key, value in profile.items() if key != "folded"}
+            for profile in reversed(self._profiles.values())
+        ]
+
+
+def folded(samples: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class ProfilingMiddleware:
+    """Pure ASGI middleware profiling flagged requests that `authorize(request)` accepts"""
+
+    def __init__(
+        self,
+        app,
+        store: ProfileStore,
+        authorize,
+        sample_interval: float = 0.005,
+        min_interval: float = 10.0,
+        max_seconds: float = 30.0,
+    ):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+        self.sample_interval = sample_interval
+        self.min_interval = min_interval
+        self.max_seconds = max_seconds
+        self._busy = False
+        self._last_started = 0.0
+
+    @staticmethod
+    def is_requested(scope) -> bool:
+        flag = Headers(scope=scope).get(PROFILE_HEADER) or QueryParams(scope.get("query_string", b"")).get("profile")
+        return (flag or "").lower() in ("1", "true")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.is_requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        now = time.monotonic()
+        if self._busy or now - self._last_started < self.min_interval:
+            await self.app(scope, receive, self._with_headers(send, {PROFILE_STATUS_HEADER: "rate-limited"}))
+            return
+
+        # Claimed before authorizing: one authorization per interval, whoever sends the flag
+        self._busy = True
+        self._last_started = now
+        try:
+            allowed = await self.authorize(Request(scope))
+        except BaseException:
+            self._busy = False
+            raise
+        if not allowed:
+            # Not an admin: serve the request as if the flag was absent
+            self._busy = False
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id()
+        sampler = StackSampler(threading.get_ident(), self.sample_interval, self.max_seconds)
+        started_at = datetime.now(timezone.utc)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, self._with_headers(send_wrapper, {PROFILE_ID_HEADER: profile_id}))
+        finally:
+            samples = await sampler.stop()
+            self._busy = False
+            self.store.add({
+                "id": profile_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status_code,
+                "started_at": started_at.isoformat(),
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "sample_interval_ms": sampler.interval * 1000,
+                "samples": sum(samples.values()),
+                "truncated": sampler.truncated,
+                "folded": folded(samples),
+            })
+
+    @staticmethod
+    def _with_headers(send, extra: Dict[str, str]):
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                for name, value in extra.items():
+                    headers[name] = value
+            await send(message)
+        return send_wrapper
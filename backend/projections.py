@@ -0,0 +1,49 @@
+"""
+Mongo projections: the fields each query actually needs.
+
+Handlers pass one of these to find/find_one instead of loading whole documents,
+so large fields (bio, gallery_urls, password_hash) only leave Mongo when the
+response really uses them.
+"""
+
+from typing import Dict
+
+
+def fields(*names: str) -> Dict[str, int]:
+    """Projection including only `names` (and never Mongo's `_id`)"""
+    projection = {name: 1 for name in names}
+    projection["_id"] = 0
+    return projection
+
+
+# Existence checks
+ID_ONLY = fields("id")
+
+# users
+USER_AUTH = fields("id", "role", "email", "timezone", "email_verified_at")
+USER_CREDENTIALS = fields("email", "password_hash")
+USER_CONTACT = fields("id", "email")
+
+# artist_profiles
+PROFILE_FULL = {"_id": 0}
+# The display string and the fields parsed from it (see pricing.py)
+PRICE_FIELDS = ("tarif_soiree", "tarif_amount", "tarif_currency", "tarif_unit")
+PROFILE_DETAILS = fields(
+    "user_id", "nom_de_scene", "telephone", "lien", *PRICE_FIELDS, "logo_url", "gallery_urls", "bio", "category"
+)
+PROFILE_SUMMARY = fields("user_id", "nom_de_scene", "category", "logo_url", *PRICE_FIELDS)
+PROFILE_DISPLAY_NAME = fields("user_id", "nom_de_scene", "category")
+PROFILE_EXPORT = fields("user_id", "nom_de_scene", "tarif_soiree")
+PROFILE_LOGO = fields("logo_url")
+PROFILE_GALLERY = fields("gallery_urls")
+PROFILE_FILES = fields("logo_url", "gallery_urls")
+PROFILE_SEARCH = fields("user_id", "nom_de_scene", "category", "logo_url", *PRICE_FIELDS, "score")
+
+# invitations
+INVITATION_VALIDITY = fields("email", "expires_at")
+
+# availability_days
+AVAILABILITY_OWNER = fields("id", "artist_id", "date")
+
+# blocked_dates
+BLOCKED_DATE_DAY = fields("id", "date")
@@ -0,0 +1,163 @@
+"""
+Per-request Mongo command monitoring.
+
+QueryMonitorMiddleware opens a RequestQueryLog for each HTTP request, stored
+in a context variable. Motor copies the context into its executor threads, so
+QueryMonitorListener (a pymongo CommandListener) can attribute every command
+to the request that issued it. For each request the middleware:
+
+  * adds a `Server-Timing: db;dur=<ms>;desc="<n> queries"` header,
+  * logs commands slower than a threshold together with their filter shape,
+  * flags filter shapes repeated more than N times as a likely N+1 pattern.
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+
+from metrics import MongoCommandMetrics
+
+logger = logging.getLogger(__name__)
+
+current_query_log: contextvars.ContextVar[Optional["RequestQueryLog"]] = contextvars.ContextVar(
+    "current_query_log", default=None
+)
+
+
+def _shape(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in sorted(value.items())}
+    if isinstance(value, list) and value and all(isinstance(item, dict) for item in value):
+        # $and / $or / pipelines: keep the structure of each clause
+        return [_shape(item) for item in value]
+    return "?"
+
+
+def filter_shape(filter_document: Optional[Dict[str, Any]]) -> str:
+    """Canonical filter with every value replaced by '?', e.g. {"user_id": "?"}"""
+    if not filter_document:
+        return "{}"
+    return json.dumps(_shape(filter_document), sort_keys=True, separators=(",", ":"), default=str)
+
+
+def command_filter(command_name: str, command: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The filter part of a Mongo command, wherever that command keeps it"""
+    if command_name == "find":
+        return command.get("filter")
+    if command_name in ("count", "distinct", "findAndModify"):
+        return command.get("query")
+    if command_name == "aggregate":
+        stages = command.get("pipeline") or []
+        return stages[0].get("$match") if stages and "$match" in stages[0] else None
+    if command_name == "update":
+        updates = command.get("updates") or []
+        return updates[0].get("q") if updates else None
+    if command_name == "delete":
+        deletes = command.get("deletes") or []
+        return deletes[0].get("q") if deletes else None
+    return None
+
+
+class RequestQueryLog:
+    """Commands issued while serving one request"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.commands: List[Tuple[str, str, str, float]] = []
+        self.total_ms = 0.0
+
+    def record(self, collection: str, command_name: str, shape: str, duration_ms: float):
+        with self._lock:
+            self.commands.append((collection, command_name, shape, duration_ms))
+            self.total_ms += duration_ms
+
+    @property
+    def count(self) -> int:
+        return len(self.commands)
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[Tuple[str, str, str], int]]:
+        """(collection, command, shape) groups issued more than `threshold` times"""
+        counts = Counter((collection, name, shape) for collection, name, shape, _ in self.commands)
+        return [(key, count) for key, count in counts.most_common() if count > threshold]
+
+
+class QueryMonitorListener(monitoring.CommandListener):
+    """Feeds commands into the current request's log and reports slow ones"""
+
+    def __init__(self, slow_query_ms: float = 100):
+        self.slow_query_ms = slow_query_ms
+        self._pending: Dict[Tuple[int, int], Tuple[Optional[RequestQueryLog], str, str]] = {}
+
+    def started(self, event):
+        collection = MongoCommandMetrics.collection_of(event)
+        shape = filter_shape(command_filter(event.command_name, event.command))
+        self._pending[(event.request_id, event.operation_id)] = (current_query_log.get(), collection, shape)
+
+    def _finish(self, event):
+        log, collection, shape = self._pending.pop((event.request_id, event.operation_id), (None, "", "{}"))
+        duration_ms = event.duration_micros / 1000
+        if log is not None:
+            log.record(collection, event.command_name, shape, duration_ms)
+        if duration_ms >= self.slow_query_ms:
+            logger.warning("Slow Mongo %s on %s: %.1f ms, filter %s", event.command_name, collection, duration_ms, shape)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+
+class QueryMonitorMiddleware:
+    """Pure ASGI middleware opening a RequestQueryLog per request"""
+
+    def __init__(self, app, n_plus_one_threshold: int = 10, on_n_plus_one=None):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.on_n_plus_one = on_n_plus_one
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = RequestQueryLog()
+        token = current_query_log.set(log)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={log.total_ms:.2f};desc="{log.count} queries", '
+                    f'app;dur={(time.perf_counter() - start) * 1000:.2f}',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_log.reset(token)
+            self._report_n_plus_one(scope, log)
+
+    def _report_n_plus_one(self, scope, log: RequestQueryLog):
+        repeated = log.repeated_shapes(self.n_plus_one_threshold)
+        if not repeated:
+            return
+
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+        for (collection, command_name, shape), count in repeated:
+            logger.warning(
+                "Likely N+1 in %s %s: %d × %s on %s with filter %s",
+                scope.get("method"), route, count, command_name, collection, shape,
+            )
+        if self.on_n_plus_one:
+            self.on_n_plus_one(scope.get("method"), route)
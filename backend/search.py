@@ -0,0 +1,95 @@
+"""
+Server-side artist search over artist_profiles.
+
+A search text goes through the `profile_text` index (nom_de_scene weighted
+above bio, French stemming) and results are ranked by text score; without one
+they are ordered by stage name, or by price on request. Category, price
+range (the parsed `tarif_amount`, see pricing.py) and availability on a date
+narrow the same query, and pages use the keyset cursors of pagination.py with
+the score or name as sort value and the profile's user_id as tie-breaker
+(profiles upserted by an admin have no id of their own). The price
+order pages like the price-ordered listings (pricing.fetch_price_page), with
+unpriced profiles last.
+
+Mongo only allows $text in the first $match of a pipeline and the score only
+exists after it, so the cursor condition is applied in a second $match when
+the results are ranked.
+"""
+
+from dataclasses import replace
+from typing import Any, Dict, List, Optional
+
+from pagination import PageParams, encode_cursor, keyset_query
+from pricing import PRICE_SORT, fetch_price_page
+
+TEXT_INDEX_NAME = "profile_text"
+TEXT_INDEX_FIELDS = [("nom_de_scene", "text"), ("bio", "text")]
+TEXT_INDEX_WEIGHTS = {"nom_de_scene": 10, "bio": 1}
+TEXT_INDEX_LANGUAGE = "french"
+
+SORT_FIELDS = ["score", "nom_de_scene", PRICE_SORT]
+PAGE_KEY = "user_id"
+DEFAULT_SORT = "-score"
+MAX_QUERY_LENGTH = 100
+
+
+def search_filter(
+    text: Optional[str] = None,
+    category: Optional[str] = None,
+    price: Optional[Dict[str, Any]] = None,
+    artist_ids: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """Mongo filter on artist_profiles for the given criteria (None means no constraint)
+
+    `price` is a tarif_amount filter built by pricing.price_filter.
+    """
+    query: Dict[str, Any] = {}
+    if text and text.strip():
+        query["$text"] = {"$search": text.strip()}
+    if category:
+        query["category"] = category
+    if price:
+        query.update(price)
+    if artist_ids is not None:
+        query["user_id"] = {"$in": artist_ids}
+    return query
+
+
+def resolve_sort(page: PageParams, ranked: bool) -> PageParams:
+    """Without a search text there is no score: order by stage name instead"""
+    if page.sort_field == "score" and not ranked:
+        return replace(page, sort_field="nom_de_scene", descending=False)
+    return page
+
+
+def search_pipeline(query: Dict[str, Any], page: PageParams, projection: Dict[str, int]) -> List[Dict[str, Any]]:
+    """Aggregation returning one page (plus one look-ahead document) of matching profiles"""
+    if "$text" in query:
+        pipeline = [{"$match": query}, {"$addFields": {"score": {"$meta": "textScore"}}}]
+        keyset = keyset_query({}, page, PAGE_KEY)
+        if keyset:
+            pipeline.append({"$match": keyset})
+    else:
+        pipeline = [{"$match": keyset_query(query, page, PAGE_KEY)}]
+
+    direction = -1 if page.descending else 1
+    pipeline += [
+        {"$sort": {page.sort_field: direction, PAGE_KEY: direction}},
+        {"$limit": page.limit + 1},
+        {"$project": projection},
+    ]
+    return pipeline
+
+
+async def search_profiles(collection, query: Dict[str, Any], page: PageParams, projection: Dict[str, int]):
+    """One page of matching profiles. Returns (profiles, next_cursor or None)."""
+    if page.sort_field == PRICE_SORT:
+        return await fetch_price_page(collection, query, page, projection)
+
+    profiles = await collection.aggregate(search_pipeline(query, page, projection)).to_list(page.limit + 1)
+
+    next_cursor = None
+    if len(profiles) > page.limit:
+        profiles = profiles[:page.limit]
+        next_cursor = encode_cursor(page, profiles[-1], PAGE_KEY)
+    return profiles, next_cursor
@@ -1,13 +1,12 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Cookie, Header, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Cookie, Header, UploadFile, File, Query, Request, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from motor.motor_asyncio import AsyncIOMotorClient
+from jose import JWTError, jwt
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from pydantic import BaseModel, Field, EmailStr, validator
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timezone, timedelta, date
-from passlib.context import CryptContext
-from jose import JWTError, jwt
 import os
 import uuid
 import secrets
@@ -15,51 +14,131 @@ from pathlib import Path
 from dotenv import load_dotenv
 import logging
 from enum import Enum
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
-import aiofiles
+import asyncio
+import calendar
 import shutil
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from functools import lru_cache
+
+from pymongo import ReturnDocument
+
+import projections
+from compression import CompressionMiddleware, CompressionStats, precompressed_suffixes
+import coverage
+from loop_monitor import LoopLagMonitor
+from matching import TOMBSTONE_TTL, MatchingIndex, record_removal
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Counter, HTTPMetricsMiddleware, MongoCommandMetrics, Registry
+from profiling import PROFILE_ID_HEADER, PROFILE_STATUS_HEADER, ProfileStore, ProfilingMiddleware
+from query_monitor import QueryMonitorListener, QueryMonitorMiddleware
+from settings import Settings
+from storage import (
+    QUARANTINE_PREFIX, CachedStorage, LocalStorage, create_storage, key_from_url, media_type_for, servable_key, url_for
+)
+from pagination import (
+    NEXT_CURSOR_HEADER, PageParams, fetch_page, page_params, select_fields, set_next_cursor
+)
+from pricing import PRICE_SORT, fetch_price_page, parse_tarif, price_filter
+import search
+import upload_gc
+from throttle import LoginThrottle, MemoryBucketBackend, MongoBucketBackend, PasswordHashPool, get_client_ip
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Create uploads directory
-UPLOADS_DIR = ROOT_DIR / "uploads"
-UPLOADS_DIR.mkdir(exist_ok=True)
-
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
 
-# FastAPI setup
-app = FastAPI(title="EasyBookEvent - Calendrier Artistes")
 api_router = APIRouter(prefix="/api")
 
+# Each app built by create_app() holds its settings and components on app.state:
+# the Mongo client and database (opened per worker by the lifespan), the upload
+# storage, the bcrypt pool, the login throttle, the profile store, the matching
+# index and its metrics registry. Handlers reach them through these providers.
+def get_settings(request: Request) -> Settings:
+    return request.app.state.settings
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return request.app.state.db
+
+def get_storage(request: Request):
+    """Uploads backend: local disk by default; GridFS or S3 for several nodes, see the lifespan"""
+    return request.app.state.storage
+
+def get_password_pool(request: Request) -> PasswordHashPool:
+    return request.app.state.password_pool
+
+def get_login_throttle(request: Request) -> LoginThrottle:
+    return request.app.state.login_throttle
+
+def get_profile_store(request: Request) -> ProfileStore:
+    return request.app.state.profile_store
+
+def get_matching_index(request: Request) -> MatchingIndex:
+    return request.app.state.matching_index
+
+def get_compression_stats(request: Request) -> CompressionStats:
+    return request.app.state.compression_stats
+
+def cached_storage(backend, settings: Settings, cache_requests: Counter):
+    """Put the LRU of small upload files (logos, mostly) in front of a storage backend"""
+    if settings.upload_cache_max_bytes <= 0:
+        return backend
+    return CachedStorage(
+        backend,
+        max_bytes=settings.upload_cache_max_bytes,
+        max_file_bytes=settings.upload_cache_max_file_bytes,
+        ttl=settings.upload_cache_ttl_seconds,
+        on_lookup=lambda result: cache_requests.inc("uploads", result),
+    )
+
 # Static files setup - serve uploads via API route to work with ingress
 @api_router.get("/uploads/{file_path:path}")
-async def serve_uploaded_file(file_path: str):
+async def serve_uploaded_file(
+    file_path: str,
+    request: Request,
+    storage=Depends(get_storage),
+    settings: Settings = Depends(get_settings)
+):
     """Serve uploaded files via API route"""
-    full_path = UPLOADS_DIR / file_path
-    if not full_path.exists():
+    # Quarantined orphans wait for the upload GC's purge: not downloadable meanwhile
+    stored = await storage.open(file_path) if servable_key(file_path) else None
+    if stored is None:
         raise HTTPException(status_code=404, detail="Fichier non trouvé")
     
-    # Determine media type
-    media_type = "image/jpeg"
-    if file_path.lower().endswith('.png'):
-        media_type = "image/png"
-    elif file_path.lower().endswith('.jpg') or file_path.lower().endswith('.jpeg'):
-        media_type = "image/jpeg"
-    
-    return FileResponse(full_path, media_type=media_type)
-
-# Keep original static mount for direct backend access (development)
-app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
+    # Small files come from the upload cache, with an ETag
+    if stored.etag and stored.etag in (tag.strip() for tag in request.headers.get("if-none-match", "").split(",")):
+        return Response(status_code=304, headers={"ETag": stored.etag})
+    
+    # Serve a precompressed sibling (file.br / file.gz) when one exists and the client accepts it
+    if settings.precompressed_uploads:
+        for encoding, suffix in precompressed_suffixes(request.headers.get("accept-encoding", "")):
+            variant = await storage.open(file_path + suffix)
+            if variant:
+                return StreamingResponse(
+                    variant.chunks,
+                    media_type=stored.media_type,
+                    headers={"Content-Length": str(variant.size), "Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+                )
+    
+    if stored.content is not None:
+        return Response(stored.content, media_type=stored.media_type, headers={"ETag": stored.etag})
+    return StreamingResponse(stored.chunks, media_type=stored.media_type, headers={"Content-Length": str(stored.size)})
 
 # Security
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-in-production")
+# Email (sendgrid), bcrypt (passlib), upload writes (aiofiles) and the CSV export import
+# their libraries on first use, so a worker boots without them. JWT (jose) is needed by
+# every authenticated request and is imported with the module.
+@lru_cache(maxsize=1)
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
@@ -75,14 +154,7 @@ MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB
 ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png"}
 MAX_GALLERY_IMAGES = 5
 
-# CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+EXPORT_BATCH_SIZE = 500
 
 # Enums
 class UserRole(str, Enum):
@@ -124,6 +196,10 @@ class ArtistProfile(BaseModel):
     telephone: Optional[str] = None
     lien: Optional[str] = None
     tarif_soiree: Optional[str] = None  # "500 € / set" or similar
+    # Parsed from tarif_soiree (see pricing.py)
+    tarif_amount: Optional[float] = None
+    tarif_currency: Optional[str] = None
+    tarif_unit: Optional[str] = None
     category: Optional[ArtistCategory] = None  # DJ or Groupe
     logo_url: Optional[str] = None  # Path to uploaded logo
     gallery_urls: List[str] = Field(default_factory=list)  # List of gallery image paths
@@ -211,6 +287,9 @@ class AvailabilityDayToggle(BaseModel):
     note: Optional[str] = Field(None, max_length=NOTES_MAX_LEN)
     color: Optional[str] = None
 
+class GalleryUrls(BaseModel):
+    gallery_urls: List[str] = Field(..., max_length=MAX_GALLERY_IMAGES)
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -222,6 +301,37 @@ class UserResponse(BaseModel):
     timezone: str
     email_verified_at: Optional[datetime] = None
 
+class CurrentUser(BaseModel):
+    """Authenticated user as loaded by get_current_user (no password hash)"""
+    id: str
+    role: UserRole
+    email: str
+    timezone: str = DEFAULT_TZ
+    email_verified_at: Optional[datetime] = None
+
+class ArtistSummary(BaseModel):
+    """Lightweight artist row for calendar lists and date popups"""
+    id: str
+    email: str
+    nom_de_scene: str
+    category: Optional[ArtistCategory] = None
+    logo_url: Optional[str] = None
+    tarif_soiree: Optional[str] = None
+    tarif_amount: Optional[float] = None
+    tarif_currency: Optional[str] = None
+    tarif_unit: Optional[str] = None
+
+class ArtistSearchResult(ArtistSummary):
+    """Artist summary returned by the search, with its relevance when a text was searched"""
+    score: Optional[float] = None
+
+class ArtistMatch(ArtistSummary):
+    """Ranked match for a date, with the features behind its score"""
+    score: float
+    score_components: Dict[str, float]
+    availability_count: int = 0
+    last_active: Optional[datetime] = None
+
 class ArtistWithProfile(BaseModel):
     id: str
     email: str
@@ -229,6 +339,9 @@ class ArtistWithProfile(BaseModel):
     telephone: Optional[str] = None
     lien: Optional[str] = None
     tarif_soiree: Optional[str] = None
+    tarif_amount: Optional[float] = None
+    tarif_currency: Optional[str] = None
+    tarif_unit: Optional[str] = None
     logo_url: Optional[str] = None
     gallery_urls: List[str] = Field(default_factory=list)
     bio: Optional[str] = None
@@ -236,66 +349,104 @@ class ArtistWithProfile(BaseModel):
     availability_count: int = 0
 
 # File upload utilities
-async def save_uploaded_file(file: UploadFile, subfolder: str = "") -> str:
-    """Save uploaded file and return the relative path"""
-    # Validate file extension
-    file_extension = Path(file.filename).suffix.lower()
+def upload_extension(file: UploadFile) -> str:
+    """Validated, lower-cased extension of an uploaded file"""
+    file_extension = Path(file.filename or "").suffix.lower()
     if file_extension not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400, 
             detail=f"Type de fichier non autorisé. Utilisez : {', '.join(ALLOWED_EXTENSIONS)}"
         )
+    return file_extension
+
+async def save_uploaded_file(storage, file: UploadFile, subfolder: str = "") -> str:
+    """Save uploaded file and return its URL"""
+    # Validate file extension
+    file_extension = upload_extension(file)
     
     # Generate unique filename
     unique_filename = f"{uuid.uuid4()}{file_extension}"
+    key = f"{subfolder}/{unique_filename}" if subfolder else unique_filename
     
-    # Create subfolder if specified
-    save_dir = UPLOADS_DIR
-    if subfolder:
-        save_dir = save_dir / subfolder
-        save_dir.mkdir(exist_ok=True)
+    # One byte over the limit is enough to reject the file
+    content = await file.read(MAX_FILE_SIZE + 1)
+    if len(content) > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Fichier trop volumineux. Maximum {MAX_FILE_SIZE // (1024*1024)}MB"
+        )
+    await storage.save(key, content, media_type_for(key))
     
-    file_path = save_dir / unique_filename
+    # Return URL (using API route)
+    return url_for(key)
+
+async def remove_file(storage, file_url: str):
+    """Remove an uploaded file from storage"""
+    key = key_from_url(file_url)
+    if key is None:
+        logger.warning("Not an upload URL, nothing removed: %s", file_url)
+        return
+    try:
+        await storage.delete(key)
+    except Exception as e:
+        logger.warning("Error removing file %s: %s", file_url, e)
+
+# Query utilities
+def date_range_query(start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Any]:
+    """Build a Mongo filter on the ISO `date` field for an optional inclusive range"""
+    query = {}
     
-    # Save file
-    async with aiofiles.open(file_path, 'wb') as f:
-        content = await file.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Fichier trop volumineux. Maximum {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
-        await f.write(content)
+    if start_date:
+        query["date"] = {"$gte": start_date}
+    if end_date:
+        if "date" in query:
+            query["date"]["$lte"] = end_date
+        else:
+            query["date"] = {"$lte": end_date}
+    
+    return query
+
+def rows_response(rows: List[Dict[str, Any]], next_cursor: Optional[str], page: PageParams) -> ORJSONResponse:
+    """Serialize trusted database rows straight to JSON.
     
-    # Return relative path for URL (using API route)
-    relative_path = f"/api/uploads/{subfolder}/{unique_filename}" if subfolder else f"/api/uploads/{unique_filename}"
-    return relative_path
+    Returning a response directly skips FastAPI's per-row response_model
+    re-validation; the declared response_model still documents the shape.
+    """
+    response = ORJSONResponse([select_fields(row, page) for row in rows] if page.fields else rows)
+    set_next_cursor(response, next_cursor)
+    return response
 
-def remove_file(file_path: str):
-    """Remove file from filesystem"""
+def check_date_format(day_date: str):
     try:
-        full_path = ROOT_DIR / file_path
-        if full_path.exists():
-            full_path.unlink()
-    except Exception as e:
-        print(f"Error removing file {file_path}: {e}")
+        datetime.strptime(day_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format de date invalide. Utilisez YYYY-MM-DD")
+
+def month_bounds(month: str):
+    """Return the first and last ISO dates of a YYYY-MM month"""
+    try:
+        year, month_number = (int(part) for part in month.split("-"))
+        last_day = calendar.monthrange(year, month_number)[1]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format de mois invalide. Utilisez YYYY-MM")
+    return date(year, month_number, 1).isoformat(), date(year, month_number, last_day).isoformat()
 
 # Password utilities
 def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 def get_password_hash(password):
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
 
 # JWT utilities
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
+def create_access_token(data: dict, secret_key: str, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=15)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=ALGORITHM)
     return encoded_jwt
 
 def get_token_from_header(authorization: str = Header(None)):
@@ -322,26 +473,30 @@ def get_token_from_header(authorization: str = Header(None)):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-async def get_current_user(token: str = Depends(get_token_from_header)):
+async def get_current_user(
+    token: str = Depends(get_token_from_header),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    settings: Settings = Depends(get_settings)
+):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, settings.secret_key, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
     
-    user = await db.users.find_one({"email": email})
+    user = await db.users.find_one({"email": email}, projections.USER_AUTH)
     if user is None:
         raise credentials_exception
-    return User(**user)
+    return CurrentUser(**user)
 
-async def get_current_admin(current_user: User = Depends(get_current_user)):
+async def get_current_admin(current_user: CurrentUser = Depends(get_current_user)):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
@@ -349,9 +504,22 @@ async def get_current_admin(current_user: User = Depends(get_current_user)):
         )
     return current_user
 
+async def authorize_profiling(request: Request) -> bool:
+    """Only admins may profile; for anyone else the profiling flag is ignored"""
+    try:
+        token = get_token_from_header(request.headers.get("authorization"))
+        state = request.app.state
+        await get_current_admin(await get_current_user(token, state.db, state.settings))
+    except HTTPException:
+        return False
+    return True
+
 # Email utilities
 def send_invitation_email(email: str, token: str):
     """Send invitation email using SendGrid"""
+    from sendgrid import SendGridAPIClient
+    from sendgrid.helpers.mail import Mail
+
     try:
         sg = SendGridAPIClient(os.environ.get('SENDGRID_API_KEY'))
         invitation_link = f"{os.environ.get('FRONTEND_URL', 'http://localhost:3000')}/invite/{token}"
@@ -402,14 +570,19 @@ def send_invitation_email(email: str, token: str):
         response = sg.send(message)
         return response.status_code == 202
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error("Error sending email: %s", e)
         return False
 
 # Auth endpoints
 @api_router.post("/auth/register", response_model=UserResponse)
-async def register(user_data: UserCreate, token: str):
+async def register(
+    user_data: UserCreate,
+    token: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    password_pool: PasswordHashPool = Depends(get_password_pool)
+):
     # Verify invitation token
-    invitation = await db.invitations.find_one({"token": token, "status": InvitationStatus.SENT})
+    invitation = await db.invitations.find_one({"token": token, "status": InvitationStatus.SENT}, projections.INVITATION_VALIDITY)
     if not invitation:
         raise HTTPException(status_code=400, detail="Token d'invitation invalide ou expiré")
     
@@ -422,11 +595,11 @@ async def register(user_data: UserCreate, token: str):
         raise HTTPException(status_code=400, detail="Token d'invitation invalide ou expiré")
     
     # Check if user already exists
-    if await db.users.find_one({"email": user_data.email}):
+    if await db.users.find_one({"email": user_data.email}, projections.ID_ONLY):
         raise HTTPException(status_code=400, detail="Un utilisateur avec cet email existe déjà")
     
     # Create user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_pool.hash(user_data.password)
     user = User(
         role=UserRole.ARTIST,
         email=user_data.email,
@@ -445,30 +618,66 @@ async def register(user_data: UserCreate, token: str):
     return UserResponse(**user.dict())
 
 @api_router.post("/auth/login", response_model=Token)
-async def login(form_data: UserLogin):
-    user = await db.users.find_one({"email": form_data.email})
-    if not user or not verify_password(form_data.password, user['password_hash']):
+async def login(
+    form_data: UserLogin,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    password_pool: PasswordHashPool = Depends(get_password_pool),
+    login_throttle: LoginThrottle = Depends(get_login_throttle),
+    settings: Settings = Depends(get_settings)
+):
+    # Reject throttled clients before spending any bcrypt time
+    await login_throttle.check(get_client_ip(request, settings.trust_proxy_headers, settings.trusted_proxy_hops), form_data.email)
+    
+    user = await db.users.find_one({"email": form_data.email}, projections.USER_CREDENTIALS)
+    if not user:
+        login_throttle.record("unknown_account")
+    
+    # Unknown emails are verified against a dummy hash so both paths cost the same
+    if not await password_pool.verify(form_data.password, user['password_hash'] if user else None):
+        login_throttle.record("failed")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou mot de passe incorrect",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    login_throttle.record("succeeded")
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user['email']}, expires_delta=access_token_expires
+        data={"sub": user['email']}, secret_key=settings.secret_key, expires_delta=access_token_expires
     )
     return {"access_token": access_token, "token_type": "bearer"}
 
+@api_router.get("/admin/login-throttle")
+async def get_login_throttle_stats(
+    password_pool: PasswordHashPool = Depends(get_password_pool),
+    login_throttle: LoginThrottle = Depends(get_login_throttle),
+    settings: Settings = Depends(get_settings),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Login throttling counters and bcrypt pool state (admin only)"""
+    return {
+        "backend": settings.login_throttle_backend,
+        "counters": dict(login_throttle.counters),
+        "bcrypt_queue_depth": password_pool.queue_depth,
+        "bcrypt_max_workers": password_pool.max_workers,
+        "bcrypt_max_queue": password_pool.max_queue,
+    }
+
 @api_router.get("/auth/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     return UserResponse(**current_user.dict())
 
 # Invitation endpoints (Admin only)
 @api_router.post("/invitations", response_model=Invitation)
-async def create_invitation(invitation_data: InvitationCreate, current_user: User = Depends(get_current_admin)):
+async def create_invitation(
+    invitation_data: InvitationCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
     # Check if invitation already exists
-    existing = await db.invitations.find_one({"email": invitation_data.email, "status": InvitationStatus.SENT})
+    existing = await db.invitations.find_one({"email": invitation_data.email, "status": InvitationStatus.SENT}, projections.ID_ONLY)
     if existing:
         raise HTTPException(status_code=400, detail="Une invitation est déjà en attente pour cet email")
     
@@ -480,14 +689,46 @@ async def create_invitation(invitation_data: InvitationCreate, current_user: Use
     
     return invitation
 
+INVITATION_FIELDS = list(Invitation.model_fields)
+# Defaults Invitation applies to documents written before a field existed
+INVITATION_DEFAULTS = {
+    name: field.default
+    for name, field in Invitation.model_fields.items()
+    if not field.is_required() and field.default_factory is None
+}
+
+def invitation_row(invitation: Dict[str, Any]) -> Dict[str, Any]:
+    """An invitation document shaped like Invitation: model field order, static defaults filled in"""
+    row = {}
+    for name in INVITATION_FIELDS:
+        if name in invitation:
+            row[name] = invitation[name]
+        elif name in INVITATION_DEFAULTS:
+            row[name] = INVITATION_DEFAULTS[name]
+    return row
+
+invitation_page_params = page_params(
+    sort_fields=["created_at", "expires_at"],
+    default_sort="created_at",
+    allowed_fields=INVITATION_FIELDS,
+)
+
 @api_router.get("/invitations", response_model=List[Invitation])
-async def get_invitations(current_user: User = Depends(get_current_admin)):
-    invitations = await db.invitations.find().to_list(1000)
-    return [Invitation(**inv) for inv in invitations]
+async def get_invitations(
+    page: PageParams = Depends(invitation_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    invitations, next_cursor = await fetch_page(db.invitations, {}, page, page.projection(INVITATION_FIELDS))
+    return rows_response([invitation_row(invitation) for invitation in invitations], next_cursor, page)
 
 @api_router.delete("/invitations/{invitation_id}")
-async def delete_invitation(invitation_id: str, current_user: User = Depends(get_current_admin)):
-    invitation = await db.invitations.find_one({"id": invitation_id})
+async def delete_invitation(
+    invitation_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    invitation = await db.invitations.find_one({"id": invitation_id}, projections.ID_ONLY)
     if not invitation:
         raise HTTPException(status_code=404, detail="Invitation non trouvée")
     
@@ -496,61 +737,71 @@ async def delete_invitation(invitation_id: str, current_user: User = Depends(get
 
 # Artist profile endpoints
 @api_router.post("/profile", response_model=ArtistProfile)
-async def create_or_update_profile(profile_data: ArtistProfileCreate, current_user: User = Depends(get_current_user)):
+async def create_or_update_profile(
+    profile_data: ArtistProfileCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     if current_user.role != UserRole.ARTIST:
         raise HTTPException(status_code=403, detail="Seuls les artistes peuvent créer un profil")
     
-    # Check if profile exists
-    existing_profile = await db.artist_profiles.find_one({"user_id": current_user.id})
+    # One upsert: update the fields of an existing profile, or create it with every default
+    update_data = profile_data.dict()
+    update_data.update(parse_tarif(profile_data.tarif_soiree).fields())
+    update_data["updated_at"] = datetime.now(timezone.utc)
+    new_profile = ArtistProfile(user_id=current_user.id, **profile_data.dict()).dict()
+    insert_only = {key: value for key, value in new_profile.items() if key not in update_data and key != "user_id"}
     
-    if existing_profile:
-        # Update existing profile
-        update_data = profile_data.dict()
-        update_data["updated_at"] = datetime.now(timezone.utc)
-        
-        await db.artist_profiles.update_one(
-            {"user_id": current_user.id},
-            {"$set": update_data}
-        )
-        updated_profile = await db.artist_profiles.find_one({"user_id": current_user.id})
-        updated_profile.pop('_id', None)
-        return ArtistProfile(**updated_profile)
-    else:
-        # Create new profile
-        profile = ArtistProfile(user_id=current_user.id, **profile_data.dict())
-        profile_dict = profile.dict()
-        await db.artist_profiles.insert_one(profile_dict)
-        return profile
+    profile = await db.artist_profiles.find_one_and_update(
+        {"user_id": current_user.id},
+        {"$set": update_data, "$setOnInsert": insert_only},
+        projection=projections.PROFILE_FULL,
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    matching_index.update_profile(current_user.id, profile, email=current_user.email)
+    return ArtistProfile(**profile)
+
+async def fetch_artist_profile(db: AsyncIOMotorDatabase, user_id: str) -> Optional[ArtistProfile]:
+    profile = await db.artist_profiles.find_one({"user_id": user_id}, projections.PROFILE_FULL)
+    if not profile:
+        return None
+    
+    return ArtistProfile(**profile)
 
 @api_router.get("/profile", response_model=ArtistProfile)
-async def get_my_profile(current_user: User = Depends(get_current_user)):
+async def get_my_profile(
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     if current_user.role != UserRole.ARTIST:
         raise HTTPException(status_code=403, detail="Seuls les artistes ont un profil")
     
-    profile = await db.artist_profiles.find_one({"user_id": current_user.id})
+    profile = await fetch_artist_profile(db, current_user.id)
     if not profile:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    profile.pop('_id', None)
-    return ArtistProfile(**profile)
+    return profile
 
 # File upload endpoints
 @api_router.post("/profile/upload-logo")
-async def upload_logo(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def upload_logo(
+    file: UploadFile = File(...),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    storage=Depends(get_storage),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     if current_user.role != UserRole.ARTIST:
         raise HTTPException(status_code=403, detail="Seuls les artistes peuvent uploader des fichiers")
     
     # Get current profile
-    profile = await db.artist_profiles.find_one({"user_id": current_user.id})
+    profile = await db.artist_profiles.find_one({"user_id": current_user.id}, projections.PROFILE_LOGO)
     if not profile:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    # Remove old logo if exists
-    if profile.get('logo_url'):
-        remove_file(profile['logo_url'])
-    
     # Save new logo
-    logo_url = await save_uploaded_file(file, "logos")
+    logo_url = await save_uploaded_file(storage, file, "logos")
     
     # Update profile
     await db.artist_profiles.update_one(
@@ -558,111 +809,465 @@ async def upload_logo(file: UploadFile = File(...), current_user: User = Depends
         {"$set": {"logo_url": logo_url, "updated_at": datetime.now(timezone.utc)}}
     )
     
+    # Remove old logo once nothing points to it (a rejected upload keeps it)
+    if profile.get('logo_url'):
+        await remove_file(storage, profile['logo_url'])
+    
     return {"logo_url": logo_url, "message": "Logo uploadé avec succès"}
 
+def gallery_room_query(user_id: str, adding: int) -> Dict[str, Any]:
+    """Matches the profile only while its gallery has room for `adding` more images"""
+    return {"user_id": user_id, f"gallery_urls.{MAX_GALLERY_IMAGES - adding}": {"$exists": False}}
+
 @api_router.post("/profile/upload-gallery")
-async def upload_gallery_image(file: UploadFile = File(...), current_user: User = Depends(get_current_user)):
+async def upload_gallery_image(
+    file: UploadFile = File(...),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    storage=Depends(get_storage),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     if current_user.role != UserRole.ARTIST:
         raise HTTPException(status_code=403, detail="Seuls les artistes peuvent uploader des fichiers")
     
-    # Get current profile
-    profile = await db.artist_profiles.find_one({"user_id": current_user.id})
-    if not profile:
-        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    # Save new image
+    image_url = await save_uploaded_file(storage, file, "gallery")
     
-    # Check gallery limit
-    current_gallery = profile.get('gallery_urls', [])
-    if len(current_gallery) >= MAX_GALLERY_IMAGES:
+    # Append it only while the gallery has room (atomic: concurrent uploads cannot exceed the limit)
+    result = await db.artist_profiles.update_one(
+        gallery_room_query(current_user.id, 1),
+        {"$push": {"gallery_urls": image_url}, "$set": {"updated_at": datetime.now(timezone.utc)}}
+    )
+    if result.matched_count == 0:
+        await remove_file(storage, image_url)
+        if not await db.artist_profiles.find_one({"user_id": current_user.id}, projections.ID_ONLY):
+            raise HTTPException(status_code=404, detail="Profil non trouvé")
         raise HTTPException(
             status_code=400, 
             detail=f"Maximum {MAX_GALLERY_IMAGES} images autorisées dans la galerie"
         )
     
-    # Save new image
-    image_url = await save_uploaded_file(file, "gallery")
-    
-    # Update profile
-    new_gallery = current_gallery + [image_url]
-    await db.artist_profiles.update_one(
-        {"user_id": current_user.id},
-        {"$set": {"gallery_urls": new_gallery, "updated_at": datetime.now(timezone.utc)}}
-    )
-    
     return {"image_url": image_url, "message": "Image ajoutée à la galerie"}
 
 @api_router.delete("/profile/remove-gallery/{image_index}")
-async def remove_gallery_image(image_index: int, current_user: User = Depends(get_current_user)):
+async def remove_gallery_image(
+    image_index: int,
+    expected_url: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    storage=Depends(get_storage),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Remove the gallery image at `image_index`; with `expected_url`, only if it is still that image"""
     if current_user.role != UserRole.ARTIST:
         raise HTTPException(status_code=403, detail="Seuls les artistes peuvent modifier leur galerie")
+    if image_index < 0 or image_index >= MAX_GALLERY_IMAGES:
+        raise HTTPException(status_code=400, detail="Index d'image invalide")
     
-    # Get current profile
-    profile = await db.artist_profiles.find_one({"user_id": current_user.id})
+    if expected_url is None:
+        # Older clients send only the index: cut whatever image is there in one update;
+        # the previous array tells which file it was
+        previous = await db.artist_profiles.find_one_and_update(
+            {"user_id": current_user.id, f"gallery_urls.{image_index}": {"$exists": True}},
+            [{"$set": {
+                "gallery_urls": {"$concatArrays": [
+                    {"$slice": ["$gallery_urls", image_index]},
+                    {"$slice": ["$gallery_urls", image_index + 1, MAX_GALLERY_IMAGES]},
+                ]},
+                "updated_at": datetime.now(timezone.utc),
+            }}],
+            projection=projections.PROFILE_GALLERY,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if previous is None:
+            if not await db.artist_profiles.find_one({"user_id": current_user.id}, projections.ID_ONLY):
+                raise HTTPException(status_code=404, detail="Profil non trouvé")
+            raise HTTPException(status_code=400, detail="Index d'image invalide")
+        removed_url = previous['gallery_urls'][image_index]
+    else:
+        # The position must still hold the image the client saw: another tab may have removed or reordered since
+        result = await db.artist_profiles.update_one(
+            {"user_id": current_user.id, f"gallery_urls.{image_index}": expected_url},
+            {"$pull": {"gallery_urls": expected_url}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        )
+        if result.matched_count == 0:
+            if not await db.artist_profiles.find_one({"user_id": current_user.id}, projections.ID_ONLY):
+                raise HTTPException(status_code=404, detail="Profil non trouvé")
+            raise HTTPException(status_code=409, detail="La galerie a changé entre-temps, rechargez la page")
+        removed_url = expected_url
+    
+    # Remove file
+    await remove_file(storage, removed_url)
+    
+    return {"message": "Image supprimée de la galerie"}
+
+@api_router.post("/profile/upload-gallery-multiple")
+async def upload_gallery_images(
+    files: List[UploadFile] = File(...),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    storage=Depends(get_storage),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Add several gallery images at once: files are validated and saved concurrently, then appended atomically"""
+    if current_user.role != UserRole.ARTIST:
+        raise HTTPException(status_code=403, detail="Seuls les artistes peuvent uploader des fichiers")
+    if not files:
+        raise HTTPException(status_code=400, detail="Aucun fichier reçu")
+    
+    # Reject before storing anything: file types, then room left in the gallery
+    for file in files:
+        upload_extension(file)
+    too_many = HTTPException(status_code=400, detail=f"Maximum {MAX_GALLERY_IMAGES} images autorisées dans la galerie")
+    if len(files) > MAX_GALLERY_IMAGES:
+        raise too_many
+    profile = await db.artist_profiles.find_one({"user_id": current_user.id}, projections.PROFILE_GALLERY)
     if not profile:
         raise HTTPException(status_code=404, detail="Profil non trouvé")
+    if len(profile.get('gallery_urls') or []) + len(files) > MAX_GALLERY_IMAGES:
+        raise too_many
+    
+    results = await asyncio.gather(*(save_uploaded_file(storage, file, "gallery") for file in files), return_exceptions=True)
+    image_urls = [result for result in results if isinstance(result, str)]
+    failure = next((result for result in results if isinstance(result, BaseException)), None)
+    
+    previous = None
+    if failure is None:
+        # The gallery may have grown since the check above; the filter re-checks it atomically
+        previous = await db.artist_profiles.find_one_and_update(
+            gallery_room_query(current_user.id, len(image_urls)),
+            {"$push": {"gallery_urls": {"$each": image_urls}}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            projection=projections.PROFILE_GALLERY,
+            return_document=ReturnDocument.BEFORE,
+        )
+    if previous is None:
+        await asyncio.gather(*(remove_file(storage, url) for url in image_urls))
+        raise failure if failure is not None else too_many
     
-    current_gallery = profile.get('gallery_urls', [])
-    if image_index < 0 or image_index >= len(current_gallery):
-        raise HTTPException(status_code=400, detail="Index d'image invalide")
-    
-    # Remove file and update gallery
-    image_to_remove = current_gallery[image_index]
-    remove_file(image_to_remove)
+    return {
+        "image_urls": image_urls,
+        "gallery_urls": (previous.get('gallery_urls') or []) + image_urls,
+        "message": f"{len(image_urls)} image(s) ajoutée(s) à la galerie",
+    }
+
+@api_router.put("/profile/gallery/order")
+async def reorder_gallery(
+    order: GalleryUrls,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Reorder the gallery; the new order must contain exactly the current images"""
+    if current_user.role != UserRole.ARTIST:
+        raise HTTPException(status_code=403, detail="Seuls les artistes peuvent modifier leur galerie")
+    if len(set(order.gallery_urls)) != len(order.gallery_urls):
+        raise HTTPException(status_code=400, detail="Image en double dans le nouvel ordre")
+    
+    # Same size and every image present: a permutation of the gallery as stored right now
+    # ($all with an empty list matches nothing, so an empty order only checks the size)
+    same_images = {"$size": len(order.gallery_urls)}
+    if order.gallery_urls:
+        same_images["$all"] = order.gallery_urls
+    result = await db.artist_profiles.update_one(
+        {"user_id": current_user.id, "gallery_urls": same_images},
+        {"$set": {"gallery_urls": order.gallery_urls, "updated_at": datetime.now(timezone.utc)}},
+    )
+    if result.matched_count == 0:
+        if not await db.artist_profiles.find_one({"user_id": current_user.id}, projections.ID_ONLY):
+            raise HTTPException(status_code=404, detail="Profil non trouvé")
+        raise HTTPException(status_code=409, detail="Le nouvel ordre ne correspond pas à la galerie actuelle")
+    
+    return {"gallery_urls": order.gallery_urls, "message": "Galerie réordonnée"}
+
+@api_router.post("/profile/gallery/remove")
+async def remove_gallery_images(
+    selection: GalleryUrls,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    storage=Depends(get_storage),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Remove several gallery images in one atomic update, then delete their files"""
+    if current_user.role != UserRole.ARTIST:
+        raise HTTPException(status_code=403, detail="Seuls les artistes peuvent modifier leur galerie")
     
-    new_gallery = current_gallery[:image_index] + current_gallery[image_index + 1:]
-    await db.artist_profiles.update_one(
+    previous = await db.artist_profiles.find_one_and_update(
         {"user_id": current_user.id},
-        {"$set": {"gallery_urls": new_gallery, "updated_at": datetime.now(timezone.utc)}}
+        {"$pull": {"gallery_urls": {"$in": selection.gallery_urls}}, "$set": {"updated_at": datetime.now(timezone.utc)}},
+        projection=projections.PROFILE_GALLERY,
+        return_document=ReturnDocument.BEFORE,
     )
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
     
-    return {"message": "Image supprimée de la galerie"}
+    wanted = set(selection.gallery_urls)
+    removed = [url for url in previous.get('gallery_urls') or [] if url in wanted]
+    await asyncio.gather(*(remove_file(storage, url) for url in removed))
+    
+    return {
+        "removed": removed,
+        "gallery_urls": [url for url in previous.get('gallery_urls') or [] if url not in wanted],
+        "message": f"{len(removed)} image(s) supprimée(s) de la galerie",
+    }
 
 # Artists management (Admin only)
-@api_router.get("/artists", response_model=List[ArtistWithProfile])
-async def get_all_artists(current_user: User = Depends(get_current_admin)):
-    artists_cursor = db.users.find({"role": UserRole.ARTIST})
-    artists = await artists_cursor.to_list(1000)
+# Price filters and the price sort page through artist_profiles by price (pricing.fetch_price_page)
+def price_query(page: PageParams, min_price: Optional[float], max_price: Optional[float]) -> Optional[Dict[str, Any]]:
+    """tarif_amount filter for a price range ({} for a plain sort by price), None when neither is asked for"""
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise HTTPException(status_code=400, detail="Fourchette de prix invalide")
+    if min_price is None and max_price is None:
+        return {} if page.sort_field == PRICE_SORT else None
+    return price_filter(min_price, max_price)
+
+artist_page_params = page_params(
+    sort_fields=["created_at", "email", PRICE_SORT],
+    default_sort="created_at",
+    allowed_fields=list(ArtistWithProfile.model_fields),
+)
+
+# Row builders produce plain dicts shaped like ArtistWithProfile / ArtistSummary
+# so list endpoints can serialize them without building a model per row
+def artist_with_profile_row(user: Dict[str, Any], profile: Optional[Dict[str, Any]], availability_count: int = 0) -> Dict[str, Any]:
+    profile = profile or {}
+    return {
+        "id": user['id'],
+        "email": user['email'],
+        "nom_de_scene": profile.get('nom_de_scene', ''),
+        "telephone": profile.get('telephone'),
+        "lien": profile.get('lien'),
+        "tarif_soiree": profile.get('tarif_soiree'),
+        "tarif_amount": profile.get('tarif_amount'),
+        "tarif_currency": profile.get('tarif_currency'),
+        "tarif_unit": profile.get('tarif_unit'),
+        "logo_url": profile.get('logo_url'),
+        "gallery_urls": profile.get('gallery_urls', []),
+        "bio": profile.get('bio'),
+        "category": profile.get('category'),
+        "availability_count": availability_count,
+    }
+
+def artist_summary_row(user: Dict[str, Any], profile: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    profile = profile or {}
+    return {
+        "id": user['id'],
+        "email": user['email'],
+        "nom_de_scene": profile.get('nom_de_scene', ''),
+        "category": profile.get('category'),
+        "logo_url": profile.get('logo_url'),
+        "tarif_soiree": profile.get('tarif_soiree'),
+        "tarif_amount": profile.get('tarif_amount'),
+        "tarif_currency": profile.get('tarif_currency'),
+        "tarif_unit": profile.get('tarif_unit'),
+    }
+
+async def fetch_profiles_by_user(
+    db: AsyncIOMotorDatabase,
+    user_ids: List[str],
+    projection: Dict[str, int] = projections.PROFILE_DETAILS
+) -> Dict[str, Dict[str, Any]]:
+    """Profiles for a page of users, keyed by user_id, in a single query"""
+    profiles = await db.artist_profiles.find({"user_id": {"$in": user_ids}}, projection).to_list(None)
+    return {profile['user_id']: profile for profile in profiles}
+
+async def fetch_users_by_id(db: AsyncIOMotorDatabase, user_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    users = await db.users.find({"id": {"$in": user_ids}}, projections.USER_CONTACT).to_list(None)
+    return {user['id']: user for user in users}
+
+async def count_availability_by_artist(db: AsyncIOMotorDatabase, artist_ids: List[str]) -> Dict[str, int]:
+    counts = await db.availability_days.aggregate([
+        {"$match": {"artist_id": {"$in": artist_ids}}},
+        {"$group": {"_id": "$artist_id", "count": {"$sum": 1}}},
+    ]).to_list(None)
+    return {count['_id']: count['count'] for count in counts}
+
+async def fetch_priced_artists(
+    db: AsyncIOMotorDatabase,
+    query: Dict[str, Any],
+    page: PageParams,
+    projection: Dict[str, int],
+    summary: bool = False,
+    with_counts: bool = False
+):
+    """One page of artists whose profile matches `query`, ordered by price (unpriced last). Returns (artists, next_cursor)."""
+    if page.sort_field != PRICE_SORT:
+        page = replace(page, sort_field=PRICE_SORT)
+    profiles, next_cursor = await fetch_price_page(db.artist_profiles, query, page, projection)
+    
+    artist_ids = [profile['user_id'] for profile in profiles]
+    if with_counts:
+        users, availability_counts = await asyncio.gather(
+            fetch_users_by_id(db, artist_ids),
+            count_availability_by_artist(db, artist_ids),
+        )
+    else:
+        users, availability_counts = await fetch_users_by_id(db, artist_ids), {}
     
     result = []
-    for artist in artists:
-        profile = await db.artist_profiles.find_one({"user_id": artist['id']})
-        
-        # Count availability days
-        availability_count = await db.availability_days.count_documents({"artist_id": artist['id']})
-        
-        if profile:
-            profile.pop('_id', None)
-            result.append(ArtistWithProfile(
-                id=artist['id'],
-                email=artist['email'],
-                nom_de_scene=profile.get('nom_de_scene', ''),
-                telephone=profile.get('telephone'),
-                lien=profile.get('lien'),
-                tarif_soiree=profile.get('tarif_soiree'),
-                logo_url=profile.get('logo_url'),
-                gallery_urls=profile.get('gallery_urls', []),
-                bio=profile.get('bio'),
-                category=profile.get('category'),
-                availability_count=availability_count
-            ))
+    for profile in profiles:
+        user = users.get(profile['user_id'])
+        if not user:
+            continue
+        if summary:
+            result.append(artist_summary_row(user, profile))
         else:
-            result.append(ArtistWithProfile(
-                id=artist['id'],
-                email=artist['email'],
-                nom_de_scene='',
-                availability_count=availability_count
-            ))
+            result.append(artist_with_profile_row(user, profile, availability_counts.get(user['id'], 0)))
+    return result, next_cursor
+
+async def fetch_artists_with_profiles(db: AsyncIOMotorDatabase, page: PageParams, price: Optional[Dict[str, Any]] = None):
+    """One page of artists with their profile and availability count. Returns (artists, next_cursor)."""
+    if price is not None:
+        return await fetch_priced_artists(
+            db, price, page, projections.PROFILE_DETAILS, with_counts=page.wants("availability_count")
+        )
+    
+    artists, next_cursor = await fetch_page(
+        db.users, {"role": UserRole.ARTIST}, page, {"_id": 0, "id": 1, "email": 1, page.sort_field: 1}
+    )
+    
+    artist_ids = [artist['id'] for artist in artists]
+    if page.wants("availability_count"):
+        profiles, availability_counts = await asyncio.gather(
+            fetch_profiles_by_user(db, artist_ids),
+            count_availability_by_artist(db, artist_ids),
+        )
+    else:
+        profiles, availability_counts = await fetch_profiles_by_user(db, artist_ids), {}
+    
+    result = [
+        artist_with_profile_row(artist, profiles.get(artist['id']), availability_counts.get(artist['id'], 0))
+        for artist in artists
+    ]
+    return result, next_cursor
+
+async def fetch_artist_summaries(db: AsyncIOMotorDatabase, page: PageParams, price: Optional[Dict[str, Any]] = None):
+    """One page of artists as lightweight summaries. Returns (summaries, next_cursor)."""
+    if price is not None:
+        return await fetch_priced_artists(db, price, page, projections.PROFILE_SUMMARY, summary=True)
     
-    return result
+    artists, next_cursor = await fetch_page(
+        db.users, {"role": UserRole.ARTIST}, page, {"_id": 0, "id": 1, "email": 1, page.sort_field: 1}
+    )
+    profiles = await fetch_profiles_by_user(db, [artist['id'] for artist in artists], projections.PROFILE_SUMMARY)
+    
+    return [artist_summary_row(artist, profiles.get(artist['id'])) for artist in artists], next_cursor
+
+@api_router.get("/artists", response_model=List[ArtistWithProfile])
+async def get_all_artists(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    page: PageParams = Depends(artist_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    artists, next_cursor = await fetch_artists_with_profiles(db, page, price_query(page, min_price, max_price))
+    return rows_response(artists, next_cursor, page)
+
+artist_summary_page_params = page_params(
+    sort_fields=["created_at", "email", PRICE_SORT],
+    default_sort="created_at",
+    allowed_fields=list(ArtistSummary.model_fields),
+)
+
+@api_router.get("/artists/summary", response_model=List[ArtistSummary])
+async def get_artist_summaries(
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    page: PageParams = Depends(artist_summary_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Artists with only the fields the calendar list needs (admin only)"""
+    artists, next_cursor = await fetch_artist_summaries(db, page, price_query(page, min_price, max_price))
+    return rows_response(artists, next_cursor, page)
+
+artist_search_page_params = page_params(
+    sort_fields=search.SORT_FIELDS,
+    default_sort=search.DEFAULT_SORT,
+    allowed_fields=list(ArtistSearchResult.model_fields),
+)
+
+async def search_artists(
+    db: AsyncIOMotorDatabase,
+    page: PageParams,
+    q: Optional[str] = None,
+    category: Optional[ArtistCategory] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    available_on: Optional[str] = None,
+):
+    """One page of artists matching the search, best match first. Returns (artists, next_cursor)."""
+    price = price_query(page, min_price, max_price)
+    artist_ids = None
+    if available_on:
+        check_date_format(available_on)
+        artist_ids = await db.availability_days.distinct("artist_id", {"date": available_on})
+    
+    query = search.search_filter(q, category.value if category else None, price, artist_ids)
+    page = search.resolve_sort(page, ranked="$text" in query)
+    profiles, next_cursor = await search.search_profiles(db.artist_profiles, query, page, projections.PROFILE_SEARCH)
+    users = await fetch_users_by_id(db, [profile['user_id'] for profile in profiles])
+    
+    result = []
+    for profile in profiles:
+        user = users.get(profile['user_id'])
+        if user:
+            row = artist_summary_row(user, profile)
+            row["score"] = profile.get('score')
+            result.append(row)
+    return result, next_cursor
+
+@api_router.get("/artists/search", response_model=List[ArtistSearchResult])
+async def get_artist_search(
+    q: Optional[str] = Query(None, max_length=search.MAX_QUERY_LENGTH),
+    category: Optional[ArtistCategory] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    available_on: Optional[str] = None,
+    page: PageParams = Depends(artist_search_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Search artists by stage name and bio, filtered by category, price and availability (admin only)"""
+    artists, next_cursor = await search_artists(db, page, q, category, min_price, max_price, available_on)
+    return rows_response(artists, next_cursor, page)
+
+MAX_MATCH_DATES = 31
+MAX_MATCH_RESULTS = 50
+
+@api_router.get("/matching", response_model=List[ArtistMatch])
+async def match_artists(
+    response: Response,
+    dates: str,
+    category: Optional[ArtistCategory] = None,
+    budget: Optional[float] = Query(None, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_MATCH_RESULTS),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Best artists available on every one of `dates` (YYYY-MM-DD, comma separated) within budget (admin only)
+    
+    Served from the in-memory matching index: no database query beyond authentication.
+    """
+    days = sorted({day.strip() for day in dates.split(",") if day.strip()})
+    if not days or len(days) > MAX_MATCH_DATES:
+        raise HTTPException(status_code=400, detail=f"Indiquez entre 1 et {MAX_MATCH_DATES} dates")
+    for day in days:
+        check_date_format(day)
+    if not matching_index.ready:
+        raise HTTPException(
+            status_code=503, detail="Index de correspondance en cours de construction", headers={"Retry-After": "5"}
+        )
+    
+    matches = matching_index.match(days, category.value if category else None, budget, limit)
+    return ORJSONResponse(matches)
 
 @api_router.get("/artists/{artist_id}/profile", response_model=ArtistProfile)
-async def get_artist_profile(artist_id: str, current_user: User = Depends(get_current_admin)):
+async def get_artist_profile(
+    artist_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
     """Get detailed artist profile (admin only)"""
-    profile = await db.artist_profiles.find_one({"user_id": artist_id})
+    profile = await db.artist_profiles.find_one({"user_id": artist_id}, projections.PROFILE_FULL)
     if not profile:
         raise HTTPException(status_code=404, detail="Profil artiste non trouvé")
     
-    profile.pop('_id', None)
-    
     # Ensure required fields have default values
     if 'nom_de_scene' not in profile or not profile['nom_de_scene']:
         profile['nom_de_scene'] = 'Profil incomplet'
@@ -671,33 +1276,33 @@ async def get_artist_profile(artist_id: str, current_user: User = Depends(get_cu
 
 @api_router.put("/artists/{artist_id}/profile", response_model=ArtistProfile)
 async def update_artist_profile_admin(
-    artist_id: str, 
-    profile_data: ArtistProfileUpdate, 
-    current_user: User = Depends(get_current_admin)
+    artist_id: str,
+    profile_data: ArtistProfileUpdate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """Update artist profile (admin only)"""
     # Check if artist exists
-    artist = await db.users.find_one({"id": artist_id, "role": UserRole.ARTIST})
+    artist = await db.users.find_one({"id": artist_id, "role": UserRole.ARTIST}, projections.ID_ONLY)
     if not artist:
         raise HTTPException(status_code=404, detail="Artiste non trouvé")
     
-    # Check if profile exists
-    existing_profile = await db.artist_profiles.find_one({"user_id": artist_id})
-    if not existing_profile:
-        raise HTTPException(status_code=404, detail="Profil artiste non trouvé")
-    
-    # Update profile
+    # Update profile and get it back in one round trip
     update_data = {k: v for k, v in profile_data.dict().items() if v is not None}
+    if "tarif_soiree" in update_data:
+        update_data.update(parse_tarif(update_data["tarif_soiree"]).fields())
     update_data["updated_at"] = datetime.now(timezone.utc)
     
-    await db.artist_profiles.update_one(
+    updated_profile = await db.artist_profiles.find_one_and_update(
         {"user_id": artist_id},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection=projections.PROFILE_FULL,
+        return_document=ReturnDocument.AFTER,
     )
-    
-    # Return updated profile
-    updated_profile = await db.artist_profiles.find_one({"user_id": artist_id})
-    updated_profile.pop('_id', None)
+    if not updated_profile:
+        raise HTTPException(status_code=404, detail="Profil artiste non trouvé")
+    matching_index.update_profile(artist_id, updated_profile)
     
     # Ensure required fields have default values
     if 'nom_de_scene' not in updated_profile or not updated_profile['nom_de_scene']:
@@ -707,9 +1312,11 @@ async def update_artist_profile_admin(
 
 @api_router.patch("/artists/{artist_id}/category")
 async def update_artist_category(
-    artist_id: str, 
+    artist_id: str,
     category_data: dict,
-    current_user: User = Depends(get_current_admin)
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
     """Update artist category (admin only)"""
     category = category_data.get("category")
@@ -719,29 +1326,36 @@ async def update_artist_category(
         raise HTTPException(status_code=400, detail="Catégorie invalide. Utilisez 'DJ' ou 'Groupe'")
     
     # Check if artist exists
-    artist = await db.users.find_one({"id": artist_id, "role": UserRole.ARTIST})
+    artist = await db.users.find_one({"id": artist_id, "role": UserRole.ARTIST}, projections.ID_ONLY)
     if not artist:
         raise HTTPException(status_code=404, detail="Artiste non trouvé")
     
     # Update or create profile with category
+    now = datetime.now(timezone.utc)
     result = await db.artist_profiles.update_one(
         {"user_id": artist_id},
         {
             "$set": {
                 "category": category,
-                "updated_at": datetime.now(timezone.utc)
+                "updated_at": now
             }
         },
         upsert=True
     )
+    matching_index.update_profile(artist_id, {"category": category, "updated_at": now})
     
     return {"message": f"Catégorie mise à jour : {category}", "category": category}
 
 @api_router.delete("/artists/{artist_id}")
-async def delete_artist(artist_id: str, current_user: User = Depends(get_current_admin)):
+async def delete_artist(
+    artist_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
     """Delete artist and all related data (admin only)"""
     # Check if artist exists
-    artist = await db.users.find_one({"id": artist_id, "role": UserRole.ARTIST})
+    artist = await db.users.find_one({"id": artist_id, "role": UserRole.ARTIST}, projections.USER_CONTACT)
     if not artist:
         raise HTTPException(status_code=404, detail="Artiste non trouvé")
     
@@ -753,6 +1367,8 @@ async def delete_artist(artist_id: str, current_user: User = Depends(get_current
     
     # Delete the user account
     user_result = await db.users.delete_one({"id": artist_id})
+    matching_index.remove_artist(artist_id)
+    await record_removal(db, artist_id)
     
     # Optionally delete related invitations (sent to this email)
     await db.invitations.delete_many({"email": artist['email']})
@@ -765,10 +1381,34 @@ async def delete_artist(artist_id: str, current_user: User = Depends(get_current
     }
 
 # Blocked Dates endpoints (Admin only)
+BLOCKED_DATE_FIELDS = ["id", "date", "note", "created_at"]
+
+blocked_date_page_params = page_params(
+    sort_fields=["date", "created_at"],
+    default_sort="date",
+    allowed_fields=BLOCKED_DATE_FIELDS,
+)
+
+async def fetch_blocked_dates(
+    db: AsyncIOMotorDatabase,
+    page: PageParams,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """One page of blocked dates in a range. Returns (blocked_dates, next_cursor)."""
+    return await fetch_page(
+        db.blocked_dates, date_range_query(start_date, end_date), page, page.projection(BLOCKED_DATE_FIELDS)
+    )
+
 @api_router.post("/blocked-dates", response_model=BlockedDate)
-async def create_blocked_date(blocked_data: BlockedDateCreate, current_user: User = Depends(get_current_admin)):
+async def create_blocked_date(
+    blocked_data: BlockedDateCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
     # Check if date is already blocked
-    existing = await db.blocked_dates.find_one({"date": blocked_data.date.isoformat()})
+    existing = await db.blocked_dates.find_one({"date": blocked_data.date.isoformat()}, projections.ID_ONLY)
     if existing:
         raise HTTPException(status_code=400, detail="Cette date est déjà bloquée")
     
@@ -783,39 +1423,36 @@ async def create_blocked_date(blocked_data: BlockedDateCreate, current_user: Use
     
     # Remove existing artist availabilities for this date
     result = await db.availability_days.delete_many({"date": blocked_data.date.isoformat()})
+    # Other workers pick the blocked date up on their next refresh
+    matching_index.block_date(blocked_data.date.isoformat())
     if result.deleted_count > 0:
-        print(f"Removed {result.deleted_count} artist availabilities for blocked date {blocked_data.date}")
+        logger.info("Removed %d artist availabilities for blocked date %s", result.deleted_count, blocked_data.date)
     
     blocked_date_dict.pop('_id', None)
     return BlockedDate(**blocked_date_dict)
 
 @api_router.get("/blocked-dates", response_model=List[Dict[str, Any]])
 async def get_blocked_dates(
+    response: Response,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: User = Depends(get_current_user)
+    page: PageParams = Depends(blocked_date_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
-    query = {}
-    
-    if start_date:
-        query["date"] = {"$gte": start_date}
-    if end_date:
-        if "date" in query:
-            query["date"]["$lte"] = end_date
-        else:
-            query["date"] = {"$lte": end_date}
-    
-    blocked_dates = await db.blocked_dates.find(query).to_list(1000)
-    result = []
-    for blocked in blocked_dates:
-        blocked.pop('_id', None)
-        result.append(blocked)
-    
-    return result
+    blocked_dates, next_cursor = await fetch_blocked_dates(db, page, start_date, end_date)
+    set_next_cursor(response, next_cursor)
+    return blocked_dates
 
 @api_router.put("/blocked-dates/{blocked_id}", response_model=BlockedDate)
-async def update_blocked_date(blocked_id: str, blocked_data: BlockedDateCreate, current_user: User = Depends(get_current_admin)):
-    blocked_date = await db.blocked_dates.find_one({"id": blocked_id})
+async def update_blocked_date(
+    blocked_id: str,
+    blocked_data: BlockedDateCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    blocked_date = await db.blocked_dates.find_one({"id": blocked_id}, projections.BLOCKED_DATE_DAY)
     if not blocked_date:
         raise HTTPException(status_code=404, detail="Date bloquée non trouvée")
     
@@ -829,26 +1466,38 @@ async def update_blocked_date(blocked_id: str, blocked_data: BlockedDateCreate,
         {"id": blocked_id},
         {"$set": update_data}
     )
+    matching_index.unblock_date(blocked_date['date'])
+    matching_index.block_date(update_data['date'])
     
-    updated_blocked = await db.blocked_dates.find_one({"id": blocked_id})
-    updated_blocked.pop('_id', None)
+    updated_blocked = await db.blocked_dates.find_one({"id": blocked_id}, {"_id": 0})
     return BlockedDate(**updated_blocked)
 
 @api_router.delete("/blocked-dates/{blocked_id}")
-async def delete_blocked_date(blocked_id: str, current_user: User = Depends(get_current_admin)):
-    blocked_date = await db.blocked_dates.find_one({"id": blocked_id})
+async def delete_blocked_date(
+    blocked_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    blocked_date = await db.blocked_dates.find_one({"id": blocked_id}, projections.BLOCKED_DATE_DAY)
     if not blocked_date:
         raise HTTPException(status_code=404, detail="Date bloquée non trouvée")
     
     await db.blocked_dates.delete_one({"id": blocked_id})
+    matching_index.unblock_date(blocked_date['date'])
     return {"message": "Date bloquée supprimée"}
 
 # Utility function to check if a date is blocked
-async def is_date_blocked(date_str: str) -> bool:
-    blocked = await db.blocked_dates.find_one({"date": date_str})
+async def is_date_blocked(db: AsyncIOMotorDatabase, date_str: str) -> bool:
+    blocked = await db.blocked_dates.find_one({"date": date_str}, projections.ID_ONLY)
     return blocked is not None
 @api_router.post("/availability-days/toggle", response_model=Dict[str, Any])
-async def toggle_availability_day(day_data: AvailabilityDayToggle, current_user: User = Depends(get_current_user)):
+async def toggle_availability_day(
+    day_data: AvailabilityDayToggle,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_user)
+):
     if current_user.role != UserRole.ARTIST:
         raise HTTPException(status_code=403, detail="Seuls les artistes peuvent gérer leurs disponibilités")
     
@@ -864,18 +1513,20 @@ async def toggle_availability_day(day_data: AvailabilityDayToggle, current_user:
     date_str = day_data.date.isoformat()
     
     # Check if date is blocked by admin
-    if await is_date_blocked(date_str):
+    if await is_date_blocked(db, date_str):
         raise HTTPException(status_code=400, detail="Cette date est bloquée par l'administrateur")
     
     # Check if availability already exists
     existing = await db.availability_days.find_one({
         "artist_id": current_user.id,
         "date": date_str
-    })
+    }, projections.ID_ONLY)
     
     if existing:
         # Remove availability (toggle OFF)
         await db.availability_days.delete_one({"artist_id": current_user.id, "date": date_str})
+        matching_index.set_available(current_user.id, date_str, False)
+        await record_removal(db, current_user.id, date_str)
         return {"action": "removed", "date": date_str, "available": False}
     else:
         # Add availability (toggle ON)
@@ -888,104 +1539,169 @@ async def toggle_availability_day(day_data: AvailabilityDayToggle, current_user:
             "created_at": datetime.now(timezone.utc)
         }
         await db.availability_days.insert_one(availability_dict)
+        matching_index.set_available(current_user.id, date_str, True, availability_dict["created_at"])
         
         # Remove _id for return
         availability_dict.pop('_id', None)
         return {"action": "added", "date": date_str, "available": True, "availability": availability_dict}
 
-@api_router.get("/availability-days", response_model=List[Dict[str, Any]])
-async def get_availability_days(
+AVAILABILITY_DAY_FIELDS = ["id", "artist_id", "date", "note", "color", "created_at"]
+ARTIST_INFO_FIELDS = ["artist_name", "artist_email", "artist_category"]
+
+availability_page_params = page_params(
+    sort_fields=["date", "created_at"],
+    default_sort="date",
+    allowed_fields=AVAILABILITY_DAY_FIELDS + ARTIST_INFO_FIELDS,
+)
+
+async def fetch_availability_days(
+    db: AsyncIOMotorDatabase,
+    current_user: CurrentUser,
+    page: PageParams,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    current_user: User = Depends(get_current_user)
+    end_date: Optional[str] = None
 ):
+    """One page of availability days. Returns (days, next_cursor)."""
+    query = date_range_query(start_date, end_date)
+    
     if current_user.role == UserRole.ARTIST:
         # Artists can only see their own availability days
-        query = {"artist_id": current_user.id}
-        
-        if start_date:
-            query["date"] = {"$gte": start_date}
-        if end_date:
-            if "date" in query:
-                query["date"]["$lte"] = end_date
-            else:
-                query["date"] = {"$lte": end_date}
-        
-        availability_days = await db.availability_days.find(query).to_list(1000)
-        result = []
-        for day in availability_days:
-            # Remove MongoDB _id field and ensure proper data types
-            day.pop('_id', None)
-            result.append(day)
-        return result
+        query["artist_id"] = current_user.id
+        return await fetch_page(db.availability_days, query, page, page.projection(AVAILABILITY_DAY_FIELDS))
+    
+    # Admin can see all availability days with artist info
+    wants_artist_info = any(page.wants(field) for field in ARTIST_INFO_FIELDS)
+    availability_days, next_cursor = await fetch_page(
+        db.availability_days,
+        query,
+        page,
+        page.projection(AVAILABILITY_DAY_FIELDS, required=["artist_id"] if wants_artist_info else ()),
+    )
+    if not wants_artist_info:
+        return availability_days, next_cursor
     
-    else:
-        # Admin can see all availability days with artist info
-        query = {}
-        
-        if start_date:
-            query["date"] = {"$gte": start_date}
-        if end_date:
-            if "date" in query:
-                query["date"]["$lte"] = end_date
-            else:
-                query["date"] = {"$lte": end_date}
-        
-        availability_days = await db.availability_days.find(query).to_list(1000)
+    artist_ids = list({day['artist_id'] for day in availability_days})
+    profiles, users = await asyncio.gather(
+        fetch_profiles_by_user(db, artist_ids, projections.PROFILE_DISPLAY_NAME),
+        fetch_users_by_id(db, artist_ids),
+    )
+    
+    result = []
+    for day in availability_days:
+        profile = profiles.get(day['artist_id'])
+        user = users.get(day['artist_id'])
         
-        result = []
-        for day in availability_days:
-            # Get artist profile
-            profile = await db.artist_profiles.find_one({"user_id": day['artist_id']})
-            user = await db.users.find_one({"id": day['artist_id']})
-            
-            # Remove MongoDB _id field and add artist info
-            day.pop('_id', None)
-            day['artist_name'] = profile.get('nom_de_scene') if profile else (user.get('email') if user else 'Artiste inconnu')
-            day['artist_email'] = user.get('email') if user else ''
-            day['artist_category'] = profile.get('category') if profile else None
-            
-            result.append(day)
+        day['artist_name'] = profile.get('nom_de_scene') if profile else (user.get('email') if user else 'Artiste inconnu')
+        day['artist_email'] = user.get('email') if user else ''
+        day['artist_category'] = profile.get('category') if profile else None
         
-        return result
+        result.append(select_fields(day, page))
+    
+    return result, next_cursor
 
-@api_router.get("/availability-days/{day_date}", response_model=List[ArtistWithProfile])
-async def get_artists_available_on_date(day_date: str, current_user: User = Depends(get_current_admin)):
-    """Get list of artists available on a specific date (admin only)"""
-    try:
-        target_date = datetime.strptime(day_date, "%Y-%m-%d").date()
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Format de date invalide. Utilisez YYYY-MM-DD")
+@api_router.get("/availability-days", response_model=List[Dict[str, Any]])
+async def get_availability_days(
+    response: Response,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    page: PageParams = Depends(availability_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    availability_days, next_cursor = await fetch_availability_days(db, current_user, page, start_date, end_date)
+    set_next_cursor(response, next_cursor)
+    return availability_days
+
+available_artist_page_params = page_params(
+    sort_fields=["created_at", PRICE_SORT],
+    default_sort="created_at",
+    allowed_fields=list(ArtistWithProfile.model_fields),
+)
+
+available_artist_summary_page_params = page_params(
+    sort_fields=["created_at", PRICE_SORT],
+    default_sort="created_at",
+    allowed_fields=list(ArtistSummary.model_fields),
+)
+
+async def fetch_artists_available_on(
+    db: AsyncIOMotorDatabase,
+    day_date: str,
+    page: PageParams,
+    summary: bool = False,
+    price: Optional[Dict[str, Any]] = None
+):
+    """One page of artists available on a date. Returns (artists, next_cursor)."""
+    check_date_format(day_date)
+    
+    if price is not None:
+        artist_ids = await db.availability_days.distinct("artist_id", {"date": day_date})
+        return await fetch_priced_artists(
+            db,
+            {**price, "user_id": {"$in": artist_ids}},
+            page,
+            projections.PROFILE_SUMMARY if summary else projections.PROFILE_DETAILS,
+            summary=summary,
+        )
+    
+    # Find one page of availability days for this date
+    availability_days, next_cursor = await fetch_page(
+        db.availability_days, {"date": day_date}, page, {"_id": 0, "id": 1, "artist_id": 1, "created_at": 1}
+    )
     
-    # Find all availability days for this date
-    availability_days = await db.availability_days.find({"date": day_date}).to_list(1000)
+    artist_ids = [day['artist_id'] for day in availability_days]
+    profiles, users = await asyncio.gather(
+        fetch_profiles_by_user(db, artist_ids, projections.PROFILE_SUMMARY if summary else projections.PROFILE_DETAILS),
+        fetch_users_by_id(db, artist_ids),
+    )
+    build = artist_summary_row if summary else artist_with_profile_row
     
     available_artists = []
     for day in availability_days:
-        # Get artist profile
-        profile = await db.artist_profiles.find_one({"user_id": day['artist_id']})
-        user = await db.users.find_one({"id": day['artist_id']})
+        profile = profiles.get(day['artist_id'])
+        user = users.get(day['artist_id'])
         
         if user and profile:
-            profile.pop('_id', None)
-            available_artists.append(ArtistWithProfile(
-                id=user['id'],
-                email=user['email'],
-                nom_de_scene=profile.get('nom_de_scene', ''),
-                telephone=profile.get('telephone'),
-                lien=profile.get('lien'),
-                tarif_soiree=profile.get('tarif_soiree'),
-                logo_url=profile.get('logo_url'),
-                gallery_urls=profile.get('gallery_urls', []),
-                bio=profile.get('bio'),
-                availability_count=0  # Not needed in this context
-            ))
+            available_artists.append(build(user, profile))
     
-    return available_artists
+    return available_artists, next_cursor
+
+@api_router.get("/availability-days/{day_date}", response_model=List[ArtistWithProfile])
+async def get_artists_available_on_date(
+    day_date: str,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    page: PageParams = Depends(available_artist_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Get list of artists available on a specific date (admin only)"""
+    price = price_query(page, min_price, max_price)
+    available_artists, next_cursor = await fetch_artists_available_on(db, day_date, page, price=price)
+    return rows_response(available_artists, next_cursor, page)
+
+@api_router.get("/availability-days/{day_date}/summary", response_model=List[ArtistSummary])
+async def get_artist_summaries_available_on_date(
+    day_date: str,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    page: PageParams = Depends(available_artist_summary_page_params),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Artists available on a date, as lightweight summaries for the calendar popup (admin only)"""
+    price = price_query(page, min_price, max_price)
+    available_artists, next_cursor = await fetch_artists_available_on(db, day_date, page, summary=True, price=price)
+    return rows_response(available_artists, next_cursor, page)
 
 @api_router.delete("/availability-days/{day_id}")
-async def delete_availability_day(day_id: str, current_user: User = Depends(get_current_user)):
-    availability_day = await db.availability_days.find_one({"id": day_id})
+async def delete_availability_day(
+    day_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    matching_index: MatchingIndex = Depends(get_matching_index),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    availability_day = await db.availability_days.find_one({"id": day_id}, projections.AVAILABILITY_OWNER)
     if not availability_day:
         raise HTTPException(status_code=404, detail="Disponibilité non trouvée")
     
@@ -994,12 +1710,14 @@ async def delete_availability_day(day_id: str, current_user: User = Depends(get_
         raise HTTPException(status_code=403, detail="Vous ne pouvez supprimer que vos propres disponibilités")
     
     await db.availability_days.delete_one({"id": day_id})
+    matching_index.set_available(availability_day['artist_id'], availability_day['date'], False)
+    await record_removal(db, availability_day['artist_id'], availability_day['date'])
     return {"message": "Disponibilité supprimée"}
 
 # Verification endpoint for invitation tokens
 @api_router.get("/invitations/verify/{token}")
-async def verify_invitation_token(token: str):
-    invitation = await db.invitations.find_one({"token": token, "status": InvitationStatus.SENT})
+async def verify_invitation_token(token: str, db: AsyncIOMotorDatabase = Depends(get_db)):
+    invitation = await db.invitations.find_one({"token": token, "status": InvitationStatus.SENT}, projections.INVITATION_VALIDITY)
     if not invitation:
         raise HTTPException(status_code=400, detail="Token d'invitation invalide ou expiré")
     
@@ -1013,43 +1731,128 @@ async def verify_invitation_token(token: str):
     
     return {"valid": True, "email": invitation['email']}
 
-# Export endpoints
-@api_router.get("/export/csv")
-async def export_csv(
+# Dashboard snapshots: one authenticated round trip instead of three
+def resolve_dashboard_range(month: Optional[str], start_date: Optional[str], end_date: Optional[str]):
+    if month:
+        return month_bounds(month)
+    return start_date, end_date
+
+@api_router.get("/admin/dashboard")
+async def get_admin_dashboard(
+    month: Optional[str] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    artist_ids: Optional[str] = None,
-    current_user: User = Depends(get_current_admin)
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
 ):
-    """Export availability days and blocked dates to CSV format"""
-    import csv
-    from io import StringIO
+    """Artists, availability days and blocked dates for a month (or explicit range) in one payload"""
+    start_date, end_date = resolve_dashboard_range(month, start_date, end_date)
     
-    query = {}
+    (artists, artists_cursor), (availability_days, availability_cursor), (blocked_dates, blocked_cursor) = await asyncio.gather(
+        fetch_artist_summaries(db, PageParams(sort_field="created_at")),
+        fetch_availability_days(db, current_user, PageParams(sort_field="date"), start_date, end_date),
+        fetch_blocked_dates(db, PageParams(sort_field="date"), start_date, end_date),
+    )
     
-    if start_date:
-        query["date"] = {"$gte": start_date}
-    if end_date:
-        if "date" in query:
-            query["date"]["$lte"] = end_date
-        else:
-            query["date"] = {"$lte": end_date}
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "artists": artists,
+        "availability_days": availability_days,
+        "blocked_dates": blocked_dates,
+        # Cursors for the regular list endpoints when a section has more than one page
+        "next_cursors": {
+            "artists": artists_cursor,
+            "availability_days": availability_cursor,
+            "blocked_dates": blocked_cursor,
+        },
+    }
+
+@api_router.get("/admin/coverage-gaps")
+async def get_coverage_gaps(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_artists: int = Query(1, ge=1, le=1000),
+    category: Optional[ArtistCategory] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Dates of a range (next 30 days by default) with fewer than `min_artists` available artists
+    per category, blocked dates excluded (admin only)"""
+    for value in (start_date, end_date):
+        if value:
+            check_date_format(value)
+    start = date.fromisoformat(start_date) if start_date else date.today()
+    end = date.fromisoformat(end_date) if end_date else start + timedelta(days=30)
+    if end < start or (end - start).days >= coverage.MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Période invalide (au plus {coverage.MAX_RANGE_DAYS} jours, début avant fin)"
+        )
     
-    # Get availability days
-    availability_days = await db.availability_days.find(query).to_list(1000)
+    categories = [category.value] if category else [member.value for member in ArtistCategory]
+    rows, blocked = await asyncio.gather(
+        db.availability_days.aggregate(
+            coverage.availability_by_category_pipeline(start.isoformat(), end.isoformat(), categories)
+        ).to_list(None),
+        db.blocked_dates.distinct("date", date_range_query(start.isoformat(), end.isoformat())),
+    )
+    per_date = coverage.counts_by_date(rows)
+    gaps = coverage.find_gaps(per_date, set(blocked), start, end, categories, min_artists)
     
-    # Get blocked dates
-    blocked_dates = await db.blocked_dates.find(query).to_list(1000)
+    return {
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "min_artists": min_artists,
+        "categories": categories,
+        "blocked_dates": sorted(blocked),
+        "gaps": gaps,
+    }
+
+@api_router.get("/artist/dashboard")
+async def get_artist_dashboard(
+    month: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """Own profile, availability days and blocked dates for a month (or explicit range) in one payload"""
+    if current_user.role != UserRole.ARTIST:
+        raise HTTPException(status_code=403, detail="Seuls les artistes ont un tableau de bord artiste")
     
-    # Create CSV content
-    output = StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Date", "Type", "Nom Artiste", "Email", "Tarif Soirée", "Note"])
+    start_date, end_date = resolve_dashboard_range(month, start_date, end_date)
+    
+    profile, (availability_days, availability_cursor), (blocked_dates, blocked_cursor) = await asyncio.gather(
+        fetch_artist_profile(db, current_user.id),
+        fetch_availability_days(db, current_user, PageParams(sort_field="date"), start_date, end_date),
+        fetch_blocked_dates(db, PageParams(sort_field="date"), start_date, end_date),
+    )
+    
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "profile": profile,
+        "availability_days": availability_days,
+        "blocked_dates": blocked_dates,
+        "next_cursors": {
+            "availability_days": availability_cursor,
+            "blocked_dates": blocked_cursor,
+        },
+    }
+
+# Export endpoints
+CSV_HEADER = ["Date", "Type", "Nom Artiste", "Email", "Tarif Soirée", "Note"]
+
+async def write_availability_csv_rows(db: AsyncIOMotorDatabase, writer, availability_days: List[Dict[str, Any]]):
+    artist_ids = list({day['artist_id'] for day in availability_days})
+    profiles, users = await asyncio.gather(
+        fetch_profiles_by_user(db, artist_ids, projections.PROFILE_EXPORT),
+        fetch_users_by_id(db, artist_ids),
+    )
     
-    # Add availability days
     for day in availability_days:
-        profile = await db.artist_profiles.find_one({"user_id": day['artist_id']})
-        user = await db.users.find_one({"id": day['artist_id']})
+        profile = profiles.get(day['artist_id'])
+        user = users.get(day['artist_id'])
         
         artist_name = profile.get('nom_de_scene') if profile else (user.get('email') if user else 'Artiste inconnu')
         artist_email = user.get('email') if user else ''
@@ -1063,9 +1866,40 @@ async def export_csv(
             tarif_soiree,
             day.get('note', '')
         ])
+
+async def iter_export_csv(db: AsyncIOMotorDatabase, start_date: Optional[str] = None, end_date: Optional[str] = None):
+    """Yield the availability days and blocked dates CSV in chunks of EXPORT_BATCH_SIZE rows"""
+    import csv
+    from io import StringIO
+    
+    query = date_range_query(start_date, end_date)
+    output = StringIO()
+    writer = csv.writer(output)
+    
+    def take_chunk() -> str:
+        chunk = output.getvalue()
+        output.seek(0)
+        output.truncate(0)
+        return chunk
+    
+    writer.writerow(CSV_HEADER)
+    
+    # Add availability days, resolving artists once per batch
+    batch = []
+    days_cursor = db.availability_days.find(query, projections.fields("artist_id", "date", "note")).sort([("date", 1), ("id", 1)])
+    async for day in days_cursor:
+        batch.append(day)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            await write_availability_csv_rows(db, writer, batch)
+            batch = []
+            yield take_chunk()
+    if batch:
+        await write_availability_csv_rows(db, writer, batch)
     
     # Add blocked dates
-    for blocked in blocked_dates:
+    blocked_cursor = db.blocked_dates.find(query, projections.fields("date", "note")).sort([("date", 1), ("id", 1)])
+    written = 0
+    async for blocked in blocked_cursor:
         writer.writerow([
             blocked['date'],
             'Date bloquée',
@@ -1074,22 +1908,328 @@ async def export_csv(
             '',
             blocked.get('note', '')
         ])
+        written += 1
+        if written % EXPORT_BATCH_SIZE == 0:
+            yield take_chunk()
     
-    csv_content = output.getvalue()
-    output.close()
-    
-    return {"csv_content": csv_content, "filename": f"disponibilites_et_blocages_{datetime.now().strftime('%Y%m%d')}.csv"}
+    yield take_chunk()
 
-# Include router
-app.include_router(api_router)
+def export_filename() -> str:
+    return f"disponibilites_et_blocages_{datetime.now().strftime('%Y%m%d')}.csv"
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+@api_router.get("/export/csv")
+async def export_csv(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    artist_ids: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Export availability days and blocked dates to CSV format"""
+    csv_content = "".join([chunk async for chunk in iter_export_csv(db, start_date, end_date)])
+    return {"csv_content": csv_content, "filename": export_filename()}
+
+@api_router.get("/export/csv/stream")
+async def export_csv_stream(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Stream the same CSV as a file download, without building it in memory"""
+    return StreamingResponse(
+        iter_export_csv(db, start_date, end_date),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{export_filename()}"'},
+    )
+
+@api_router.get("/admin/compression")
+async def get_compression_report(
+    compression_stats: CompressionStats = Depends(get_compression_stats),
+    settings: Settings = Depends(get_settings),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Compression ratio and CPU cost per encoding (admin only)"""
+    return {
+        "minimum_size": settings.compression_min_size,
+        "gzip_level": settings.gzip_level,
+        "brotli_quality": settings.brotli_quality,
+        **compression_stats.snapshot(),
+    }
+
+@api_router.get("/admin/profiles")
+async def list_profiles(
+    profile_store: ProfileStore = Depends(get_profile_store),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Recently captured request profiles (admin only)"""
+    return profile_store.list()
+
+@api_router.get("/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    profile_store: ProfileStore = Depends(get_profile_store),
+    current_user: CurrentUser = Depends(get_current_admin)
+):
+    """Download a profile in folded-stack format, for flamegraph.pl or speedscope"""
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profil non trouvé")
+    return PlainTextResponse(
+        profile["folded"],
+        headers={"Content-Disposition": f'attachment; filename="profile-{profile_id}.folded"'},
+    )
+
+# Metrics
+def component_metrics(state):
+    """Collector reading the gauges and counters of an app's components at scrape time"""
+    def collect():
+        yield ("bcrypt_queue_depth", "gauge", "Password hash operations running or waiting for the bcrypt pool", {}, state.password_pool.queue_depth)
+        for event, count in state.login_throttle.counters.items():
+            yield ("login_throttle_events_total", "counter", "Login attempts by throttling outcome", {"event": event}, count)
+        compression = state.compression_stats.snapshot()
+        for encoding, counters in compression["encodings"].items():
+            yield ("compression_bytes_in_total", "counter", "Bytes before compression", {"encoding": encoding}, counters["bytes_in"])
+            yield ("compression_bytes_out_total", "counter", "Bytes after compression", {"encoding": encoding}, counters["bytes_out"])
+            yield ("compression_cpu_seconds_total", "counter", "CPU seconds spent compressing", {"encoding": encoding}, counters["cpu_seconds"])
+        for reason, count in compression["skipped"].items():
+            yield ("compression_skipped_total", "counter", "Responses left uncompressed", {"reason": reason}, count)
+        matching = state.matching_index.stats()
+        yield ("matching_index_artists", "gauge", "Artists held in the matching index", {}, matching["artists"])
+        yield ("matching_index_available_days", "gauge", "Artist availability days held in the matching index", {}, matching["available_days"])
+        if matching["age_seconds"] is not None:
+            yield ("matching_index_age_seconds", "gauge", "Seconds since the matching index was last refreshed", {}, matching["age_seconds"])
+        if isinstance(state.storage, CachedStorage):
+            yield ("upload_cache_bytes", "gauge", "Bytes of upload file content held in the upload cache", {}, state.storage.bytes)
+            yield ("upload_cache_entries", "gauge", "Files held in the upload cache", {}, state.storage.entries)
+
+    return collect
+
+def upload_gc_recorder(registry: Registry):
+    """on_report callback of the upload GC, counting what each pass found and reclaimed"""
+    reclaimed_bytes = registry.counter(
+        "upload_gc_reclaimed_bytes_total", "Bytes of orphaned uploads deleted by the upload GC"
+    )
+    orphaned_files = registry.counter(
+        "upload_gc_orphaned_files_total", "Orphaned uploads found by the upload GC, by mode", ("mode",)
+    )
+
+    def record(report: Dict[str, Any]):
+        reclaimed_bytes.inc(amount=report["reclaimed_bytes"])
+        orphaned_files.inc(report["mode"], amount=report["orphaned_files"])
+
+    return record
+
+async def metrics(request: Request, authorization: Optional[str] = Header(None)):
+    """Prometheus scrape endpoint (bearer METRICS_TOKEN required when configured)"""
+    settings = request.app.state.settings
+    if settings.metrics_token:
+        if not authorization:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+        if not secrets.compare_digest(authorization, f"Bearer {settings.metrics_token}"):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid metrics token")
+    return PlainTextResponse(request.app.state.metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+async def create_indexes(db: AsyncIOMotorDatabase):
+    # Keyset pagination walks (sort field, id) pairs
+    await db.users.create_index("email")
+    await db.users.create_index("id")
+    await db.users.create_index([("role", 1), ("created_at", 1), ("id", 1)])
+    await db.users.create_index([("role", 1), ("email", 1), ("id", 1)])
+    await db.artist_profiles.create_index("user_id")
+    await db.artist_profiles.create_index(
+        search.TEXT_INDEX_FIELDS,
+        name=search.TEXT_INDEX_NAME,
+        weights=search.TEXT_INDEX_WEIGHTS,
+        default_language=search.TEXT_INDEX_LANGUAGE,
+    )
+    # Search without text: filters on category and price, ordered by stage name
+    await db.artist_profiles.create_index([("category", 1), ("tarif_amount", 1)])
+    await db.artist_profiles.create_index([("nom_de_scene", 1), ("user_id", 1)])
+    # Price-ordered listings walk (tarif_amount, user_id), then unpriced profiles on user_id
+    await db.artist_profiles.create_index([(PRICE_SORT, 1), ("user_id", 1)])
+    # Incremental refresh of the matching index
+    await db.artist_profiles.create_index("updated_at")
+    await db.matching_tombstones.create_index("removed_at", expireAfterSeconds=int(TOMBSTONE_TTL.total_seconds()))
+    await db.invitations.create_index("token")
+    await db.invitations.create_index([("created_at", 1), ("id", 1)])
+    await db.invitations.create_index([("expires_at", 1), ("id", 1)])
+    await db.blocked_dates.create_index([("date", 1), ("id", 1)])
+    await db.blocked_dates.create_index([("created_at", 1), ("id", 1)])
+    await db.availability_days.create_index([("date", 1), ("id", 1)])
+    await db.availability_days.create_index([("created_at", 1), ("id", 1)])
+    await db.availability_days.create_index([("artist_id", 1), ("date", 1), ("id", 1)])
+    await db.availability_days.create_index([("date", 1), ("created_at", 1), ("id", 1)])
+    await db.availability_days.create_index([("date", 1), ("artist_id", 1)])
+
+def create_mongo_client(app_settings: Settings, registry: Registry) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        app_settings.mongo_url,
+        event_listeners=[MongoCommandMetrics(registry), QueryMonitorListener(slow_query_ms=app_settings.slow_query_ms)],
+        **app_settings.mongo_client_options(),
+    )
+
+async def warm_up(state):
+    """Open the pool's first connections, build indexes and load bcrypt before taking traffic"""
+    settings, db = state.settings, state.db
+    # The first bcrypt call imports passlib and loads the backend; pay it here, on the
+    # bcrypt pool while the Mongo connections open, rather than on the first login
+    await asyncio.gather(
+        state.password_pool.verify("", None),
+        *(db.command("ping") for _ in range(max(settings.mongo_min_pool_size, 1))),
+    )
+    await create_indexes(db)
+    if isinstance(state.login_throttle.backend, MongoBucketBackend):
+        await state.login_throttle.backend.ensure_indexes()
+    if settings.storage_backend == "gridfs":
+        await state.storage.ensure_indexes()
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    state = application.state
+    settings = state.settings
+    state.client = create_mongo_client(settings, state.metrics_registry)
+    state.db = db = state.client[settings.db_name]
+    state.storage = cached_storage(create_storage(settings, db), settings, state.cache_requests)
+    if settings.storage_backend == "local":
+        settings.uploads_dir.mkdir(parents=True, exist_ok=True)
+    if settings.login_throttle_backend == "mongo":
+        state.login_throttle.backend = MongoBucketBackend(db.login_throttle)
+
+    loop_monitor = None
+    if settings.loop_monitor_enabled:
+        loop_monitor = LoopLagMonitor(
+            state.metrics_registry,
+            interval=settings.loop_lag_interval_ms / 1000,
+            threshold=settings.loop_lag_threshold_ms / 1000,
+        )
+
+    gc_task = matching_task = None
+    try:
+        await warm_up(state)
+        if loop_monitor:
+            loop_monitor.start()
+        if settings.upload_gc_interval_hours > 0:
+            gc_task = asyncio.create_task(upload_gc.run_periodically(
+                db,
+                state.storage,
+                timedelta(hours=settings.upload_gc_interval_hours),
+                on_report=upload_gc_recorder(state.metrics_registry),
+                grace=timedelta(hours=settings.upload_gc_grace_hours),
+                mode=settings.upload_gc_mode,
+                quarantine_retention=timedelta(days=settings.upload_gc_quarantine_days),
+            ))
+        if settings.matching_refresh_seconds > 0:
+            matching_task = asyncio.create_task(state.matching_index.run(
+                db, settings.matching_refresh_seconds, settings.matching_rebuild_seconds
+            ))
+        logger.info("Worker %s ready (Mongo pool %d-%d)", os.getpid(), settings.mongo_min_pool_size, settings.mongo_max_pool_size)
+        yield
+    finally:
+        for task in (gc_task, matching_task):
+            if task:
+                task.cancel()
+        await asyncio.gather(*(task for task in (gc_task, matching_task) if task), return_exceptions=True)
+        if loop_monitor:
+            await loop_monitor.stop()
+        state.client.close()
+        state.password_pool.shutdown()
+
+def init_state(state, app_settings: Settings):
+    """Build the per-app components derived from `app_settings` on `state` (app.state)"""
+    state.settings = app_settings
+    state.metrics_registry = Registry()
+    # Caches record hits and misses here; hit rate = hits / (hits + misses)
+    state.cache_requests = state.metrics_registry.counter(
+        "cache_requests_total", "Cache lookups by cache and result", ("cache", "result")
+    )
+    # Opened per worker by the lifespan
+    state.client = None
+    state.db = None
+    # Local disk until the lifespan installs the configured backend
+    state.storage = cached_storage(LocalStorage(app_settings.uploads_dir), app_settings, state.cache_requests)
+    # Login throttling (buckets are checked before any bcrypt work) and the bcrypt pool
+    state.password_pool = PasswordHashPool(
+        get_pwd_context, max_workers=app_settings.bcrypt_max_workers, max_queue=app_settings.bcrypt_max_queue
+    )
+    state.login_throttle = LoginThrottle(
+        MemoryBucketBackend(),  # swapped for MongoBucketBackend in the lifespan when configured
+        ip_burst=app_settings.login_ip_burst,
+        ip_per_minute=app_settings.login_ip_per_minute,
+        account_burst=app_settings.login_account_burst,
+        account_per_minute=app_settings.login_account_per_minute,
+    )
+    state.profile_store = ProfileStore(max_profiles=app_settings.profile_max_stored)
+    state.compression_stats = CompressionStats()
+    # Built and kept fresh by the lifespan; serves GET /api/matching from memory
+    state.matching_index = MatchingIndex()
+    state.metrics_registry.collector(component_metrics(state))
+
+class UploadStaticFiles(StaticFiles):
+    """The local uploads directory, without the upload GC's quarantine"""
+
+    def lookup_path(self, path: str):
+        if Path(path).as_posix().startswith(QUARANTINE_PREFIX):
+            return "", None  # answered like a missing file: 404
+        return super().lookup_path(path)
+
+def create_app(app_settings: Optional[Settings] = None) -> FastAPI:
+    """Build the ASGI app, with settings from the environment unless given. Nothing here
+    connects to Mongo or touches the disk: the lifespan opens one client per worker, so the
+    app works with pre-fork servers (gunicorn -k uvicorn.workers.UvicornWorker 'server:create_app()',
+    or uvicorn --factory). Apps built in one process share nothing."""
+    settings = app_settings or Settings.from_env()
+
+    application = FastAPI(title="EasyBookEvent - Calendrier Artistes", lifespan=lifespan)
+    init_state(application.state, settings)
+    state = application.state
+    application.include_router(api_router)
+    application.add_api_route("/metrics", metrics, include_in_schema=False)
+
+    # Keep original static mount for direct backend access (development, local storage only)
+    if settings.storage_backend == "local":
+        application.mount("/uploads", UploadStaticFiles(directory=str(settings.uploads_dir), check_dir=False), name="uploads")
+
+    # CORS
+    application.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER, PROFILE_ID_HEADER, PROFILE_STATUS_HEADER],
+    )
+
+    n_plus_one_requests = state.metrics_registry.counter(
+        "mongo_n_plus_one_requests_total", "Requests repeating one query shape above the N+1 threshold", ("method", "route")
+    )
+    application.add_middleware(
+        QueryMonitorMiddleware,
+        n_plus_one_threshold=settings.n_plus_one_threshold,
+        on_n_plus_one=n_plus_one_requests.inc,
+    )
+
+    application.add_middleware(
+        CompressionMiddleware,
+        stats=state.compression_stats,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.gzip_level,
+        brotli_quality=settings.brotli_quality,
+    )
+
+    # Outermost but one, so latency includes compression
+    application.add_middleware(HTTPMetricsMiddleware, registry=state.metrics_registry)
+
+    # Outermost, so profiles cover the whole middleware stack
+    application.add_middleware(
+        ProfilingMiddleware,
+        store=state.profile_store,
+        authorize=authorize_profiling,
+        sample_interval=settings.profile_sample_interval_ms / 1000,
+        min_interval=settings.profile_min_interval_seconds,
+        max_seconds=settings.profile_max_seconds,
+    )
+    return application
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+# `uvicorn server:app` keeps working; building the app has no side effects
+app = create_app()
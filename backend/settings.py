@@ -0,0 +1,168 @@
+"""
+Application settings, read from the environment (and backend/.env).
+
+Settings.from_env() only reads variables: building the settings, or the app
+from them (server.create_app), opens no connection and touches no file.
+"""
+
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+ROOT_DIR = Path(__file__).parent
+
+
+def _bool(name: str, default: bool) -> bool:
+    return os.environ.get(name, "true" if default else "false").lower() == "true"
+
+
+def _int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+@dataclass
+class Settings:
+    # MongoDB (one client and pool per worker process)
+    mongo_url: str
+    db_name: str
+    mongo_max_pool_size: int = 100
+    mongo_min_pool_size: int = 4
+    mongo_max_idle_time_ms: Optional[int] = None
+    mongo_server_selection_timeout_ms: int = 5000
+    mongo_connect_timeout_ms: int = 5000
+    mongo_socket_timeout_ms: Optional[int] = None
+    mongo_wait_queue_timeout_ms: Optional[int] = None
+
+    # HTTP
+    cors_origins: List[str] = field(default_factory=lambda: ["*"])
+    uploads_dir: Path = ROOT_DIR / "uploads"
+    secret_key: str = "your-secret-key-change-in-production"
+
+    # Upload storage: "local" (uploads_dir, single node), "gridfs" or "s3"
+    storage_backend: str = "local"
+    gridfs_bucket: str = "uploads"
+    s3_bucket: Optional[str] = None
+    s3_prefix: str = "uploads/"
+    s3_endpoint_url: Optional[str] = None  # e.g. a local MinIO
+    s3_region: Optional[str] = None
+    upload_cache_max_bytes: int = 32 * 1024 * 1024  # 0 disables the cache of small uploads
+    upload_cache_max_file_bytes: int = 256 * 1024
+    upload_cache_ttl_seconds: float = 300
+
+    # Orphaned upload GC (upload_gc.py), run by the workers every interval; opt-in (0 disables)
+    upload_gc_interval_hours: float = 0
+    upload_gc_grace_hours: float = 24
+    upload_gc_mode: str = "dry-run"  # "dry-run", "quarantine" or "delete"
+    upload_gc_quarantine_days: float = 30
+
+    # In-memory matching index (matching.py): incremental refresh (0 disables the index) and full rebuild
+    matching_refresh_seconds: float = 30
+    matching_rebuild_seconds: float = 900
+
+    # Login throttling and bcrypt pool
+    login_throttle_backend: str = "memory"  # "memory" or "mongo"
+    login_ip_burst: int = 20
+    login_ip_per_minute: float = 10
+    login_account_burst: int = 5
+    login_account_per_minute: float = 2
+    # Honour X-Forwarded-For only behind a known ingress; hops = proxies that append to it
+    trust_proxy_headers: bool = False
+    trusted_proxy_hops: int = 1
+    bcrypt_max_workers: int = 2
+    bcrypt_max_queue: int = 32
+
+    # Response compression
+    compression_min_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+    precompressed_uploads: bool = False
+
+    # Observability
+    metrics_token: Optional[str] = None
+    slow_query_ms: float = 100
+    n_plus_one_threshold: int = 10
+    loop_monitor_enabled: bool = True
+    loop_lag_interval_ms: float = 100
+    loop_lag_threshold_ms: float = 100
+    profile_sample_interval_ms: float = 5
+    profile_min_interval_seconds: float = 10
+    profile_max_seconds: float = 30
+    profile_max_stored: int = 20
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        defaults = cls(mongo_url=os.environ["MONGO_URL"], db_name=os.environ["DB_NAME"])
+        return cls(
+            mongo_url=defaults.mongo_url,
+            db_name=defaults.db_name,
+            mongo_max_pool_size=_int("MONGO_MAX_POOL_SIZE", defaults.mongo_max_pool_size),
+            mongo_min_pool_size=_int("MONGO_MIN_POOL_SIZE", defaults.mongo_min_pool_size),
+            mongo_max_idle_time_ms=_int("MONGO_MAX_IDLE_TIME_MS", defaults.mongo_max_idle_time_ms),
+            mongo_server_selection_timeout_ms=_int(
+                "MONGO_SERVER_SELECTION_TIMEOUT_MS", defaults.mongo_server_selection_timeout_ms
+            ),
+            mongo_connect_timeout_ms=_int("MONGO_CONNECT_TIMEOUT_MS", defaults.mongo_connect_timeout_ms),
+            mongo_socket_timeout_ms=_int("MONGO_SOCKET_TIMEOUT_MS", defaults.mongo_socket_timeout_ms),
+            mongo_wait_queue_timeout_ms=_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", defaults.mongo_wait_queue_timeout_ms),
+            cors_origins=os.environ.get("CORS_ORIGINS", "*").split(","),
+            uploads_dir=Path(os.environ.get("UPLOADS_DIR", str(defaults.uploads_dir))),
+            secret_key=os.environ.get("SECRET_KEY", defaults.secret_key),
+            storage_backend=os.environ.get("STORAGE_BACKEND", defaults.storage_backend),
+            gridfs_bucket=os.environ.get("GRIDFS_BUCKET", defaults.gridfs_bucket),
+            s3_bucket=os.environ.get("S3_BUCKET") or None,
+            s3_prefix=os.environ.get("S3_PREFIX", defaults.s3_prefix),
+            s3_endpoint_url=os.environ.get("S3_ENDPOINT_URL") or None,
+            s3_region=os.environ.get("S3_REGION") or None,
+            upload_cache_max_bytes=_int("UPLOAD_CACHE_MAX_BYTES", defaults.upload_cache_max_bytes),
+            upload_cache_max_file_bytes=_int("UPLOAD_CACHE_MAX_FILE_BYTES", defaults.upload_cache_max_file_bytes),
+            upload_cache_ttl_seconds=_float("UPLOAD_CACHE_TTL_SECONDS", defaults.upload_cache_ttl_seconds),
+            upload_gc_interval_hours=_float("UPLOAD_GC_INTERVAL_HOURS", defaults.upload_gc_interval_hours),
+            upload_gc_grace_hours=_float("UPLOAD_GC_GRACE_HOURS", defaults.upload_gc_grace_hours),
+            upload_gc_mode=os.environ.get("UPLOAD_GC_MODE", defaults.upload_gc_mode),
+            upload_gc_quarantine_days=_float("UPLOAD_GC_QUARANTINE_DAYS", defaults.upload_gc_quarantine_days),
+            matching_refresh_seconds=_float("MATCHING_REFRESH_SECONDS", defaults.matching_refresh_seconds),
+            matching_rebuild_seconds=_float("MATCHING_REBUILD_SECONDS", defaults.matching_rebuild_seconds),
+            login_throttle_backend=os.environ.get("LOGIN_THROTTLE_BACKEND", defaults.login_throttle_backend),
+            login_ip_burst=_int("LOGIN_IP_BURST", defaults.login_ip_burst),
+            login_ip_per_minute=_float("LOGIN_IP_PER_MINUTE", defaults.login_ip_per_minute),
+            login_account_burst=_int("LOGIN_ACCOUNT_BURST", defaults.login_account_burst),
+            login_account_per_minute=_float("LOGIN_ACCOUNT_PER_MINUTE", defaults.login_account_per_minute),
+            trust_proxy_headers=_bool("TRUST_PROXY_HEADERS", defaults.trust_proxy_headers),
+            trusted_proxy_hops=_int("TRUSTED_PROXY_HOPS", defaults.trusted_proxy_hops),
+            bcrypt_max_workers=_int("BCRYPT_MAX_WORKERS", defaults.bcrypt_max_workers),
+            bcrypt_max_queue=_int("BCRYPT_MAX_QUEUE", defaults.bcrypt_max_queue),
+            compression_min_size=_int("COMPRESSION_MIN_SIZE", defaults.compression_min_size),
+            gzip_level=_int("GZIP_LEVEL", defaults.gzip_level),
+            brotli_quality=_int("BROTLI_QUALITY", defaults.brotli_quality),
+            precompressed_uploads=_bool("PRECOMPRESSED_UPLOADS", defaults.precompressed_uploads),
+            metrics_token=os.environ.get("METRICS_TOKEN") or None,
+            slow_query_ms=_float("SLOW_QUERY_MS", defaults.slow_query_ms),
+            n_plus_one_threshold=_int("N_PLUS_ONE_THRESHOLD", defaults.n_plus_one_threshold),
+            loop_monitor_enabled=_bool("LOOP_MONITOR_ENABLED", defaults.loop_monitor_enabled),
+            loop_lag_interval_ms=_float("LOOP_LAG_INTERVAL_MS", defaults.loop_lag_interval_ms),
+            loop_lag_threshold_ms=_float("LOOP_LAG_THRESHOLD_MS", defaults.loop_lag_threshold_ms),
+            profile_sample_interval_ms=_float("PROFILE_SAMPLE_INTERVAL_MS", defaults.profile_sample_interval_ms),
+            profile_min_interval_seconds=_float("PROFILE_MIN_INTERVAL_SECONDS", defaults.profile_min_interval_seconds),
+            profile_max_seconds=_float("PROFILE_MAX_SECONDS", defaults.profile_max_seconds),
+            profile_max_stored=_int("PROFILE_MAX_STORED", defaults.profile_max_stored),
+        )
+
+    def mongo_client_options(self):
+        """Keyword arguments for AsyncIOMotorClient; unset timeouts keep the driver defaults"""
+        options = {
+            "maxPoolSize": self.mongo_max_pool_size,
+            "minPoolSize": self.mongo_min_pool_size,
+            "serverSelectionTimeoutMS": self.mongo_server_selection_timeout_ms,
+            "connectTimeoutMS": self.mongo_connect_timeout_ms,
+            "maxIdleTimeMS": self.mongo_max_idle_time_ms,
+            "socketTimeoutMS": self.mongo_socket_timeout_ms,
+            "waitQueueTimeoutMS": self.mongo_wait_queue_timeout_ms,
+        }
+        return {name: value for name, value in options.items() if value is not None}
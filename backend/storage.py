@@ -0,0 +1,505 @@
+"""
+Upload storage backends.
+
+Uploaded files are addressed by a key such as `logos/<uuid>.png` and exposed
+at `/api/uploads/<key>`. Three backends share one async interface:
+
+  * LocalStorage  - a directory on the node's disk (single node only)
+  * GridFSStorage - GridFS collections in the app's Mongo database
+  * S3Storage     - any S3-compatible object store (AWS, MinIO, ...), via the
+                    optional `boto3` package
+
+With GridFS or S3 every node sees every upload, so API nodes keep no state on
+disk. Reads stream in chunks; writes never block the event loop. Keys under
+QUARANTINE_PREFIX hold the upload GC's orphans and are never served.
+CachedStorage wraps any backend with an in-memory LRU of small files.
+"""
+
+import asyncio
+import hashlib
+import os
+import stat
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path, PurePosixPath
+from typing import Any, AsyncIterator, Callable, NamedTuple, Optional
+
+from bson import ObjectId
+
+UPLOADS_URL_PREFIX = "/api/uploads/"
+LEGACY_URL_PREFIX = "/uploads/"
+CHUNK_SIZE = 64 * 1024
+# Where upload_gc.py moves unreferenced files until they are purged
+QUARANTINE_PREFIX = "quarantine/"
+
+MEDIA_TYPES = {".png": "image/png", ".jpg": "image/jpeg", ".jpeg": "image/jpeg"}
+DEFAULT_MEDIA_TYPE = "image/jpeg"
+
+
+def media_type_for(key: str) -> str:
+    return MEDIA_TYPES.get(PurePosixPath(key).suffix.lower(), DEFAULT_MEDIA_TYPE)
+
+
+def url_for(key: str) -> str:
+    return UPLOADS_URL_PREFIX + key
+
+
+def key_from_url(url: str) -> Optional[str]:
+    """Storage key of an upload URL (`/api/uploads/...`, or the older `/uploads/...`)"""
+    for prefix in (UPLOADS_URL_PREFIX, LEGACY_URL_PREFIX):
+        if url.startswith(prefix):
+            return url[len(prefix):]
+    return None
+
+
+def valid_key(key: str) -> bool:
+    """Relative, normalised POSIX path: no absolute paths, `..` or empty segments"""
+    if not key or key.startswith("/") or "\\" in key:
+        return False
+    return all(part not in ("", ".", "..") for part in key.split("/"))
+
+
+def servable_key(key: str) -> bool:
+    """A valid key the uploads routes may serve: anything outside the quarantine"""
+    return valid_key(key) and not key.startswith(QUARANTINE_PREFIX)
+
+
+class FileInfo(NamedTuple):
+    key: str
+    size: int
+    modified: datetime  # UTC
+
+
+def _utc(moment: datetime) -> datetime:
+    return moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class StoredFile:
+    key: str
+    size: int
+    media_type: str
+    chunks: AsyncIterator[bytes]  # nothing is read until iterated
+    content: Optional[bytes] = None  # whole file, when already in memory
+    etag: Optional[str] = None
+
+
+class LocalStorage:
+    """Files under `root` on the local disk"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.root / key if valid_key(key) else None
+
+    async def save(self, key: str, data: bytes, media_type: str):
+        import aiofiles
+        import aiofiles.os
+
+        path = self._path(key)
+        if path is None:
+            raise ValueError(f"Invalid storage key: {key!r}")
+        await aiofiles.os.makedirs(path.parent, exist_ok=True)
+        # Readers never see a partly written file
+        partial = path.with_name(f".{path.name}.{uuid.uuid4().hex}.part")
+        async with aiofiles.open(partial, "wb") as f:
+            await f.write(data)
+        await aiofiles.os.replace(partial, path)
+
+    async def open(self, key: str) -> Optional[StoredFile]:
+        import aiofiles.os
+
+        path = self._path(key)
+        if path is None:
+            return None
+        try:
+            info = await aiofiles.os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        return StoredFile(key, info.st_size, media_type_for(key), self._chunks(path))
+
+    async def _chunks(self, path: Path) -> AsyncIterator[bytes]:
+        import aiofiles
+
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(CHUNK_SIZE):
+                yield chunk
+
+    async def delete(self, key: str) -> bool:
+        import aiofiles.os
+
+        path = self._path(key)
+        if path is None:
+            return False
+        try:
+            await aiofiles.os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def move(self, key: str, new_key: str) -> bool:
+        import aiofiles.os
+
+        path, new_path = self._path(key), self._path(new_key)
+        if path is None or new_path is None:
+            raise ValueError(f"Invalid storage key: {key!r} or {new_key!r}")
+        await aiofiles.os.makedirs(new_path.parent, exist_ok=True)
+        try:
+            await aiofiles.os.replace(path, new_path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def list_files(self) -> AsyncIterator[FileInfo]:
+        """Every file under the root, one directory scan at a time"""
+        loop = asyncio.get_running_loop()
+        pending = [self.root]
+        while pending:
+            directory = pending.pop()
+            entries = await loop.run_in_executor(None, self._scan, directory)
+            for path, info in entries:
+                if info is None:
+                    pending.append(path)
+                else:
+                    key = path.relative_to(self.root).as_posix()
+                    yield FileInfo(key, info.st_size, datetime.fromtimestamp(info.st_mtime, timezone.utc))
+
+    @staticmethod
+    def _scan(directory: Path):
+        """(path, stat) for files and (path, None) for subdirectories of `directory`"""
+        entries = []
+        try:
+            with os.scandir(directory) as scanner:
+                for entry in scanner:
+                    if entry.is_dir(follow_symlinks=False):
+                        entries.append((Path(entry.path), None))
+                    elif entry.is_file(follow_symlinks=False):
+                        entries.append((Path(entry.path), entry.stat(follow_symlinks=False)))
+        except FileNotFoundError:
+            pass
+        return entries
+
+
+class GridFSStorage:
+    """GridFS files in `<bucket>.files` / `<bucket>.chunks` of the app database.
+
+    The layout follows the GridFS spec, so files stay readable with mongofiles
+    and the drivers' GridFS APIs, but only plain collection calls are used: they
+    go through the app's client, its pool and its command listeners. Chunks are
+    written before the files document, so a file is visible only once complete;
+    an older revision under the same key is removed after the new one is in.
+    """
+
+    def __init__(self, db, bucket: str = "uploads", chunk_size: int = 255 * 1024, read_batch: int = 4):
+        self.files = db[f"{bucket}.files"]
+        self.chunks = db[f"{bucket}.chunks"]
+        self.chunk_size = chunk_size
+        self.read_batch = read_batch  # chunks per cursor batch bounds memory per download
+
+    async def ensure_indexes(self):
+        await self.files.create_index([("filename", 1), ("uploadDate", 1)])
+        await self.chunks.create_index([("files_id", 1), ("n", 1)], unique=True)
+
+    async def save(self, key: str, data: bytes, media_type: str):
+        if not valid_key(key):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        file_id = ObjectId()
+        chunks = [
+            {"files_id": file_id, "n": n, "data": data[offset:offset + self.chunk_size]}
+            for n, offset in enumerate(range(0, len(data), self.chunk_size))
+        ]
+        if chunks:
+            await self.chunks.insert_many(chunks)
+        await self.files.insert_one({
+            "_id": file_id,
+            "filename": key,
+            "length": len(data),
+            "chunkSize": self.chunk_size,
+            "uploadDate": datetime.now(timezone.utc),
+            "metadata": {"contentType": media_type},
+        })
+        await self._delete_revisions(key, exclude=file_id)
+
+    async def open(self, key: str) -> Optional[StoredFile]:
+        if not valid_key(key):
+            return None
+        document = await self.files.find_one(
+            {"filename": key}, {"length": 1, "metadata": 1}, sort=[("uploadDate", -1)]
+        )
+        if document is None:
+            return None
+        media_type = (document.get("metadata") or {}).get("contentType") or media_type_for(key)
+        return StoredFile(key, document["length"], media_type, self._chunks(document["_id"]))
+
+    async def _chunks(self, file_id) -> AsyncIterator[bytes]:
+        cursor = self.chunks.find({"files_id": file_id}, {"data": 1}, sort=[("n", 1)], batch_size=self.read_batch)
+        async for chunk in cursor:
+            yield bytes(chunk["data"])
+
+    async def delete(self, key: str) -> bool:
+        if not valid_key(key):
+            return False
+        return await self._delete_revisions(key) > 0
+
+    async def move(self, key: str, new_key: str) -> bool:
+        if not valid_key(key) or not valid_key(new_key):
+            raise ValueError(f"Invalid storage key: {key!r} or {new_key!r}")
+        if await self.files.find_one({"filename": key}, {"_id": 1}) is None:
+            return False
+        await self._delete_revisions(new_key)
+        await self.files.update_many({"filename": key}, {"$set": {"filename": new_key}})
+        return True
+
+    async def list_files(self) -> AsyncIterator[FileInfo]:
+        async for document in self.files.find({}, {"filename": 1, "length": 1, "uploadDate": 1}):
+            yield FileInfo(document["filename"], document["length"], _utc(document["uploadDate"]))
+
+    async def _delete_revisions(self, key: str, exclude=None) -> int:
+        query = {"filename": key}
+        if exclude is not None:
+            query["_id"] = {"$ne": exclude}
+        file_ids = [document["_id"] async for document in self.files.find(query, {"_id": 1})]
+        if not file_ids:
+            return 0
+        await self.files.delete_many({"_id": {"$in": file_ids}})
+        await self.chunks.delete_many({"files_id": {"$in": file_ids}})
+        return len(file_ids)
+
+
+S3_MISSING_CODES = {"NoSuchKey", "404", "NotFound"}
+
+
+def _s3_error_code(error: Exception) -> Optional[str]:
+    response = getattr(error, "response", None)
+    if isinstance(response, dict):
+        return str(response.get("Error", {}).get("Code"))
+    return None
+
+
+class S3Storage:
+    """Objects under `prefix` in an S3-compatible bucket.
+
+    boto3 is synchronous, so every call runs in the default executor; a
+    download is read CHUNK_SIZE bytes at a time. `client` is any object with
+    the boto3 S3 client methods used below; by default a boto3 client is built
+    for `endpoint_url` (e.g. a local MinIO or moto server).
+    """
+
+    def __init__(self, bucket: str, prefix: str = "uploads/", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, client: Any = None):
+        if client is None:
+            try:
+                import boto3
+            except ImportError:
+                raise RuntimeError("The s3 storage backend needs boto3: pip install boto3")
+            client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    async def _call(self, fn, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(None, lambda: fn(**kwargs))
+
+    async def save(self, key: str, data: bytes, media_type: str):
+        if not valid_key(key):
+            raise ValueError(f"Invalid storage key: {key!r}")
+        await self._call(self.client.put_object, Bucket=self.bucket, Key=self.prefix + key, Body=data, ContentType=media_type)
+
+    async def open(self, key: str) -> Optional[StoredFile]:
+        if not valid_key(key):
+            return None
+        try:
+            head = await self._call(self.client.head_object, Bucket=self.bucket, Key=self.prefix + key)
+        except Exception as error:
+            if _s3_error_code(error) in S3_MISSING_CODES:
+                return None
+            raise
+        media_type = head.get("ContentType") or media_type_for(key)
+        return StoredFile(key, head["ContentLength"], media_type, self._chunks(key))
+
+    async def _chunks(self, key: str) -> AsyncIterator[bytes]:
+        response = await self._call(self.client.get_object, Bucket=self.bucket, Key=self.prefix + key)
+        body = response["Body"]
+        try:
+            while chunk := await self._call(body.read, amt=CHUNK_SIZE):
+                yield chunk
+        finally:
+            body.close()
+
+    async def delete(self, key: str) -> bool:
+        if not valid_key(key):
+            return False
+        if await self.open(key) is None:
+            return False
+        await self._call(self.client.delete_object, Bucket=self.bucket, Key=self.prefix + key)
+        return True
+
+    async def move(self, key: str, new_key: str) -> bool:
+        if not valid_key(key) or not valid_key(new_key):
+            raise ValueError(f"Invalid storage key: {key!r} or {new_key!r}")
+        if await self.open(key) is None:
+            return False
+        await self._call(
+            self.client.copy_object,
+            Bucket=self.bucket, Key=self.prefix + new_key, CopySource={"Bucket": self.bucket, "Key": self.prefix + key},
+        )
+        await self._call(self.client.delete_object, Bucket=self.bucket, Key=self.prefix + key)
+        return True
+
+    async def list_files(self) -> AsyncIterator[FileInfo]:
+        """Every object under the prefix, one list_objects_v2 page at a time"""
+        kwargs = {"Bucket": self.bucket, "Prefix": self.prefix}
+        while True:
+            page = await self._call(self.client.list_objects_v2, **kwargs)
+            for item in page.get("Contents", []):
+                yield FileInfo(item["Key"][len(self.prefix):], item["Size"], _utc(item["LastModified"]))
+            if not page.get("IsTruncated"):
+                break
+            kwargs["ContinuationToken"] = page["NextContinuationToken"]
+
+
+class _CacheEntry(NamedTuple):
+    content: bytes
+    media_type: str
+    etag: str
+    expires_at: float
+
+
+async def _single_chunk(content: bytes) -> AsyncIterator[bytes]:
+    yield content
+
+
+class CachedStorage:
+    """Keeps the content of small files from `backend` in a byte-bounded LRU.
+
+    Files up to `max_file_bytes` are read whole on first access and kept with
+    their media type and an ETag (content hash) until evicted, invalidated by
+    save/delete on this worker, or `ttl` seconds old; the TTL bounds how long
+    another node's delete stays invisible here. Larger files are streamed from
+    the backend as usual. Keys the backend does not have (mostly precompressed
+    siblings that were never made) are remembered the same way, up to
+    `max_missing` keys, so repeated probes skip the backend too.
+    `on_lookup("hit" | "miss")` is called for each open.
+    """
+
+    def __init__(self, backend, max_bytes: int = 32 * 1024 * 1024, max_file_bytes: int = 256 * 1024,
+                 ttl: float = 300, on_lookup: Optional[Callable[[str], None]] = None, max_missing: int = 10_000):
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes
+        self.ttl = ttl
+        self.on_lookup = on_lookup
+        self.max_missing = max_missing
+        self.bytes = 0
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._missing: "OrderedDict[str, float]" = OrderedDict()  # key -> expires_at
+        self._generation = 0
+
+    def __getattr__(self, name):
+        # Backend-specific operations (ensure_indexes, ...) pass through
+        return getattr(self.backend, name)
+
+    @property
+    def entries(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, result: str):
+        if self.on_lookup:
+            self.on_lookup(result)
+
+    def invalidate(self, key: str):
+        self._generation += 1
+        self._missing.pop(key, None)
+        entry = self._entries.pop(key, None)
+        if entry:
+            self.bytes -= len(entry.content)
+
+    def _put(self, key: str, entry: _CacheEntry):
+        self.invalidate(key)
+        self._entries[key] = entry
+        self.bytes += len(entry.content)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted.content)
+
+    async def open(self, key: str) -> Optional[StoredFile]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self._lookup("hit")
+                return StoredFile(key, len(entry.content), entry.media_type, _single_chunk(entry.content),
+                                  entry.content, entry.etag)
+            self.invalidate(key)
+        missing_until = self._missing.get(key)
+        if missing_until is not None:
+            if missing_until > time.monotonic():
+                self._missing.move_to_end(key)
+                self._lookup("hit")
+                return None
+            del self._missing[key]
+        self._lookup("miss")
+
+        generation = self._generation
+        stored = await self.backend.open(key)
+        if stored is None:
+            if generation == self._generation and self.max_missing > 0:
+                self._missing[key] = time.monotonic() + self.ttl
+                if len(self._missing) > self.max_missing:
+                    self._missing.popitem(last=False)
+            return None
+        if stored.size > self.max_file_bytes or stored.size > self.max_bytes:
+            return stored
+        content = b"".join([chunk async for chunk in stored.chunks])
+        etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+        # A save or delete during the read may have made this content stale
+        if generation == self._generation:
+            self._put(key, _CacheEntry(content, stored.media_type, etag, time.monotonic() + self.ttl))
+        return StoredFile(key, len(content), stored.media_type, _single_chunk(content), content, etag)
+
+    async def save(self, key: str, data: bytes, media_type: str):
+        self.invalidate(key)
+        try:
+            await self.backend.save(key, data, media_type)
+        finally:
+            self.invalidate(key)
+
+    async def delete(self, key: str) -> bool:
+        self.invalidate(key)
+        try:
+            return await self.backend.delete(key)
+        finally:
+            self.invalidate(key)
+
+    async def move(self, key: str, new_key: str) -> bool:
+        self.invalidate(key)
+        self.invalidate(new_key)
+        try:
+            return await self.backend.move(key, new_key)
+        finally:
+            self.invalidate(key)
+            self.invalidate(new_key)
+
+
+def create_storage(app_settings, database):
+    """The storage backend selected by `app_settings.storage_backend`"""
+    if app_settings.storage_backend == "gridfs":
+        return GridFSStorage(database, bucket=app_settings.gridfs_bucket)
+    if app_settings.storage_backend == "s3":
+        if not app_settings.s3_bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        return S3Storage(
+            app_settings.s3_bucket,
+            prefix=app_settings.s3_prefix,
+            endpoint_url=app_settings.s3_endpoint_url,
+            region=app_settings.s3_region,
+        )
+    if app_settings.storage_backend == "local":
+        return LocalStorage(app_settings.uploads_dir)
+    raise RuntimeError(f"Unknown STORAGE_BACKEND: {app_settings.storage_backend}")
@@ -0,0 +1,212 @@
+"""
+Login throttling and bcrypt protection.
+
+Token buckets are checked per client IP and per account *before* any password
+hashing happens, and password hashing itself runs on a small dedicated thread
+pool so a login storm cannot starve the event loop or the default threadpool
+used by the rest of the API.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, status
+from pymongo import ReturnDocument
+
+
+class MemoryBucketBackend:
+    """Token buckets kept in process memory (one set of buckets per worker)"""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def consume(self, key: str, capacity: float, refill_per_sec: float, cost: float = 1) -> Tuple[bool, float]:
+        """Take `cost` tokens from the bucket. Returns (allowed, retry_after_seconds)."""
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_sec)
+
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+
+        self._buckets[key] = (tokens, now)
+        # Drop the least recently used buckets so memory stays bounded
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+        retry_after = 0.0 if allowed else (cost - tokens) / refill_per_sec
+        return allowed, retry_after
+
+
+class MongoBucketBackend:
+    """Token buckets shared by every worker, stored in a Mongo collection.
+
+    Each consume is a single atomic pipeline update, so concurrent workers
+    never double-spend a bucket.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def consume(self, key: str, capacity: float, refill_per_sec: float, cost: float = 1) -> Tuple[bool, float]:
+        now = datetime.now(timezone.utc)
+        # A full bucket is equivalent to no bucket, so documents can expire once refilled
+        expires_at = now + timedelta(seconds=capacity / refill_per_sec)
+        elapsed_seconds = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [
+                        capacity,
+                        {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed_seconds, refill_per_sec]}]},
+                    ]},
+                    "updated_at": now,
+                    "expires_at": expires_at,
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", cost]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", cost]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+        allowed = bool(bucket.get("allowed"))
+        retry_after = 0.0 if allowed else (cost - bucket["tokens"]) / refill_per_sec
+        return allowed, retry_after
+
+
+class PasswordHashPool:
+    """Runs bcrypt on a dedicated, bounded thread pool.
+
+    At most `max_workers` hashes run at once and at most `max_queue` callers may
+    wait for a slot; anything beyond that is rejected immediately instead of
+    piling up behind the CPU. `context_factory` returns the passlib CryptContext;
+    it is called on first use, so passlib is not imported at startup.
+    """
+
+    def __init__(self, context_factory: Callable[[], Any], max_workers: int = 2, max_queue: int = 32):
+        self.context_factory = context_factory
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._pending
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_queue:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Service d'authentification surchargé, réessayez dans un instant",
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            # Created on first use, so building the pool starts no threads
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+
+    def _verify(self, plain_password: str, hashed_password: Optional[str]) -> bool:
+        pwd_context = self.context_factory()
+        if hashed_password is None:
+            pwd_context.dummy_verify()
+            return False
+        return pwd_context.verify(plain_password, hashed_password)
+
+    def _hash(self, password: str) -> str:
+        return self.context_factory().hash(password)
+
+    async def verify(self, plain_password: str, hashed_password: Optional[str]) -> bool:
+        """Verify a password; unknown accounts pay the same bcrypt cost via a dummy hash."""
+        return await self._run(self._verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self._hash, password)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class LoginThrottle:
+    """Per-IP and per-account token buckets guarding the login endpoint"""
+
+    def __init__(
+        self,
+        backend,
+        ip_burst: int = 20,
+        ip_per_minute: float = 10,
+        account_burst: int = 5,
+        account_per_minute: float = 2,
+    ):
+        self.backend = backend
+        self.ip_burst = ip_burst
+        self.ip_refill = ip_per_minute / 60
+        self.account_burst = account_burst
+        self.account_refill = account_per_minute / 60
+        self.counters: Dict[str, int] = {
+            "attempts": 0,
+            "rejected_ip": 0,
+            "rejected_account": 0,
+            "unknown_account": 0,
+            "failed": 0,
+            "succeeded": 0,
+        }
+
+    def record(self, counter: str):
+        self.counters[counter] += 1
+
+    async def check(self, client_ip: str, email: str):
+        """Raise 429 if either bucket is empty. Must be called before hashing."""
+        self.record("attempts")
+
+        allowed, retry_after = await self.backend.consume(f"ip:{client_ip}", self.ip_burst, self.ip_refill)
+        if not allowed:
+            self.record("rejected_ip")
+            self._reject(retry_after)
+
+        allowed, retry_after = await self.backend.consume(f"account:{email.lower()}", self.account_burst, self.account_refill)
+        if not allowed:
+            self.record("rejected_account")
+            self._reject(retry_after)
+
+    @staticmethod
+    def _reject(retry_after: float):
+        seconds = max(1, int(retry_after + 0.999))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Trop de tentatives de connexion. Réessayez dans {seconds} secondes",
+            headers={"Retry-After": str(seconds)},
+        )
+
+
+def get_client_ip(request, trust_proxy_headers: bool = False, trusted_hops: int = 1) -> str:
+    """Best-effort client address, optionally honouring X-Forwarded-For from the ingress.
+
+    Each proxy appends the address it received the request from, so only the
+    rightmost `trusted_hops` entries were written by our own infrastructure; the
+    entries to their left are whatever the client chose to send.
+    """
+    if trust_proxy_headers and trusted_hops > 0:
+        forwarded = [entry.strip() for entry in request.headers.get("x-forwarded-for", "").split(",")]
+        forwarded = [entry for entry in forwarded if entry]
+        if len(forwarded) >= trusted_hops:
+            return forwarded[-trusted_hops]
+    return request.client.host if request.client else "unknown"
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Garbage collector for orphaned uploads.
+
+Files nobody references any more (logos and gallery images of deleted
+artists, replaced uploads whose removal failed) are found by streaming every
+logo_url / gallery_urls from artist_profiles into a set of storage keys and
+walking the upload storage. An unreferenced file older than the grace period
+is then, depending on the mode:
+
+  * dry-run    - only counted
+  * quarantine - moved under quarantine/<run timestamp>/ (restorable by moving
+                 it back, never served by /api/uploads); quarantined runs
+                 older than --quarantine-days are deleted
+  * delete     - deleted
+
+The grace period protects uploads whose profile update has not landed yet.
+Precompressed siblings (`file.png.br`, `file.png.gz`) live and die with their
+file. Every run returns a report with the bytes reclaimed.
+
+    python upload_gc.py                       # dry run, 24 h grace
+    python upload_gc.py --mode quarantine --grace-hours 48
+    python upload_gc.py --mode delete --json
+
+The API workers can also run it every UPLOAD_GC_INTERVAL_HOURS (see
+server.py); a lease in the job_leases collection makes one worker per interval
+do the work. Scheduled runs are off by default and, once enabled, stay in
+dry-run until UPLOAD_GC_MODE is set.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+# Add the backend directory to the Python path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pymongo.errors import DuplicateKeyError
+
+import projections
+from compression import PRECOMPRESSED_SUFFIXES
+from storage import QUARANTINE_PREFIX, key_from_url
+
+logger = logging.getLogger(__name__)
+
+MODES = ("dry-run", "quarantine", "delete")
+STAMP_FORMAT = "%Y%m%dT%H%M%SZ"
+
+
+async def referenced_keys(db) -> Set[str]:
+    """Storage keys of every file an artist profile points to"""
+    keys = set()
+    async for profile in db.artist_profiles.find({}, projections.PROFILE_FILES):
+        for url in [profile.get("logo_url")] + list(profile.get("gallery_urls") or []):
+            key = key_from_url(url) if url else None
+            if key:
+                keys.add(key)
+    return keys
+
+
+def owner_key(key: str) -> str:
+    """The file a precompressed sibling belongs to (the key itself otherwise)"""
+    for _, suffix in PRECOMPRESSED_SUFFIXES:
+        if key.endswith(suffix):
+            return key[:-len(suffix)]
+    return key
+
+
+def quarantine_stamp(key: str) -> Optional[datetime]:
+    stamp = key[len(QUARANTINE_PREFIX):].split("/", 1)[0]
+    try:
+        return datetime.strptime(stamp, STAMP_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+
+
+async def collect_garbage(
+    db,
+    storage,
+    grace: timedelta = timedelta(hours=24),
+    mode: str = "dry-run",
+    quarantine_retention: timedelta = timedelta(days=30),
+    now: Optional[datetime] = None,
+) -> Dict:
+    """Find unreferenced uploads older than `grace` and handle them according to `mode`"""
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    started = time.perf_counter()
+    now = now or datetime.now(timezone.utc)
+    quarantine_dir = f"{QUARANTINE_PREFIX}{now.strftime(STAMP_FORMAT)}/"
+    report = {
+        "mode": mode,
+        "grace_hours": grace.total_seconds() / 3600,
+        "scanned_files": 0,
+        "scanned_bytes": 0,
+        "referenced_files": 0,
+        "recent_files": 0,
+        "orphaned_files": 0,
+        "orphaned_bytes": 0,
+        "quarantined_files": 0,
+        "deleted_files": 0,
+        "purged_quarantine_files": 0,
+        "reclaimed_bytes": 0,
+        "errors": 0,
+    }
+
+    referenced = await referenced_keys(db)
+    cutoff = now - grace
+    async for info in storage.list_files():
+        if info.key.startswith(QUARANTINE_PREFIX):
+            stamp = quarantine_stamp(info.key)
+            if mode != "dry-run" and stamp is not None and stamp < now - quarantine_retention:
+                if await _delete(storage, info.key, report):
+                    report["purged_quarantine_files"] += 1
+                    report["reclaimed_bytes"] += info.size
+            continue
+
+        report["scanned_files"] += 1
+        report["scanned_bytes"] += info.size
+        if owner_key(info.key) in referenced:
+            report["referenced_files"] += 1
+            continue
+        if info.modified > cutoff:
+            report["recent_files"] += 1
+            continue
+
+        report["orphaned_files"] += 1
+        report["orphaned_bytes"] += info.size
+        if mode == "delete":
+            if await _delete(storage, info.key, report):
+                report["deleted_files"] += 1
+                report["reclaimed_bytes"] += info.size
+        elif mode == "quarantine":
+            try:
+                if await storage.move(info.key, quarantine_dir + info.key):
+                    report["quarantined_files"] += 1
+            except Exception as error:
+                report["errors"] += 1
+                logger.warning("Upload GC could not quarantine %s: %s", info.key, error)
+
+    report["duration_seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+async def _delete(storage, key: str, report: Dict) -> bool:
+    try:
+        return await storage.delete(key)
+    except Exception as error:
+        report["errors"] += 1
+        logger.warning("Upload GC could not delete %s: %s", key, error)
+        return False
+
+
+async def acquire_lease(collection, name: str, duration: timedelta) -> bool:
+    """Take the named lease unless another holder's lease is still running"""
+    now = datetime.now(timezone.utc)
+    try:
+        # Matches only an expired lease; with a live one the upsert hits the _id and fails
+        await collection.update_one(
+            {"_id": name, "expires_at": {"$lte": now}},
+            {"$set": {"expires_at": now + duration, "holder": os.getpid(), "acquired_at": now}},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        return False
+    return True
+
+
+async def run_periodically(db, storage, interval: timedelta, on_report=None, **options):
+    """Run collect_garbage every `interval`, once per interval across all workers"""
+    while True:
+        try:
+            if await acquire_lease(db.job_leases, "upload_gc", interval):
+                report = await collect_garbage(db, storage, **options)
+                logger.info(
+                    "Upload GC (%s): %d orphaned of %d files, %d bytes reclaimed",
+                    report["mode"], report["orphaned_files"], report["scanned_files"], report["reclaimed_bytes"],
+                )
+                if on_report:
+                    on_report(report)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Upload GC run failed")
+        await asyncio.sleep(interval.total_seconds())
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=MODES, default="dry-run")
+    parser.add_argument("--grace-hours", type=float, default=24, help="keep unreferenced files younger than this")
+    parser.add_argument("--quarantine-days", type=float, default=30, help="delete quarantined files after this")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    from settings import Settings
+    from storage import create_storage
+
+    load_dotenv(Path(__file__).parent / ".env")
+    settings = Settings.from_env()
+    client = AsyncIOMotorClient(settings.mongo_url, **settings.mongo_client_options())
+    db = client[settings.db_name]
+    try:
+        report = await collect_garbage(
+            db,
+            create_storage(settings, db),
+            grace=timedelta(hours=args.grace_hours),
+            mode=args.mode,
+            quarantine_retention=timedelta(days=args.quarantine_days),
+        )
+    finally:
+        client.close()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"🧹 Upload GC ({report['mode']}, grace {args.grace_hours:g} h)")
+    print(f"   Scanned: {report['scanned_files']} files, {report['scanned_bytes']} bytes")
+    print(f"   Referenced: {report['referenced_files']}, too recent: {report['recent_files']}")
+    print(f"   Orphaned: {report['orphaned_files']} files, {report['orphaned_bytes']} bytes")
+    print(f"   Quarantined: {report['quarantined_files']}, deleted: {report['deleted_files']}, "
+          f"purged from quarantine: {report['purged_quarantine_files']}")
+    print(f"✅ Reclaimed {report['reclaimed_bytes']} bytes ({report['errors']} errors)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
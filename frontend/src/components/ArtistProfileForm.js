@@ -134,17 +134,20 @@ const ArtistProfileForm = ({ profile, onProfileUpdate }) => {
       return;
     }
 
+    const imageUrl = profile.gallery_urls[index];
     try {
-      await axios.delete(`/profile/remove-gallery/${index}`);
+      // The server only removes the image if it is still at this position
+      await axios.delete(`/profile/remove-gallery/${index}`, { params: { expected_url: imageUrl } });
       
       // Update profile by removing the image
-      const updatedGallery = profile.gallery_urls.filter((_, i) => i !== index);
+      const updatedGallery = profile.gallery_urls.filter((url) => url !== imageUrl);
       const updatedProfile = { ...profile, gallery_urls: updatedGallery };
       onProfileUpdate(updatedProfile);
       toast.success('Image supprimée de la galerie');
     } catch (error) {
       console.error('Error removing gallery image:', error);
-      toast.error('Erreur lors de la suppression de l\'image');
+      const message = error.response?.data?.detail || 'Erreur lors de la suppression de l\'image';
+      toast.error(message);
     }
   };
 
@@ -16,6 +16,7 @@ import {
 } from 'lucide-react';
 import moment from 'moment';
 import axios from 'axios';
+import { getAllPages } from '../lib/pagination';
 import { toast } from 'sonner';
 
 const BlockedDatesManager = ({ onBlockedDatesChange }) => {
@@ -39,12 +40,12 @@ const BlockedDatesManager = ({ onBlockedDatesChange }) => {
       const startDate = moment().startOf('year').format('YYYY-MM-DD');
       const endDate = moment().add(2, 'years').endOf('year').format('YYYY-MM-DD');
       
-      const response = await axios.get(`/blocked-dates?start_date=${startDate}&end_date=${endDate}`);
-      setBlockedDates(response.data);
+      const newBlockedDates = await getAllPages(`/blocked-dates?start_date=${startDate}&end_date=${endDate}`);
+      setBlockedDates(newBlockedDates);
       
       // Notify parent component of changes
       if (onBlockedDatesChange) {
-        onBlockedDatesChange(response.data);
+        onBlockedDatesChange(newBlockedDates);
       }
     } catch (error) {
       console.error('Error loading blocked dates:', error);
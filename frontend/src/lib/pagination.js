@@ -0,0 +1,21 @@
+import axios from 'axios';
+
+// List endpoints are cursor-paginated: the next page token comes back in the
+// X-Next-Cursor header (axios exposes header names in lower case).
+const NEXT_CURSOR_HEADER = 'x-next-cursor';
+
+export async function getRemainingPages(url, cursor) {
+  const items = [];
+  while (cursor) {
+    const response = await axios.get(url, { params: { cursor } });
+    items.push(...response.data);
+    cursor = response.headers[NEXT_CURSOR_HEADER] || null;
+  }
+  return items;
+}
+
+export async function getAllPages(url) {
+  const response = await axios.get(url);
+  const rest = await getRemainingPages(url, response.headers[NEXT_CURSOR_HEADER] || null);
+  return [...response.data, ...rest];
+}
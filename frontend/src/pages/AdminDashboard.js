@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
@@ -35,6 +35,7 @@ import { Calendar as BigCalendar, momentLocalizer } from 'react-big-calendar';
 import 'react-big-calendar/lib/css/react-big-calendar.css';
 import '../calendar-colors.css';
 import axios from 'axios';
+import { getAllPages, getRemainingPages } from '../lib/pagination';
 import { toast } from 'sonner';
 import ArtistDetailModal from '../components/ArtistDetailModal';
 import BlockedDatesManager from '../components/BlockedDatesManager';
@@ -63,6 +64,8 @@ const AdminDashboard = ({ user, onLogout }) => {
   const [selectedEventForCategory, setSelectedEventForCategory] = useState(null);
   const [artistSearchFilter, setArtistSearchFilter] = useState('');
   const [categoryFilter, setCategoryFilter] = useState('all');
+  // Month of the latest dashboard request, so a slow response for a month the user already left is dropped
+  const requestedMonth = useRef(null);
 
   useEffect(() => {
     loadData();
@@ -70,19 +73,12 @@ const AdminDashboard = ({ user, onLogout }) => {
 
   const loadData = async () => {
     try {
-      // Load base data in parallel
+      // Load invitations and the dashboard snapshot (artists, availabilities, blocked dates) in parallel
       await Promise.all([
-        loadArtists(),
+        loadDashboard(),
         loadInvitations()
       ]);
       
-      // Load calendar data sequentially to ensure proper updating
-      const availabilityData = await loadAvailabilityDays();
-      const blockedData = await loadBlockedDates();
-      
-      // Final update with both datasets
-      updateCalendarEvents(availabilityData, blockedData);
-      
     } catch (error) {
       console.error('Error loading data:', error);
     } finally {
@@ -90,55 +86,32 @@ const AdminDashboard = ({ user, onLogout }) => {
     }
   };
 
-  const loadArtists = async () => {
-    try {
-      const response = await axios.get('/artists');
-      setArtists(response.data);
-    } catch (error) {
-      console.error('Error loading artists:', error);
-      toast.error('Erreur lors du chargement des artistes');
-    }
-  };
-
-  const loadAvailabilityDays = async () => {
+  const loadDashboard = async (date = currentDate) => {
+    const month = moment(date).format('YYYY-MM');
+    requestedMonth.current = month;
     try {
-      // Load availability days for extended period (2 years back and 3 years forward)
-      const startDate = moment().subtract(1, 'years').startOf('year').format('YYYY-MM-DD');
-      const endDate = moment().add(3, 'years').endOf('year').format('YYYY-MM-DD');
+      // Artists plus the visible month's availabilities and blocked dates in one request
+      const response = await axios.get(`/admin/dashboard?month=${month}`);
+      const { start_date: startDate, end_date: endDate, next_cursors: nextCursors } = response.data;
       
-      // Add cache busting parameter to force refresh
-      const timestamp = Date.now();
-      const response = await axios.get(`/availability-days?start_date=${startDate}&end_date=${endDate}&_t=${timestamp}`);
-      const newAvailabilityDays = response.data;
+      // Sections larger than one page continue through the regular list endpoints
+      const [moreArtists, moreAvailabilityDays, moreBlockedDates] = await Promise.all([
+        getRemainingPages('/artists/summary', nextCursors.artists),
+        getRemainingPages(`/availability-days?start_date=${startDate}&end_date=${endDate}`, nextCursors.availability_days),
+        getRemainingPages(`/blocked-dates?start_date=${startDate}&end_date=${endDate}`, nextCursors.blocked_dates)
+      ]);
+      if (requestedMonth.current !== month) {
+        return;
+      }
+      const newAvailabilityDays = [...response.data.availability_days, ...moreAvailabilityDays];
+      const newBlockedDates = [...response.data.blocked_dates, ...moreBlockedDates];
+      setArtists([...response.data.artists, ...moreArtists]);
       setAvailabilityDays(newAvailabilityDays);
-      
-      // Update calendar with current blocked dates and new availability data
-      updateCalendarEvents(newAvailabilityDays, blockedDates);
-      return newAvailabilityDays;
-    } catch (error) {
-      console.error('Error loading availability days:', error);
-      toast.error('Erreur lors du chargement des disponibilités');
-      return [];
-    }
-  };
-
-  const loadBlockedDates = async () => {
-    try {
-      // Load blocked dates for extended period (2 years back and 3 years forward)
-      const startDate = moment().subtract(1, 'years').startOf('year').format('YYYY-MM-DD');
-      const endDate = moment().add(3, 'years').endOf('year').format('YYYY-MM-DD');
-      
-      const response = await axios.get(`/blocked-dates?start_date=${startDate}&end_date=${endDate}`);
-      const newBlockedDates = response.data;
       setBlockedDates(newBlockedDates);
-      
-      // Update calendar with current availability data and new blocked dates
-      updateCalendarEvents(availabilityDays, newBlockedDates);
-      return newBlockedDates;
+      updateCalendarEvents(newAvailabilityDays, newBlockedDates);
     } catch (error) {
-      console.error('Error loading blocked dates:', error);
-      toast.error('Erreur lors du chargement des dates bloquées');
-      return [];
+      console.error('Error loading dashboard:', error);
+      toast.error('Erreur lors du chargement du tableau de bord');
     }
   };
 
@@ -239,8 +212,7 @@ const AdminDashboard = ({ user, onLogout }) => {
 
   const loadInvitations = async () => {
     try {
-      const response = await axios.get('/invitations');
-      setInvitations(response.data);
+      setInvitations(await getAllPages('/invitations'));
     } catch (error) {
       console.error('Error loading invitations:', error);
     }
@@ -283,9 +255,8 @@ const AdminDashboard = ({ user, onLogout }) => {
         toast.success(`${deleted_availabilities} disponibilité(s) supprimée(s)`);
       }
       
-      // Reload data
-      loadArtists();
-      loadAvailabilityDays();
+      // Reload artists and the visible month
+      loadDashboard();
     } catch (error) {
       console.error('Error deleting artist:', error);
       const message = error.response?.data?.detail || 'Erreur lors de la suppression de l\'artiste';
@@ -322,8 +293,7 @@ const AdminDashboard = ({ user, onLogout }) => {
 
   const loadAvailableArtistsForDate = async (dateStr) => {
     try {
-      const response = await axios.get(`/availability-days/${dateStr}`);
-      setAvailableArtists(response.data);
+      setAvailableArtists(await getAllPages(`/availability-days/${dateStr}/summary`));
     } catch (error) {
       console.error('Error loading available artists:', error);
       setAvailableArtists([]);
@@ -358,12 +328,8 @@ const AdminDashboard = ({ user, onLogout }) => {
       setShowCategoryModal(false);
       setSelectedEventForCategory(null);
       
-      // Force complete data reload to ensure colors update
-      setTimeout(async () => {
-        const freshAvailabilityData = await loadAvailabilityDays();
-        const freshBlockedData = await loadBlockedDates();
-        updateCalendarEvents(freshAvailabilityData, freshBlockedData);
-      }, 100);
+      // Reload the visible month so the event colors follow the new category
+      await loadDashboard();
       
     } catch (error) {
       console.error('Error updating category:', error);
@@ -372,37 +338,12 @@ const AdminDashboard = ({ user, onLogout }) => {
     }
   };
 
-  const refreshCalendarData = async () => {
-    try {
-      // Force reload with timestamp to bypass any cache
-      const timestamp = Date.now();
-      
-      const availabilityData = await loadAvailabilityDays();
-      const blockedData = await loadBlockedDates();
-      updateCalendarEvents(availabilityData, blockedData);
-      
-      // Force a second refresh after short delay to ensure fresh data
-      setTimeout(async () => {
-        try {
-          const freshAvailabilityData = await loadAvailabilityDays();
-          const freshBlockedData = await loadBlockedDates();
-          updateCalendarEvents(freshAvailabilityData, freshBlockedData);
-        } catch (error) {
-          console.error('Error in delayed refresh:', error);
-        }
-      }, 500);
-      
-    } catch (error) {
-      console.error('Error refreshing calendar data:', error);
-    }
-  };
+  const refreshCalendarData = () => loadDashboard(currentDate);
 
   const handleNavigate = (newDate) => {
     setCurrentDate(newDate);
-    // Refresh data when navigating to ensure all events are visible
-    if (Math.abs(moment(newDate).diff(moment(), 'months')) > 1) {
-      refreshCalendarData();
-    }
+    // Only the visible month is loaded, so every navigation fetches its snapshot
+    loadDashboard(newDate);
   };
 
   const handleSelectEvent = (event) => {
@@ -1184,8 +1125,7 @@ const AdminDashboard = ({ user, onLogout }) => {
           setSelectedArtistId(null);
         }}
         onArtistUpdated={() => {
-          // Reload both artists list and calendar data when artist is updated
-          loadArtists();
+          // The dashboard snapshot reloads both the artists list and the calendar
           refreshCalendarData();
         }}
       />
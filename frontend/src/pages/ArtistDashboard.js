@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from '../components/ui/card';
 import { Button } from '../components/ui/button';
 import { Input } from '../components/ui/input';
@@ -12,6 +12,7 @@ import moment from 'moment';
 import 'moment/locale/fr';
 import 'react-big-calendar/lib/css/react-big-calendar.css';
 import axios from 'axios';
+import { getRemainingPages } from '../lib/pagination';
 import { toast } from 'sonner';
 import ArtistProfileForm from '../components/ArtistProfileForm';
 
@@ -30,6 +31,8 @@ const ArtistDashboard = ({ user, onLogout }) => {
   const [selectedDate, setSelectedDate] = useState(null);
   const [dayNote, setDayNote] = useState('');
   const [currentDate, setCurrentDate] = useState(new Date());
+  // Month of the latest dashboard request, so a slow response for a month the user already left is dropped
+  const requestedMonth = useRef(null);
 
   useEffect(() => {
     loadData();
@@ -37,14 +40,8 @@ const ArtistDashboard = ({ user, onLogout }) => {
 
   const loadData = async () => {
     try {
-      await loadProfile();
-      
-      // Load calendar data sequentially
-      const availabilityData = await loadAvailabilityDays();
-      const blockedData = await loadBlockedDates();
-      
-      // Final update with both datasets
-      updateCalendarEvents(availabilityData, blockedData);
+      // Profile, availability days and blocked dates in a single request
+      await loadDashboard();
       
     } catch (error) {
       console.error('Error loading data:', error);
@@ -53,50 +50,33 @@ const ArtistDashboard = ({ user, onLogout }) => {
     }
   };
 
-  const loadProfile = async () => {
-    try {
-      const response = await axios.get('/profile');
-      setProfile(response.data);
-    } catch (error) {
-      if (error.response?.status !== 404) {
-        console.error('Error loading profile:', error);
-      }
-    }
-  };
-
-  const loadAvailabilityDays = async () => {
+  const loadDashboard = async (date = currentDate) => {
+    const month = moment(date).format('YYYY-MM');
+    requestedMonth.current = month;
     try {
-      // Load availability days for the current year and next year
-      const startDate = moment().startOf('year').format('YYYY-MM-DD');
-      const endDate = moment().add(2, 'years').endOf('year').format('YYYY-MM-DD');
+      // Profile plus the visible month's availabilities and blocked dates in one request
+      const response = await axios.get(`/artist/dashboard?month=${month}`);
+      const { profile: newProfile, start_date: startDate, end_date: endDate, next_cursors: nextCursors } = response.data;
       
-      const response = await axios.get(`/availability-days?start_date=${startDate}&end_date=${endDate}`);
-      const newAvailabilityDays = response.data;
+      // Sections larger than one page continue through the regular list endpoints
+      const [moreAvailabilityDays, moreBlockedDates] = await Promise.all([
+        getRemainingPages(`/availability-days?start_date=${startDate}&end_date=${endDate}`, nextCursors.availability_days),
+        getRemainingPages(`/blocked-dates?start_date=${startDate}&end_date=${endDate}`, nextCursors.blocked_dates)
+      ]);
+      if (requestedMonth.current !== month) {
+        return;
+      }
+      const newAvailabilityDays = [...response.data.availability_days, ...moreAvailabilityDays];
+      const newBlockedDates = [...response.data.blocked_dates, ...moreBlockedDates];
+      if (newProfile) {
+        setProfile(newProfile);
+      }
       setAvailabilityDays(newAvailabilityDays);
-      
-      return newAvailabilityDays;
-    } catch (error) {
-      console.error('Error loading availability days:', error);
-      toast.error('Erreur lors du chargement des disponibilités');
-      return [];
-    }
-  };
-
-  const loadBlockedDates = async () => {
-    try {
-      // Load blocked dates for the same period
-      const startDate = moment().startOf('year').format('YYYY-MM-DD');
-      const endDate = moment().add(2, 'years').endOf('year').format('YYYY-MM-DD');
-      
-      const response = await axios.get(`/blocked-dates?start_date=${startDate}&end_date=${endDate}`);
-      const newBlockedDates = response.data;
       setBlockedDates(newBlockedDates);
-      
-      return newBlockedDates;
+      updateCalendarEvents(newAvailabilityDays, newBlockedDates);
     } catch (error) {
-      console.error('Error loading blocked dates:', error);
-      // Don't show error toast for blocked dates as it's not critical
-      return [];
+      console.error('Error loading dashboard:', error);
+      toast.error('Erreur lors du chargement des disponibilités');
     }
   };
 
@@ -150,7 +130,7 @@ const ArtistDashboard = ({ user, onLogout }) => {
         toast.success('Disponibilité supprimée');
       }
 
-      loadAvailabilityDays();
+      loadDashboard();
     } catch (error) {
       console.error('Error toggling availability:', error);
       const message = error.response?.data?.detail || 'Erreur lors de la modification';
@@ -175,6 +155,8 @@ const ArtistDashboard = ({ user, onLogout }) => {
 
   const handleNavigate = (newDate) => {
     setCurrentDate(newDate);
+    // Only the visible month is loaded, so every navigation fetches its snapshot
+    loadDashboard(newDate);
   };
 
   const handleDateClick = (date) => {
@@ -0,0 +1,134 @@
+"""
+Shared fixtures for the backend tests.
+
+The app runs in-process through httpx's ASGI transport, against a fresh
+mongomock-motor database per test. The lifespan (Mongo client, indexes,
+background tasks) never runs: tests install their database directly.
+
+    def test_something(app_db, admin_api):
+        asyncio.run(app_db.artist_profiles.insert_one({...}))
+        assert admin_api.get("/api/artists").status_code == 200
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "tests")
+
+ADMIN_EMAIL = "admin@tests.example.com"
+
+
+def _headers_for(email: str) -> Dict[str, str]:
+    import server
+
+    token = server.create_access_token({"sub": email}, server.app.state.settings.secret_key)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _asgi_client(**transport_options):
+    """httpx client serving requests from the app in-process"""
+    httpx = pytest.importorskip("httpx")
+    import server
+
+    transport = httpx.ASGITransport(app=server.app, **transport_options)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+@contextmanager
+def _serving(database):
+    """Serve the app from `database` for the duration of the block"""
+    import server
+
+    state = server.app.state
+    previous_db = state.db
+    state.db = database
+    try:
+        yield database
+    finally:
+        state.db = previous_db
+
+
+class ApiClient:
+    """Synchronous calls to the app; each request runs on its own event loop"""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None):
+        self.headers = headers or {}
+
+    def as_user(self, email: str) -> "ApiClient":
+        return ApiClient({**self.headers, **_headers_for(email)})
+
+    def request(self, method: str, url: str, headers: Optional[Dict[str, str]] = None, **kwargs):
+        headers = {**self.headers, **(headers or {})}
+
+        async def send():
+            async with _asgi_client() as client:
+                return await client.request(method, url, headers=headers, **kwargs)
+
+        return asyncio.run(send())
+
+    def get(self, url: str, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs):
+        return self.request("DELETE", url, **kwargs)
+
+
+@pytest.fixture(scope="session")
+def headers_for():
+    """headers_for(email): Authorization header of a bearer token for `email`"""
+    return _headers_for
+
+
+@pytest.fixture(scope="session")
+def asgi_client():
+    """asgi_client(): async httpx client of the app, for tests timing or batching their own requests"""
+    return _asgi_client
+
+
+@pytest.fixture(scope="session")
+def serving():
+    """`with serving(database):` installs a database as the app's for the block"""
+    return _serving
+
+
+@pytest.fixture
+def mongo_db():
+    """An empty mongomock-motor database"""
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    return mongomock_motor.AsyncMongoMockClient()["tests"]
+
+
+@pytest.fixture
+def app_db(mongo_db):
+    """`mongo_db`, installed as the app's database"""
+    with _serving(mongo_db):
+        yield mongo_db
+
+
+@pytest.fixture
+def api(app_db) -> ApiClient:
+    """Anonymous client of the app serving from `app_db`"""
+    return ApiClient()
+
+
+@pytest.fixture
+def admin_api(api, app_db) -> ApiClient:
+    """Client authenticated as an admin account seeded in `app_db`"""
+    asyncio.run(app_db.users.insert_one({"id": "admin", "email": ADMIN_EMAIL, "role": "admin", "password_hash": ""}))
+    return api.as_user(ADMIN_EMAIL)
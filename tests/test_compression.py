@@ -0,0 +1,134 @@
+"""
+Tests for response compression (backend/compression.py), driving
+CompressionMiddleware as a plain ASGI app and through the API.
+
+Run from the repository root:
+    python -m pytest tests/test_compression.py
+"""
+
+import asyncio
+import gzip
+import zlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from compression import CompressionMiddleware, CompressionStats, choose_encoding
+
+JSON = b"application/json"
+
+
+def asgi_app(chunks, content_type=JSON, headers=()):
+    """ASGI app answering with `chunks` as consecutive body messages"""
+
+    async def app(scope, receive, send):
+        raw_headers = [(b"content-type", content_type), *headers]
+        if len(chunks) == 1:
+            raw_headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": raw_headers})
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+def call(app, accept_encoding="gzip", **options):
+    """Run one request through CompressionMiddleware; returns (headers, body messages, stats)"""
+    stats = CompressionStats()
+    middleware = CompressionMiddleware(app, stats, **options)
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", accept_encoding.encode())]}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    start, *bodies = messages
+    headers = {key.decode(): value.decode() for key, value in start["headers"]}
+    return headers, bodies, stats
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate", "gzip"),
+    ("br;q=0, gzip;q=0.5", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("", None),
+])
+def test_encoding_negotiation(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_brotli_is_preferred_when_available():
+    brotli = pytest.importorskip("brotli")
+    body = b'{"rows": "' + b"x" * 4000 + b'"}'
+    headers, bodies, _ = call(asgi_app([body]), accept_encoding="gzip, br")
+    assert headers["content-encoding"] == "br"
+    assert brotli.decompress(bodies[0]["body"]) == body
+
+
+def test_bodies_below_the_threshold_pass_through():
+    body = b"[" + b"1," * 200 + b"1]"
+    headers, bodies, stats = call(asgi_app([body]), minimum_size=len(body) + 1)
+    assert "content-encoding" not in headers and headers["content-length"] == str(len(body))
+    assert [message["body"] for message in bodies] == [body]
+    assert stats.skipped["too_small"] == 1 and stats.encodings == {}
+
+    headers, bodies, stats = call(asgi_app([body]), minimum_size=len(body))
+    compressed = bodies[0]["body"]
+    assert headers["content-encoding"] == "gzip" and headers["content-length"] == str(len(compressed))
+    assert gzip.decompress(compressed) == body
+    assert stats.encodings["gzip"]["responses"] == 1
+    assert (stats.encodings["gzip"]["bytes_in"], stats.encodings["gzip"]["bytes_out"]) == (len(body), len(compressed))
+
+
+def test_vary_header_is_merged():
+    body = b"x" * 2048
+    headers, _, _ = call(asgi_app([body], headers=[(b"vary", b"Origin")]))
+    assert headers["vary"] == "Origin, Accept-Encoding"
+
+
+@pytest.mark.parametrize("accept_encoding, content_type, headers, reason", [
+    ("gzip", b"image/png", [], "content_type"),
+    ("gzip", JSON, [(b"content-encoding", b"gzip")], "already_encoded"),
+    ("identity", JSON, [], None),
+])
+def test_ineligible_responses_are_untouched(accept_encoding, content_type, headers, reason):
+    body = b"x" * 4096
+    response_headers, bodies, stats = call(asgi_app([body], content_type, headers), accept_encoding)
+    assert bodies[0]["body"] == body and "vary" not in response_headers
+    assert sum(stats.skipped.values()) == (1 if reason else 0)
+    if reason:
+        assert stats.skipped[reason] == 1
+
+
+def test_streamed_chunks_are_flushed_as_they_arrive():
+    chunks = [b"date,artist\n", b"2099-06-20,DJ Alpha\n" * 50, b"2099-06-21,DJ Bravo\n"]
+    headers, bodies, stats = call(asgi_app(chunks))
+    assert headers["content-encoding"] == "gzip" and "content-length" not in headers
+    assert [message["more_body"] for message in bodies] == [True, True, False]
+
+    # Each chunk decodes on its own as soon as it is received
+    decoder = zlib.decompressobj(31)
+    for chunk, message in zip(chunks, bodies):
+        assert decoder.decompress(message["body"]) == chunk
+    assert decoder.eof
+    assert stats.encodings["gzip"]["responses"] == 1
+    assert stats.encodings["gzip"]["bytes_in"] == sum(map(len, chunks))
+
+
+def test_api_responses_are_compressed(app_db, admin_api):
+    now = datetime(2099, 1, 1)
+    asyncio.run(app_db.invitations.insert_many([
+        {"id": f"inv-{number}", "email": f"guest{number}@tests.example.com", "token": f"token-{number}",
+         "status": "envoyée", "created_at": now, "expires_at": now + timedelta(days=7)}
+        for number in range(20)
+    ]))
+
+    response = admin_api.get("/api/invitations", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 20
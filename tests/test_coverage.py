@@ -0,0 +1,76 @@
+"""
+Tests for the coverage gap finder (backend/coverage.py and
+GET /api/admin/coverage-gaps), on mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_coverage.py
+"""
+
+import asyncio
+
+import pytest
+
+import coverage
+
+AVAILABILITY = {
+    # artist id: (category, available dates)
+    "dj1": ("DJ", ["2099-06-01", "2099-06-02", "2099-06-03"]),
+    "dj2": ("DJ", ["2099-06-01", "2099-06-03"]),
+    "band1": ("Groupe", ["2099-06-01", "2099-06-02"]),
+    "nocat": (None, ["2099-06-02"]),
+}
+BLOCKED = ["2099-06-03"]
+
+
+async def seed(db):
+    for artist_id, (category, dates) in AVAILABILITY.items():
+        await db.artist_profiles.insert_one({"user_id": artist_id, "nom_de_scene": artist_id, "category": category})
+        await db.availability_days.insert_many([
+            {"id": f"{artist_id}-{day}", "artist_id": artist_id, "date": day} for day in dates
+        ])
+    await db.blocked_dates.insert_many([{"id": day, "date": day} for day in BLOCKED])
+
+
+@pytest.fixture
+def coverage_gaps(app_db, admin_api):
+    asyncio.run(seed(app_db))
+    return lambda query: admin_api.get(f"/api/admin/coverage-gaps?{query}")
+
+
+def test_pipeline_returns_counts_per_date_and_category(app_db):
+    asyncio.run(seed(app_db))
+    pipeline = coverage.availability_by_category_pipeline("2099-06-01", "2099-06-03", ["DJ", "Groupe"])
+    rows = asyncio.run(app_db.availability_days.aggregate(pipeline).to_list(None))
+    assert sorted((row["_id"]["date"], row["_id"]["category"], row["artists"]) for row in rows) == [
+        ("2099-06-01", "DJ", 2), ("2099-06-01", "Groupe", 1),
+        ("2099-06-02", "DJ", 1), ("2099-06-02", "Groupe", 1),
+        ("2099-06-03", "DJ", 2),
+    ]
+    assert coverage.counts_by_date(rows)["2099-06-01"] == {"DJ": 2, "Groupe": 1}
+
+
+def test_gaps_per_category_include_empty_dates_and_skip_blocked(coverage_gaps):
+    response = coverage_gaps("start_date=2099-06-01&end_date=2099-06-04&min_artists=2")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["blocked_dates"] == BLOCKED and body["categories"] == ["DJ", "Groupe"]
+    assert body["gaps"] == [
+        {"date": "2099-06-01", "counts": {"DJ": 2, "Groupe": 1}, "missing": {"Groupe": 1}},
+        {"date": "2099-06-02", "counts": {"DJ": 1, "Groupe": 1}, "missing": {"DJ": 1, "Groupe": 1}},
+        # 06-03 is blocked; nobody is available on 06-04
+        {"date": "2099-06-04", "counts": {"DJ": 0, "Groupe": 0}, "missing": {"DJ": 2, "Groupe": 2}},
+    ]
+
+
+def test_single_category(coverage_gaps):
+    response = coverage_gaps("start_date=2099-06-01&end_date=2099-06-02&min_artists=2&category=DJ")
+    assert [gap["date"] for gap in response.json()["gaps"]] == ["2099-06-02"]
+
+
+@pytest.mark.parametrize("query", [
+    "start_date=2099-06-05&end_date=2099-06-01",
+    "start_date=2099-01-01&end_date=2100-06-01",
+    "start_date=06/01/2099",
+])
+def test_invalid_ranges_are_rejected(coverage_gaps, query):
+    assert coverage_gaps(query).status_code == 400
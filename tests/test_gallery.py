@@ -0,0 +1,174 @@
+"""
+Tests for the artist gallery endpoints (backend/server.py), against
+LocalStorage and mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_gallery.py
+"""
+
+import asyncio
+
+import pytest
+
+import server
+from storage import LocalStorage
+
+ARTIST_EMAIL = "artist@tests.example.com"
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+
+
+def stored_files(root):
+    return sorted(str(path.relative_to(root)) for path in root.rglob("*") if path.is_file())
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(server.app.state, "storage", storage)
+    return storage
+
+
+@pytest.fixture
+def gallery(app_db, api, storage):
+    """Seed an artist whose gallery holds `existing` images; returns (client, read current gallery)"""
+
+    def seed(existing):
+        asyncio.run(app_db.users.insert_one({"id": "a1", "email": ARTIST_EMAIL, "role": "artist", "password_hash": ""}))
+        asyncio.run(app_db.artist_profiles.insert_one({
+            "id": "p1", "user_id": "a1", "nom_de_scene": "DJ Alpha",
+            "gallery_urls": [f"/api/uploads/gallery/old-{number}.jpg" for number in range(existing)],
+        }))
+        return api.as_user(ARTIST_EMAIL)
+
+    def current():
+        return asyncio.run(app_db.artist_profiles.find_one({"user_id": "a1"}))["gallery_urls"]
+
+    return seed, current
+
+
+def upload(client, *names):
+    files = [("files", (name, PNG, "image/png")) for name in names]
+    return client.post("/api/profile/upload-gallery-multiple", files=files)
+
+
+def test_multiple_upload_appends_in_order(gallery, storage):
+    seed, current = gallery
+    client = seed(existing=2)
+
+    response = upload(client, "one.png", "two.jpg")
+    assert response.status_code == 200
+    new_urls = response.json()["image_urls"]
+    assert [url.rsplit(".", 1)[1] for url in new_urls] == ["png", "jpg"]
+    assert current() == response.json()["gallery_urls"] == [
+        "/api/uploads/gallery/old-0.jpg", "/api/uploads/gallery/old-1.jpg", *new_urls,
+    ]
+    assert stored_files(storage.root) == sorted(url.removeprefix("/api/uploads/") for url in new_urls)
+
+
+@pytest.mark.parametrize("existing, names", [
+    (4, ["one.png", "two.png"]),
+    (0, [f"{number}.png" for number in range(server.MAX_GALLERY_IMAGES + 1)]),
+    (0, ["one.png", "notes.pdf"]),
+])
+def test_rejected_batches_store_nothing(gallery, storage, existing, names):
+    seed, current = gallery
+    client = seed(existing)
+
+    assert upload(client, *names).status_code == 400
+    assert len(current()) == existing
+    assert stored_files(storage.root) == []
+
+
+def test_failed_file_rolls_back_the_batch(gallery, storage):
+    seed, current = gallery
+    client = seed(existing=0)
+
+    files = [
+        ("files", ("small.png", PNG, "image/png")),
+        ("files", ("huge.png", b"\x00" * (server.MAX_FILE_SIZE + 1), "image/png")),
+    ]
+    response = client.post("/api/profile/upload-gallery-multiple", files=files)
+    assert response.status_code == 400 and "volumineux" in response.json()["detail"]
+    assert current() == []
+    assert stored_files(storage.root) == []
+
+
+def test_gallery_filled_meanwhile_rolls_back_the_batch(gallery, storage, app_db, monkeypatch):
+    seed, current = gallery
+    client = seed(existing=2)
+    save = storage.save
+
+    async def save_while_another_tab_uploads(key, data, media_type):
+        # Another request fills the gallery between the room check and the append
+        await app_db.artist_profiles.update_one(
+            {"user_id": "a1"}, {"$push": {"gallery_urls": f"/api/uploads/gallery/other-{key[-8:]}"}}
+        )
+        await save(key, data, media_type)
+
+    monkeypatch.setattr(storage, "save", save_while_another_tab_uploads)
+
+    response = upload(client, "one.png", "two.png")
+    assert response.status_code == 400
+    # Only the other tab's images were added
+    gallery_urls = current()
+    assert len(gallery_urls) == 4 and all("/gallery/old-" in url or "/gallery/other-" in url for url in gallery_urls)
+    assert stored_files(storage.root) == []
+
+
+def test_multiple_upload_needs_a_profile(app_db, api, storage):
+    asyncio.run(app_db.users.insert_one({"id": "a1", "email": ARTIST_EMAIL, "role": "artist", "password_hash": ""}))
+    assert upload(api.as_user(ARTIST_EMAIL), "one.png").status_code == 404
+    assert stored_files(storage.root) == []
+
+
+def test_remove_checks_the_image_still_at_that_position(gallery, storage):
+    seed, current = gallery
+    client = seed(existing=3)
+    for url in current():
+        asyncio.run(storage.save(url.removeprefix("/api/uploads/"), PNG, "image/jpeg"))
+    first, second, third = current()
+
+    # Two tabs show the same gallery; the first removes image 0, shifting the others left
+    assert client.delete("/api/profile/remove-gallery/0", params={"expected_url": first}).status_code == 200
+    assert current() == [second, third]
+
+    # The second tab still thinks image 1 is `second`: nothing is removed
+    response = client.delete("/api/profile/remove-gallery/1", params={"expected_url": second})
+    assert response.status_code == 409
+    assert current() == [second, third]
+    assert stored_files(storage.root) == ["gallery/old-1.jpg", "gallery/old-2.jpg"]
+
+    assert client.delete("/api/profile/remove-gallery/9", params={"expected_url": third}).status_code == 400
+
+
+def test_remove_by_index_alone_still_works_for_older_clients(gallery, storage):
+    seed, current = gallery
+    client = seed(existing=3)
+    for url in current():
+        asyncio.run(storage.save(url.removeprefix("/api/uploads/"), PNG, "image/jpeg"))
+    first, second, third = current()
+
+    assert client.delete("/api/profile/remove-gallery/1").status_code == 200
+    assert current() == [first, third]
+    assert stored_files(storage.root) == ["gallery/old-0.jpg", "gallery/old-2.jpg"]
+    assert client.delete("/api/profile/remove-gallery/2").status_code == 400
+    assert current() == [first, third]
+
+
+def test_reorder_must_keep_the_same_images(gallery):
+    seed, current = gallery
+    client = seed(existing=3)
+    first, second, third = current()
+
+    response = client.put("/api/profile/gallery/order", json={"gallery_urls": [third, first, second]})
+    assert response.status_code == 200 and current() == [third, first, second]
+    assert client.put("/api/profile/gallery/order", json={"gallery_urls": [first, second]}).status_code == 409
+    assert client.put("/api/profile/gallery/order", json={"gallery_urls": []}).status_code == 409
+    assert current() == [third, first, second]
+
+
+def test_reordering_an_empty_gallery_is_a_no_op(gallery):
+    seed, current = gallery
+    client = seed(existing=0)
+    assert client.put("/api/profile/gallery/order", json={"gallery_urls": []}).status_code == 200
+    assert current() == []
@@ -0,0 +1,60 @@
+"""
+Tests for the synthetic data generator (backend/generate_data.py), on
+mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_generate_data.py
+"""
+
+import asyncio
+
+import pytest
+
+import generate_data
+import server
+
+DOMAIN = "gen.example.com"
+PASSWORD_HASH = server.get_pwd_context().hash("s3cret")
+
+
+@pytest.mark.parametrize("name, scratch", [
+    ("tests", True),
+    ("artists_loadtest", True),
+    ("benchmark", True),
+    ("scratch-2099", True),
+    ("artists", False),
+    ("artists_prod", False),
+    ("contest", False),
+])
+def test_scratch_database_names(name, scratch):
+    assert generate_data.is_scratch_database(name) is scratch
+
+
+def test_existing_data_is_kept_unless_wiping_a_scratch_database(mongo_db):
+    generate = lambda db, **options: asyncio.run(generate_data.generate(
+        db, artists=2, days_per_artist=1, blocked_dates=1, invitations=1, horizon_days=10,
+        password_hash=PASSWORD_HASH, domain=DOMAIN, **options,
+    ))
+    asyncio.run(mongo_db.users.insert_one({"id": "kept", "email": "kept@tests.example.com", "role": "admin"}))
+
+    generate(mongo_db)
+    assert asyncio.run(mongo_db.users.count_documents({})) == 4
+
+    production = mongo_db.client["artists"]
+    asyncio.run(production.users.insert_one({"id": "kept"}))
+    with pytest.raises(ValueError):
+        generate(production, wipe=True)
+    assert asyncio.run(production.users.count_documents({})) == 1
+
+    generate(mongo_db, wipe=True)
+    assert asyncio.run(mongo_db.users.find_one({"id": "kept"})) is None
+
+
+def test_generated_accounts_can_log_in(app_db, api):
+    asyncio.run(generate_data.generate(
+        app_db, artists=1, days_per_artist=1, blocked_dates=0, invitations=0, horizon_days=10,
+        password_hash=PASSWORD_HASH, domain=DOMAIN,
+    ))
+    for email in (generate_data.admin_email(DOMAIN), generate_data.artist_email(0, DOMAIN)):
+        response = api.post("/api/auth/login", json={"email": email, "password": "s3cret"})
+        assert response.status_code == 200, response.text
@@ -0,0 +1,49 @@
+"""
+Tests for the list endpoints that serialize database rows straight to JSON
+(rows_response in backend/server.py), on mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_list_responses.py
+"""
+
+import asyncio
+from datetime import datetime
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+import server
+
+MINIMAL_INVITATION = {
+    # Written before `status` existed
+    "id": "inv-1",
+    "email": "old@tests.example.com",
+    "token": "token-1",
+    "expires_at": datetime(2099, 1, 8, 12, 30, 0, 125000),
+    "created_at": datetime(2099, 1, 1, 12, 30),
+}
+
+
+def response_model_body(rows):
+    """What FastAPI would send for `rows` through response_model=List[Invitation]"""
+    adapter = TypeAdapter(List[server.Invitation])
+    return JSONResponse(adapter.dump_python(adapter.validate_python(rows), mode="json")).body
+
+
+def test_invitation_rows_match_the_response_model(app_db, admin_api):
+    accepted = {**MINIMAL_INVITATION, "id": "inv-2", "token": "token-2", "status": "acceptée",
+                "created_at": datetime(2099, 1, 2)}
+    asyncio.run(app_db.invitations.insert_many([{**MINIMAL_INVITATION}, {**accepted}]))
+
+    response = admin_api.get("/api/invitations?sort=created_at")
+    assert response.status_code == 200
+    assert response.json()[0]["status"] == "envoyée"
+    assert response.content == response_model_body([MINIMAL_INVITATION, accepted])
+
+
+def test_invitation_rows_keep_requested_fields_only(app_db, admin_api):
+    asyncio.run(app_db.invitations.insert_one({**MINIMAL_INVITATION}))
+
+    response = admin_api.get("/api/invitations?fields=status")
+    assert response.json() == [{"id": "inv-1", "status": "envoyée"}]
@@ -0,0 +1,56 @@
+"""
+Tests for the event-loop lag monitor (backend/loop_monitor.py), blocking a
+real event loop with time.sleep.
+
+Run from the repository root:
+    python -m pytest tests/test_loop_monitor.py
+"""
+
+import asyncio
+import logging
+import time
+
+from loop_monitor import LoopLagMonitor
+from metrics import Registry
+
+
+def block_the_loop(seconds):
+    time.sleep(seconds)  # synchronous: nothing else runs on the loop meanwhile
+
+
+def test_blocking_call_is_measured_and_attributed(caplog):
+    registry = Registry()
+    monitor = LoopLagMonitor(registry, interval=0.01, threshold=0.05)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+
+    with caplog.at_level(logging.WARNING, logger="loop_monitor"):
+        asyncio.run(scenario())
+
+    [series] = monitor.lag._values.values()
+    assert series[-1] >= 0.25  # sum of the observed lags
+    assert series[monitor.lag.buckets.index(0.5)] == 1  # the stall, in the (0.25, 0.5] bucket
+
+    [(site,)] = monitor.blocks._values
+    assert site.startswith("test_loop_monitor.py:block_the_loop:")
+    [warning] = [record.getMessage() for record in caplog.records]
+    assert f"at {site}" in warning and "time.sleep(seconds)" in warning
+    assert f'event_loop_blocks_total{{site="{site}"}} 1' in registry.render()
+    assert not monitor._watchdog.is_alive()
+
+
+def test_short_sleeps_are_not_reported():
+    monitor = LoopLagMonitor(Registry(), interval=0.01, threshold=0.2)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert monitor.lag._values and monitor.blocks._values == {}
@@ -0,0 +1,174 @@
+"""
+Tests for the in-memory matching index (backend/matching.py) and
+GET /api/matching, on mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_matching.py
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+import server
+from matching import MatchingIndex, record_removal
+from pricing import parse_tarif
+
+RECENT = datetime.now(timezone.utc) - timedelta(hours=1)
+SATURDAY = "2099-06-20"
+SUNDAY = "2099-06-21"
+ARTISTS = {
+    # id: (category, tarif, last update, available dates)
+    "cheap": ("DJ", "300 €", RECENT, [SATURDAY, SUNDAY]),
+    "pricey": ("DJ", "1 500 €", RECENT, [SATURDAY, SUNDAY]),
+    "idle": ("DJ", "300 €", RECENT - timedelta(days=365), [SATURDAY]),
+    "busy": ("DJ", "sur devis", RECENT, [SATURDAY] + [f"2099-07-{day:02d}" for day in range(1, 31)]),
+    "band": ("Groupe", "300 €", RECENT, [SATURDAY, SUNDAY]),
+    "past": ("DJ", "300 €", RECENT, ["2000-01-01"]),
+}
+
+
+async def seed(db):
+    for artist_id, (category, tarif, updated_at, dates) in ARTISTS.items():
+        await db.users.insert_one({"id": artist_id, "email": f"{artist_id}@matching.example.com", "role": "artist"})
+        await db.artist_profiles.insert_one({
+            "id": f"p-{artist_id}", "user_id": artist_id, "nom_de_scene": artist_id.title(), "category": category,
+            "tarif_soiree": tarif, **parse_tarif(tarif).fields(), "updated_at": updated_at,
+        })
+        await db.availability_days.insert_many([
+            {"id": f"d-{artist_id}-{day}", "artist_id": artist_id, "date": day, "created_at": updated_at}
+            for day in dates
+        ])
+
+
+def build(db) -> MatchingIndex:
+    index = MatchingIndex()
+    asyncio.run(index.rebuild(db, today=date(2099, 1, 1)))
+    return index
+
+
+@pytest.fixture
+def db(mongo_db):
+    asyncio.run(seed(mongo_db))
+    return mongo_db
+
+
+def test_ranking_filters_and_date_sets(db):
+    index = build(db)
+    assert "past" not in index.by_date.get("2000-01-01", set())
+
+    ranked = [row["id"] for row in index.match([SATURDAY], category="DJ", budget=1000)]
+    # Over budget drops out; recent activity and a full calendar rank first
+    assert ranked == ["busy", "cheap", "idle"]
+    assert [row["id"] for row in index.match([SATURDAY, SUNDAY], category="DJ")] == ["cheap", "pricey"]
+    assert [row["id"] for row in index.match([SATURDAY], limit=2)] == ["busy", "band"]
+    assert index.match(["2099-12-25"]) == []
+
+    row = index.match([SATURDAY, SUNDAY], category="Groupe")[0]
+    assert (row["email"], row["tarif_amount"], row["availability_count"]) == ("band@matching.example.com", 300.0, 2)
+    assert set(row["score_components"]) == {"price", "availability", "activity"}
+
+
+def test_hooks_and_incremental_refresh(db):
+    index = build(db)
+
+    index.set_available("idle", SUNDAY, True)
+    index.set_available("cheap", SUNDAY, False)
+    assert [row["id"] for row in index.match([SATURDAY, SUNDAY], category="DJ")] == ["idle", "pricey"]
+    index.remove_artist("pricey")
+    assert [row["id"] for row in index.match([SATURDAY, SUNDAY], category="DJ")] == ["idle"]
+
+    async def other_worker_writes():
+        now = datetime.now(timezone.utc)
+        await db.users.insert_one({"id": "new", "email": "new@matching.example.com", "role": "artist"})
+        await db.artist_profiles.insert_one({
+            "id": "p-new", "user_id": "new", "nom_de_scene": "New", "category": "DJ", "updated_at": now,
+        })
+        await db.availability_days.insert_one({"id": "d-new", "artist_id": "new", "date": SUNDAY, "created_at": now})
+        await db.artist_profiles.update_one({"user_id": "band"}, {"$set": {"category": "DJ", "updated_at": now}})
+        await index.refresh(db, today=date(2099, 1, 1))
+
+    asyncio.run(other_worker_writes())
+    assert {row["id"] for row in index.match([SUNDAY], category="DJ")} == {"idle", "new", "band"}
+    assert index.stats()["artists"] == len(ARTISTS)  # one removed, one added
+
+
+def test_blocked_dates_never_match(db):
+    asyncio.run(db.blocked_dates.insert_one({"id": "b1", "date": SUNDAY}))
+    index = build(db)
+    assert index.blocked == {SUNDAY} and SUNDAY not in index.by_date
+    assert index.match([SATURDAY, SUNDAY]) == []
+    assert index.artists["cheap"].dates == {SATURDAY}
+
+    index.set_available("cheap", SUNDAY, True)
+    assert index.match([SUNDAY]) == [] and index.artists["cheap"].dates == {SATURDAY}
+
+    index.block_date(SATURDAY)
+    assert index.match([SATURDAY]) == [] and index.artists["cheap"].dates == set()
+    index.unblock_date(SUNDAY)
+    index.set_available("cheap", SUNDAY, True)
+    assert [row["id"] for row in index.match([SUNDAY])] == ["cheap"]
+
+
+def test_refresh_applies_other_workers_removals(db):
+    index = build(db)
+
+    async def other_worker_writes():
+        # An availability removed, another removed then added back, an artist deleted, a date blocked
+        await db.availability_days.delete_one({"artist_id": "cheap", "date": SUNDAY})
+        await record_removal(db, "cheap", SUNDAY)
+        await db.availability_days.delete_one({"artist_id": "pricey", "date": SUNDAY})
+        await record_removal(db, "pricey", SUNDAY)
+        await db.availability_days.insert_one({
+            "id": "d-pricey-again", "artist_id": "pricey", "date": SUNDAY, "created_at": datetime.now(timezone.utc),
+        })
+        await db.availability_days.delete_many({"artist_id": "band"})
+        await record_removal(db, "band")
+        await db.blocked_dates.insert_one({"id": "b1", "date": SATURDAY})
+        await db.availability_days.delete_many({"date": SATURDAY})
+        await index.refresh(db, today=date(2099, 1, 1))
+
+    asyncio.run(other_worker_writes())
+    assert [row["id"] for row in index.match([SUNDAY])] == ["pricey"]
+    assert "band" not in index.artists
+    assert index.match([SATURDAY]) == [] and SATURDAY not in index.artists["busy"].dates
+
+    # Unblocking on another worker reaches this one too
+    asyncio.run(db.blocked_dates.delete_one({"id": "b1"}))
+    asyncio.run(index.refresh(db, today=date(2099, 1, 1)))
+    assert index.blocked == set()
+
+
+@pytest.fixture
+def fresh_index():
+    state = server.app.state
+    previous_index = state.matching_index
+    state.matching_index = MatchingIndex()
+    try:
+        yield state.matching_index
+    finally:
+        state.matching_index = previous_index
+
+
+def test_matching_endpoint(app_db, admin_api, fresh_index):
+    asyncio.run(seed(app_db))
+    assert admin_api.get(f"/api/matching?dates={SATURDAY}").status_code == 503
+
+    asyncio.run(fresh_index.rebuild(app_db, today=date(2099, 1, 1)))
+    response = admin_api.get(f"/api/matching?dates={SATURDAY},{SUNDAY}&category=DJ&budget=1000")
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == ["cheap"]
+
+    # The worker's own writes show up without a refresh
+    admin_api.delete(f"/api/availability-days/d-cheap-{SUNDAY}")
+    response = admin_api.get(f"/api/matching?dates={SATURDAY},{SUNDAY}&category=DJ")
+    assert [row["id"] for row in response.json()] == ["pricey"]
+    assert asyncio.run(app_db.matching_tombstones.count_documents({"artist_id": "cheap", "date": SUNDAY})) == 1
+
+    # Blocking a date deletes its availability from the index at once
+    assert admin_api.post("/api/blocked-dates", json={"date": SATURDAY}).status_code == 200
+    assert admin_api.get(f"/api/matching?dates={SATURDAY}").json() == []
+    assert fresh_index.artists["busy"].dates == {f"2099-07-{day:02d}" for day in range(1, 31)}
+
+    assert admin_api.get("/api/matching?dates=tomorrow").status_code == 400
@@ -0,0 +1,106 @@
+"""
+Tests for the Prometheus metrics (backend/metrics.py) and the /metrics scrape
+endpoint, on mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_metrics.py
+"""
+
+import asyncio
+from dataclasses import replace
+from types import SimpleNamespace
+
+import pytest
+
+import server
+from metrics import MongoCommandMetrics, Registry
+
+METRICS_TOKEN = "scrape-s3cret"
+
+
+def test_registry_renders_the_exposition_format():
+    registry = Registry()
+    requests = registry.counter("jobs_total", "Jobs by queue", ("queue",))
+    requests.inc('mail "bulk"')
+    requests.inc('mail "bulk"', amount=2)
+    latency = registry.histogram("job_seconds", "Job latency", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 3.0):
+        latency.observe(value=value)
+    registry.collector(lambda: [("queue_depth", "gauge", "Queued jobs", {"queue": "mail"}, 4)])
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs_total Jobs by queue",
+        "# TYPE jobs_total counter",
+        'jobs_total{queue="mail \\"bulk\\""} 3',
+        "# HELP job_seconds Job latency",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 1',
+        'job_seconds_bucket{le="1.0"} 2',
+        'job_seconds_bucket{le="+Inf"} 3',
+        "job_seconds_sum 3.55",
+        "job_seconds_count 3",
+        "# HELP queue_depth Queued jobs",
+        "# TYPE queue_depth gauge",
+        'queue_depth{queue="mail"} 4',
+    ]
+    assert registry.counter("jobs_total", "registered once") is requests
+
+
+def command_event(name, command, request_id, duration_micros=2000):
+    return SimpleNamespace(
+        command_name=name, command=command, request_id=request_id, operation_id=request_id,
+        duration_micros=duration_micros,
+    )
+
+
+def test_mongo_commands_are_counted_per_collection():
+    registry = Registry()
+    listener = MongoCommandMetrics(registry)
+    for request_id, (name, command) in enumerate([
+        ("find", {"find": "users", "filter": {}}),
+        ("getMore", {"getMore": 7, "collection": "users"}),
+        ("aggregate", {"aggregate": "availability_days", "pipeline": []}),
+    ]):
+        listener.started(command_event(name, command, request_id))
+        (listener.failed if name == "aggregate" else listener.succeeded)(command_event(name, command, request_id))
+
+    rendered = registry.render()
+    assert 'mongo_commands_total{collection="users",command="find",outcome="success"} 1' in rendered
+    assert 'mongo_commands_total{collection="users",command="getMore",outcome="success"} 1' in rendered
+    assert 'mongo_commands_total{collection="availability_days",command="aggregate",outcome="failure"} 1' in rendered
+    assert 'mongo_command_duration_seconds_sum{collection="users",command="find"} 0.002' in rendered
+    assert listener._collections == {}
+
+
+@pytest.fixture
+def metrics_api(mongo_db, asgi_client, headers_for, monkeypatch):
+    """get(url, **headers) against an app whose /metrics requires METRICS_TOKEN"""
+    app = server.create_app(replace(server.app.state.settings, metrics_token=METRICS_TOKEN))
+    app.state.db = mongo_db
+    monkeypatch.setattr(server, "app", app)  # served by asgi_client
+    asyncio.run(mongo_db.users.insert_one({"id": "admin", "email": "admin@tests.example.com", "role": "admin"}))
+
+    def get(url, **headers):
+        async def send():
+            async with asgi_client() as client:
+                return await client.get(url, headers=headers)
+
+        return asyncio.run(send())
+
+    get.admin_headers = headers_for("admin@tests.example.com")
+    return get
+
+
+def test_scrape_shows_route_templates_and_needs_the_token(metrics_api):
+    assert metrics_api("/api/availability-days/2099-06-01", **metrics_api.admin_headers).status_code == 200
+
+    assert metrics_api("/metrics").status_code == 401
+    assert metrics_api("/metrics", Authorization="Bearer wrong").status_code == 403
+
+    response = metrics_api("/metrics", Authorization=f"Bearer {METRICS_TOKEN}")
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    route = 'method="GET",route="/api/availability-days/{day_date}"'
+    assert f"http_request_duration_seconds_count{{{route}}} 1" in response.text
+    assert f'http_requests_total{{{route},status="200"}} 1' in response.text
+    assert "2099-06-01" not in response.text
+    assert 'http_requests_total{method="GET",route="/metrics",status="403"} 1' in response.text
@@ -0,0 +1,99 @@
+"""
+Tests for keyset pagination (backend/pagination.py) and the X-Next-Cursor
+round trip through the list endpoints, on mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_pagination.py
+"""
+
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import NEXT_CURSOR_HEADER, PageParams, decode_cursor, encode_cursor, keyset_query
+
+START = datetime(2099, 1, 1, 9, 0, 0, 250000)
+
+
+def test_cursor_round_trips_sort_value_and_id():
+    page = PageParams(sort_field="created_at", descending=True)
+    cursor = encode_cursor(page, {"id": "b", "created_at": START})
+    assert "=" not in cursor
+    assert decode_cursor(PageParams(cursor=cursor, sort_field="created_at", descending=True)) == (START, "b")
+
+    page = PageParams(sort_field="date")
+    cursor = encode_cursor(page, {"id": "x", "date": "2099-06-20"})
+    assert decode_cursor(PageParams(cursor=cursor, sort_field="date")) == ("2099-06-20", "x")
+
+
+def tampered(cursor: str, **changes) -> str:
+    payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    payload.update(changes)
+    for key in [key for key, value in changes.items() if value is None]:
+        del payload[key]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-base64!",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    tampered(encode_cursor(PageParams(sort_field="date"), {"id": "x", "date": "2099-06-20"}), s="-date"),
+    tampered(encode_cursor(PageParams(sort_field="date"), {"id": "x", "date": "2099-06-20"}), id=None),
+])
+def test_invalid_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(PageParams(cursor=cursor, sort_field="date"))
+    assert error.value.status_code == 400
+
+
+def test_keyset_query_starts_after_the_cursor():
+    page = PageParams(sort_field="date", descending=True)
+    page.cursor = encode_cursor(page, {"id": "x", "date": "2099-06-20"})
+    assert keyset_query({"artist_id": "a"}, page) == {"$and": [
+        {"artist_id": "a"},
+        {"$or": [{"date": {"$lt": "2099-06-20"}}, {"date": "2099-06-20", "id": {"$lt": "x"}}]},
+    ]}
+    assert keyset_query({}, PageParams()) == {}
+
+
+@pytest.fixture
+def invitations(app_db, admin_api):
+    # Pairs of invitations share a creation time, so ties are broken on id
+    asyncio.run(app_db.invitations.insert_many([
+        {
+            "id": f"inv-{number}", "email": f"guest{number}@tests.example.com", "token": f"token-{number}",
+            "status": "envoyée", "created_at": START + timedelta(hours=number // 2),
+            "expires_at": START + timedelta(days=7),
+        }
+        for number in range(7)
+    ]))
+
+    def all_pages(query):
+        ids, cursor, pages = [], "", 0
+        while True:
+            response = admin_api.get(f"/api/invitations?limit=2&{query}{cursor}")
+            assert response.status_code == 200
+            ids += [row["id"] for row in response.json()]
+            pages += 1
+            if NEXT_CURSOR_HEADER not in response.headers:
+                return ids, pages
+            cursor = f"&cursor={response.headers[NEXT_CURSOR_HEADER]}"
+
+    return all_pages
+
+
+def test_next_cursor_header_walks_every_row_once(invitations):
+    ids = [f"inv-{number}" for number in range(7)]
+    assert invitations("sort=created_at") == (ids, 4)
+    assert invitations("sort=-created_at") == (ids[::-1], 4)
+
+
+def test_tampered_cursor_is_a_bad_request(invitations, admin_api):
+    cursor = admin_api.get("/api/invitations?limit=2&sort=created_at").headers[NEXT_CURSOR_HEADER]
+    assert admin_api.get(f"/api/invitations?limit=2&sort=-created_at&cursor={cursor}").status_code == 400
+    assert admin_api.get(f"/api/invitations?limit=2&cursor={cursor[:-3]}").status_code == 400
+    assert admin_api.get("/api/invitations?sort=email").status_code == 400
@@ -0,0 +1,127 @@
+"""
+Tests for the structured price parsed from tarif_soiree (backend/pricing.py),
+its backfill (backend/backfill_tarifs.py) and the price filters and sort of
+the artist listings.
+
+Run from the repository root:
+    python -m pytest tests/test_pricing.py
+"""
+
+import asyncio
+
+import pytest
+
+from backfill_tarifs import backfill_tarifs
+from pagination import NEXT_CURSOR_HEADER
+from pricing import Tarif, parse_tarif
+
+DAY = "2099-06-20"
+TARIFS = {
+    # artist id: (tarif_soiree, available on DAY)
+    "a1": ("300 € / set", True),
+    "a2": ("1 200 €", True),
+    "a3": ("800€ la soirée", False),
+    "a4": ("sur devis", True),
+    "a5": ("150€/h", True),
+    "a6": ("sur demande", False),
+}
+# Profiles upserted by an admin category change have no `id` of their own
+WITHOUT_PROFILE_ID = {"a5", "a6"}
+
+
+@pytest.mark.parametrize("text,tarif", [
+    ("500 € / set", Tarif(500.0, "EUR", "set")),
+    ("1 200 €", Tarif(1200.0, "EUR", "soirée")),
+    ("1.200€ la soirée", Tarif(1200.0, "EUR", "soirée")),
+    ("1 500,50 €", Tarif(1500.5, "EUR", "soirée")),
+    ("1,5k€", Tarif(1500.0, "EUR", "soirée")),
+    ("150€/h", Tarif(150.0, "EUR", "heure")),
+    ("900 CHF la journée", Tarif(900.0, "CHF", "jour")),
+    ("$800 per night", Tarif(800.0, "USD", "soirée")),
+    ("800-1200 €", Tarif(800.0, "EUR", "soirée")),
+    ("sur devis", Tarif()),
+    (None, Tarif()),
+])
+def test_parse_tarif(text, tarif):
+    assert parse_tarif(text) == tarif
+
+
+def test_backfill_updates_only_stale_profiles(mongo_db):
+    async def scenario(db):
+        await db.artist_profiles.insert_many([
+            {"user_id": "a", "tarif_soiree": "500 € / set"},
+            {"user_id": "b", "tarif_soiree": "sur devis"},
+            {"user_id": "c", "tarif_soiree": "200 €", **parse_tarif("200 €").fields()},
+            {"user_id": "d", "tarif_soiree": "900 €", "tarif_amount": 100.0},  # stale
+        ])
+        report = await backfill_tarifs(db, batch_size=2, dry_run=True)
+        assert (report["scanned"], report["up_to_date"], report["updated"], report["unparsed"]) == (4, 1, 3, 1)
+        assert await db.artist_profiles.count_documents({"tarif_unit": {"$exists": True}}) == 1
+
+        report = await backfill_tarifs(db, batch_size=2)
+        assert (report["updated"], report["up_to_date"]) == (3, 1)
+        profiles = {p["user_id"]: p async for p in db.artist_profiles.find({}, {"_id": 0})}
+        assert (profiles["a"]["tarif_amount"], profiles["a"]["tarif_unit"]) == (500.0, "set")
+        assert profiles["b"]["tarif_amount"] is None and "tarif_currency" in profiles["b"]
+        assert profiles["d"]["tarif_amount"] == 900.0
+
+        assert (await backfill_tarifs(db))["updated"] == 0
+
+    asyncio.run(scenario(mongo_db))
+
+
+async def seed(db):
+    for artist_id, (tarif, available) in TARIFS.items():
+        await db.users.insert_one({"id": artist_id, "email": f"{artist_id}@pricing.example.com", "role": "artist"})
+        profile_id = {} if artist_id in WITHOUT_PROFILE_ID else {"id": f"p-{artist_id}"}
+        await db.artist_profiles.insert_one({
+            **profile_id, "user_id": artist_id, "nom_de_scene": artist_id.upper(),
+            "tarif_soiree": tarif, **parse_tarif(tarif).fields(),
+        })
+        if available:
+            await db.availability_days.insert_one({
+                "id": f"d-{artist_id}", "artist_id": artist_id, "date": DAY, "created_at": "2025-01-01",
+            })
+
+
+@pytest.fixture
+def ids(app_db, admin_api):
+    asyncio.run(seed(app_db))
+
+    def artist_ids(url):
+        response = admin_api.get(url)
+        assert response.status_code == 200, response.text
+        return [row["id"] for row in response.json()]
+
+    return artist_ids
+
+
+def test_listings_filter_and_sort_by_price(ids, admin_api):
+    # Unpriced profiles ("sur devis") come last in either direction
+    assert ids("/api/artists?sort=tarif_amount") == ["a5", "a1", "a3", "a2", "a4", "a6"]
+    assert ids("/api/artists/summary?sort=-tarif_amount") == ["a2", "a3", "a1", "a5", "a6", "a4"]
+    assert ids("/api/artists/search?sort=tarif_amount") == ["a5", "a1", "a3", "a2", "a4", "a6"]
+    # A price filter orders by price whatever the requested sort
+    assert ids("/api/artists?min_price=200&max_price=900") == ["a1", "a3"]
+    assert ids(f"/api/availability-days/{DAY}?max_price=1000") == ["a5", "a1"]
+    assert ids(f"/api/availability-days/{DAY}/summary?min_price=200") == ["a1", "a2"]
+
+    def all_pages(url):
+        seen, cursor = [], ""
+        while True:
+            response = admin_api.get(f"{url}{cursor}")
+            assert response.status_code == 200, response.text
+            seen += [row["id"] for row in response.json()]
+            if NEXT_CURSOR_HEADER not in response.headers:
+                return seen
+            cursor = f"&cursor={response.headers[NEXT_CURSOR_HEADER]}"
+
+    # Pages cross from priced to unpriced profiles, and cursors never need a profile id
+    for limit in (1, 2, 3, 4):
+        assert all_pages(f"/api/artists/summary?sort=tarif_amount&limit={limit}") == ["a5", "a1", "a3", "a2", "a4", "a6"]
+        assert all_pages(f"/api/artists?sort=-tarif_amount&limit={limit}") == ["a2", "a3", "a1", "a5", "a6", "a4"]
+    assert all_pages("/api/artists?min_price=100&limit=2") == ["a5", "a1", "a3", "a2"]
+
+    row = admin_api.get("/api/artists?min_price=250&max_price=350").json()[0]
+    assert (row["tarif_amount"], row["tarif_currency"], row["tarif_unit"]) == (300.0, "EUR", "set")
+    assert admin_api.get("/api/artists?min_price=900&max_price=100").status_code == 400
@@ -0,0 +1,126 @@
+"""
+Tests for on-demand request profiling (backend/profiling.py), driving
+ProfilingMiddleware as a plain ASGI app and through the API on
+mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_profiling.py
+"""
+
+import asyncio
+import time
+from dataclasses import replace
+
+import pytest
+
+import server
+from profiling import PROFILE_ID_HEADER, PROFILE_STATUS_HEADER, ProfileStore, ProfilingMiddleware
+
+ADMIN_EMAIL = "admin@tests.example.com"
+ARTIST_EMAIL = "artist@tests.example.com"
+
+
+def slow_app(seconds=0.05):
+    async def app(scope, receive, send):
+        time.sleep(seconds)  # a blocking handler, so the sampler sees it on the loop thread
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    return app
+
+
+class Authorize:
+    """authorize() stand-in counting its calls"""
+
+    def __init__(self, allowed=True):
+        self.allowed = allowed
+        self.calls = 0
+
+    async def __call__(self, request):
+        self.calls += 1
+        return self.allowed
+
+
+def call(middleware, profile=True):
+    """Run one GET through `middleware`; returns its response headers"""
+    headers = [(b"x-profile", b"1")] if profile else []
+    scope = {"type": "http", "method": "GET", "path": "/slow", "query_string": b"", "headers": headers}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    return {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+
+
+def test_flagged_request_is_sampled_into_a_folded_profile():
+    store = ProfileStore()
+    middleware = ProfilingMiddleware(slow_app(), store, Authorize(), sample_interval=0.001, min_interval=0)
+
+    headers = call(middleware)
+    profile = store.get(headers[PROFILE_ID_HEADER.lower()])
+    assert profile["path"] == "/slow" and profile["status"] == 200 and profile["samples"] > 0
+    stack, count = profile["folded"].splitlines()[0].rsplit(" ", 1)
+    assert "test_profiling.py:app:" in stack and int(count) > 0
+    assert "folded" not in store.list()[0]
+
+
+def test_rate_limited_flags_are_not_authorized():
+    authorize = Authorize()
+    middleware = ProfilingMiddleware(slow_app(0), ProfileStore(), authorize, min_interval=60)
+
+    assert PROFILE_ID_HEADER.lower() in call(middleware)
+    assert call(middleware)[PROFILE_STATUS_HEADER.lower()] == "rate-limited"
+    assert PROFILE_ID_HEADER.lower() not in call(middleware, profile=False)
+    assert authorize.calls == 1
+
+
+def test_refused_callers_are_served_without_a_profile():
+    store, authorize = ProfileStore(), Authorize(allowed=False)
+    middleware = ProfilingMiddleware(slow_app(0), store, authorize, min_interval=60)
+
+    headers = call(middleware)
+    assert PROFILE_ID_HEADER.lower() not in headers and PROFILE_STATUS_HEADER.lower() not in headers
+    assert store.list() == []
+    # A refused attempt still spends the interval: no authorization per flagged request
+    assert call(middleware)[PROFILE_STATUS_HEADER.lower()] == "rate-limited" and authorize.calls == 1
+
+
+@pytest.fixture
+def profiled_api(mongo_db, asgi_client, headers_for, monkeypatch):
+    """get(url, email) against an app profiling every flagged admin request"""
+    app = server.create_app(replace(server.app.state.settings, profile_min_interval_seconds=0))
+    app.state.db = mongo_db
+    monkeypatch.setattr(server, "app", app)  # served by asgi_client
+    asyncio.run(mongo_db.users.insert_many([
+        {"id": "admin", "email": ADMIN_EMAIL, "role": "admin", "password_hash": ""},
+        {"id": "a1", "email": ARTIST_EMAIL, "role": "artist", "password_hash": ""},
+    ]))
+
+    def get(url, email, **headers):
+        async def send():
+            async with asgi_client() as client:
+                return await client.get(url, headers={**headers_for(email), **headers})
+
+        return asyncio.run(send())
+
+    return get
+
+
+def test_only_admins_get_a_stored_flamegraph(profiled_api):
+    response = profiled_api("/api/auth/me", ARTIST_EMAIL, **{"X-Profile": "1"})
+    assert response.status_code == 200 and PROFILE_ID_HEADER not in response.headers
+    assert server.app.state.profile_store.list() == []
+
+    response = profiled_api("/api/auth/me", ADMIN_EMAIL, **{"X-Profile": "1"})
+    profile_id = response.headers[PROFILE_ID_HEADER]
+    [profile] = profiled_api("/api/admin/profiles", ADMIN_EMAIL).json()
+    assert (profile["id"], profile["path"], profile["status"]) == (profile_id, "/api/auth/me", 200)
+
+    download = profiled_api(f"/api/admin/profiles/{profile_id}", ADMIN_EMAIL)
+    assert download.status_code == 200 and download.text == server.app.state.profile_store.get(profile_id)["folded"]
+    assert profiled_api(f"/api/admin/profiles/{profile_id}", ARTIST_EMAIL).status_code == 403
@@ -0,0 +1,144 @@
+"""
+Query-count and latency budgets for the list and dashboard endpoints.
+
+Each endpoint declares how many Mongo commands one request may issue. The
+budget is asserted at 10, 100 and 1000 seeded artists, and the count must be
+the same at every size, so an N+1 pattern creeping back into a handler fails
+the build. Budgets include the `users` lookup done by get_current_user.
+
+The app runs in-process against mongomock-motor. mongomock never emits
+pymongo command events, so the test database is wrapped in a proxy that feeds
+every collection call into the request's query log (query_monitor); the count
+is then read back from the Server-Timing header like in production. Cursor
+getMore round trips are not counted.
+
+Run from the repository root:
+    python -m pytest tests/test_query_budgets.py
+"""
+
+import asyncio
+import re
+import time
+
+import pytest
+
+from benchmarks.endpoints import ADMIN_EMAIL, seed
+from query_monitor import command_filter, current_query_log, filter_shape
+
+ARTIST_COUNTS = (10, 100, 1000)
+DAYS_PER_ARTIST = 3
+
+# Collection methods that send one command to the server
+MONGO_COMMANDS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+    "aggregate", "count_documents", "estimated_document_count", "distinct",
+    "insert_one", "insert_many", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "bulk_write",
+}
+
+# (name, url, max queries, max latency in ms at the largest size)
+BUDGETS = [
+    ("artists", "/api/artists", 4, 3000),
+    ("artists_summary", "/api/artists/summary", 3, 3000),
+    ("month", "/api/availability-days?start_date={month_start}&end_date={month_end}", 4, 3000),
+    ("date_popup", "/api/availability-days/{day}", 4, 3000),
+    ("date_popup_summary", "/api/availability-days/{day}/summary", 4, 3000),
+    ("artists_by_price", "/api/artists?min_price=200&max_price=900&sort=tarif_amount", 4, 3000),
+    ("date_popup_by_price", "/api/availability-days/{day}/summary?max_price=800", 4, 3000),
+    ("artist_search", "/api/artists/search?category=DJ&min_price=200&available_on={day}", 4, 3000),
+    ("blocked_dates", "/api/blocked-dates", 2, 3000),
+    ("invitations", "/api/invitations", 2, 3000),
+    # mongomock runs $lookup as a scan of artist_profiles per artist (Mongo uses the user_id index)
+    ("coverage_gaps", "/api/admin/coverage-gaps?start_date={month_start}&end_date={month_end}&min_artists=3", 3, 5000),
+    ("admin_dashboard", "/api/admin/dashboard?month={month}", 7, 5000),
+]
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+class CountingCollection:
+    """Proxy recording each command-issuing call in the current request's query log"""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attribute = getattr(self._collection, name)
+        if name not in MONGO_COMMANDS:
+            return attribute
+
+        def counted(*args, **kwargs):
+            log = current_query_log.get()
+            if log is not None:
+                first = args[0] if args else kwargs.get("filter")
+                query = command_filter("aggregate", {"pipeline": first}) if name == "aggregate" else first
+                log.record(self._collection.name, name, filter_shape(query if isinstance(query, dict) else None), 0.0)
+            return attribute(*args, **kwargs)
+
+        return counted
+
+
+class CountingDatabase:
+    def __init__(self, database):
+        self._database = database
+
+    def __getattr__(self, name):
+        return CountingCollection(getattr(self._database, name))
+
+    def __getitem__(self, name):
+        return CountingCollection(self._database[name])
+
+
+async def measure_endpoints(database, artists: int, headers, asgi_client):
+    """{name: (queries, latency ms)} for every budgeted endpoint, served from `database` seeded with `artists`"""
+    open_days = await seed(database, artists, DAYS_PER_ARTIST, seed_value=7)
+    month_start = open_days[0].replace(day=1)
+    month_end = open_days[-1]
+    values = {
+        "month": month_start.strftime("%Y-%m"),
+        "month_start": month_start.isoformat(),
+        "month_end": month_end.isoformat(),
+        "day": open_days[0].isoformat(),
+    }
+
+    results = {}
+    async with asgi_client() as client:
+        for name, url, _, _ in BUDGETS:
+            start = time.perf_counter()
+            response = await client.get(url.format(**values), headers=headers)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            assert response.status_code == 200, f"{name}: {response.status_code} {response.text[:200]}"
+            queries = int(SERVER_TIMING_QUERIES.search(response.headers["server-timing"]).group(1))
+            results[name] = (queries, elapsed_ms)
+    return results
+
+
+@pytest.fixture(scope="module")
+def measurements(serving, headers_for, asgi_client):
+    mongomock_motor = pytest.importorskip("mongomock_motor")
+    headers = headers_for(ADMIN_EMAIL)
+    results = {}
+    for artists in ARTIST_COUNTS:
+        database = mongomock_motor.AsyncMongoMockClient()["query_budgets"]
+        with serving(CountingDatabase(database)):
+            results[artists] = asyncio.run(measure_endpoints(database, artists, headers, asgi_client))
+    return results
+
+
+@pytest.mark.parametrize("artists", ARTIST_COUNTS)
+@pytest.mark.parametrize("name,url,max_queries,max_ms", BUDGETS, ids=[budget[0] for budget in BUDGETS])
+def test_query_budget(measurements, artists, name, url, max_queries, max_ms):
+    queries, _ = measurements[artists][name]
+    assert queries <= max_queries, f"{url} issued {queries} queries with {artists} artists (budget {max_queries})"
+
+
+@pytest.mark.parametrize("name", [budget[0] for budget in BUDGETS])
+def test_query_count_independent_of_data_size(measurements, name):
+    counts = {artists: measurements[artists][name][0] for artists in ARTIST_COUNTS}
+    assert len(set(counts.values())) == 1, f"{name} query count grows with data size: {counts}"
+
+
+@pytest.mark.parametrize("name,url,max_queries,max_ms", BUDGETS, ids=[budget[0] for budget in BUDGETS])
+def test_latency_budget(measurements, name, url, max_queries, max_ms):
+    _, elapsed_ms = measurements[max(ARTIST_COUNTS)][name]
+    assert elapsed_ms <= max_ms, f"{url} took {elapsed_ms:.0f} ms with {max(ARTIST_COUNTS)} artists (budget {max_ms} ms)"
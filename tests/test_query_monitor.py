@@ -0,0 +1,100 @@
+"""
+Tests for per-request Mongo command monitoring (backend/query_monitor.py),
+feeding pymongo-style command events to QueryMonitorListener inside
+QueryMonitorMiddleware.
+
+Run from the repository root:
+    python -m pytest tests/test_query_monitor.py
+"""
+
+import asyncio
+import itertools
+import logging
+from types import SimpleNamespace
+
+from query_monitor import QueryMonitorListener, QueryMonitorMiddleware, filter_shape
+
+request_ids = itertools.count(1)
+
+
+def run_command(listener, name, command, duration_ms=1.0):
+    """One command as pymongo reports it: a started then a succeeded event"""
+    request_id = next(request_ids)
+    event = SimpleNamespace(
+        command_name=name, command=command, request_id=request_id, operation_id=request_id,
+        duration_micros=int(duration_ms * 1000),
+    )
+    listener.started(event)
+    listener.succeeded(event)
+
+
+def serve(middleware_options, commands):
+    """Serve one request whose handler issues `commands` (name, command, ms); returns (headers, N+1 callbacks)"""
+    listener = QueryMonitorListener(slow_query_ms=50)
+    reported = []
+
+    async def app(scope, receive, send):
+        for name, command, duration_ms in commands:
+            run_command(listener, name, command, duration_ms)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"[]"})
+
+    middleware = QueryMonitorMiddleware(
+        app, on_n_plus_one=lambda method, route: reported.append((method, route)), **middleware_options
+    )
+    scope = {"type": "http", "method": "GET", "path": "/api/artists", "headers": []}
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(middleware(scope, receive, send))
+    headers = {key.decode(): value.decode() for key, value in messages[0]["headers"]}
+    return headers, reported
+
+
+def test_filter_shape_hides_values_and_keeps_structure():
+    assert filter_shape({"user_id": "a1", "$or": [{"date": {"$gte": "2099-06-01"}}, {"id": "x"}]}) == (
+        '{"$or":[{"date":{"$gte":"?"}},{"id":"?"}],"user_id":"?"}'
+    )
+    assert filter_shape({"id": {"$in": ["a", "b", "c"]}}) == filter_shape({"id": {"$in": ["d"]}})
+    assert filter_shape(None) == "{}"
+
+
+def test_repeated_filter_shape_is_flagged_as_n_plus_one(caplog):
+    per_artist = [("find", {"find": "artist_profiles", "filter": {"user_id": f"a{n}"}}, 1.0) for n in range(4)]
+    batched = [("find", {"find": "users", "filter": {"role": "artist"}}, 2.0)]
+
+    with caplog.at_level(logging.WARNING, logger="query_monitor"):
+        headers, reported = serve({"n_plus_one_threshold": 3}, batched + per_artist)
+
+    assert 'db;dur=6.00;desc="5 queries"' in headers["server-timing"]
+    assert reported == [("GET", "/api/artists")]
+    [warning] = [record.getMessage() for record in caplog.records]
+    assert "Likely N+1 in GET /api/artists: 4 × find on artist_profiles" in warning
+    assert '{"user_id":"?"}' in warning and "a1" not in warning
+
+
+def test_commands_under_the_threshold_are_not_flagged(caplog):
+    commands = [("find", {"find": "artist_profiles", "filter": {"user_id": f"a{n}"}}, 1.0) for n in range(3)]
+    with caplog.at_level(logging.WARNING, logger="query_monitor"):
+        headers, reported = serve({"n_plus_one_threshold": 3}, commands)
+    assert 'desc="3 queries"' in headers["server-timing"]
+    assert reported == [] and caplog.records == []
+
+
+def test_slow_queries_are_logged_with_their_filter_shape(caplog):
+    slow = ("aggregate", {"aggregate": "availability_days", "pipeline": [{"$match": {"date": "2099-06-01"}}]}, 120.0)
+    with caplog.at_level(logging.WARNING, logger="query_monitor"):
+        serve({}, [slow])
+    [warning] = [record.getMessage() for record in caplog.records]
+    assert warning == 'Slow Mongo aggregate on availability_days: 120.0 ms, filter {"date":"?"}'
+
+
+def test_commands_outside_a_request_are_not_attributed():
+    listener = QueryMonitorListener()
+    run_command(listener, "find", {"find": "users", "filter": {"email": "x"}})
+    assert listener._pending == {}
@@ -0,0 +1,86 @@
+"""
+Tests for the artist search (backend/search.py and GET /api/artists/search).
+
+mongomock-motor does not implement $text, so ranked searches are checked on
+the pipeline they build; filters, ordering and cursors run end to end.
+
+Run from the repository root:
+    python -m pytest tests/test_search.py
+"""
+
+import asyncio
+
+import pytest
+
+from pagination import NEXT_CURSOR_HEADER, PageParams
+from pricing import parse_tarif, price_filter
+from search import resolve_sort, search_filter, search_pipeline
+
+DAY = "2099-06-20"
+ARTISTS = [
+    # (id, stage name, category, tarif, available on DAY)
+    ("a1", "DJ Alpha", "DJ", "300 € / set", True),
+    ("a2", "Bravo Band", "Groupe", "1 200 €", True),
+    ("a3", "DJ Charlie", "DJ", "800€", False),
+    ("a4", "DJ Delta", "DJ", "sur devis", True),
+    ("a5", "DJ Echo", "DJ", "550 €", True),
+]
+# Profiles upserted by an admin category change have no `id` of their own
+WITHOUT_PROFILE_ID = {"a3"}
+
+
+def test_ranked_pipeline_starts_with_text_match():
+    page = PageParams(limit=20, sort_field="score", descending=True)
+    query = search_filter("techno house", "DJ", price_filter(100, 500))
+    pipeline = search_pipeline(query, page, {"_id": 0})
+    assert pipeline[0] == {"$match": {
+        "$text": {"$search": "techno house"}, "category": "DJ", "tarif_amount": {"$gte": 100, "$lte": 500},
+    }}
+    assert pipeline[1] == {"$addFields": {"score": {"$meta": "textScore"}}}
+    assert pipeline[2] == {"$sort": {"score": -1, "user_id": -1}}
+    assert pipeline[3] == {"$limit": 21}
+
+
+def test_unranked_search_is_ordered_by_stage_name():
+    page = resolve_sort(PageParams(sort_field="score", descending=True), ranked=False)
+    assert (page.sort_field, page.descending) == ("nom_de_scene", False)
+    assert search_filter("  ", artist_ids=["a1"]) == {"user_id": {"$in": ["a1"]}}
+
+
+async def seed(db):
+    for artist_id, name, category, tarif, available in ARTISTS:
+        await db.users.insert_one({"id": artist_id, "email": f"{artist_id}@search.example.com", "role": "artist"})
+        profile_id = {} if artist_id in WITHOUT_PROFILE_ID else {"id": f"p-{artist_id}"}
+        await db.artist_profiles.insert_one({
+            **profile_id, "user_id": artist_id, "nom_de_scene": name, "category": category,
+            "tarif_soiree": tarif, "bio": "", **parse_tarif(tarif).fields(),
+        })
+        if available:
+            await db.availability_days.insert_one({"id": f"d-{artist_id}", "artist_id": artist_id, "date": DAY})
+
+
+@pytest.fixture
+def search(app_db, admin_api):
+    asyncio.run(seed(app_db))
+    return lambda query: admin_api.get(f"/api/artists/search?{query}")
+
+
+def test_search_filters_and_pages(search):
+    response = search(f"category=DJ&min_price=200&max_price=600&available_on={DAY}")
+    assert response.status_code == 200
+    assert [row["id"] for row in response.json()] == ["a1", "a5"]
+    assert response.json()[0]["tarif_amount"] == 300 and response.json()[0]["score"] is None
+
+    names = []
+    cursor = ""
+    while True:
+        response = search(f"category=DJ&limit=2{cursor}")
+        names += [row["nom_de_scene"] for row in response.json()]
+        if NEXT_CURSOR_HEADER not in response.headers:
+            break
+        cursor = f"&cursor={response.headers[NEXT_CURSOR_HEADER]}"
+    assert names == ["DJ Alpha", "DJ Charlie", "DJ Delta", "DJ Echo"]
+
+    assert search("available_on=2099-01-01").json() == []
+    assert search("min_price=500&max_price=100").status_code == 400
+    assert search("available_on=20-06-2099").status_code == 400
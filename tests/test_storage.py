@@ -0,0 +1,214 @@
+"""
+Contract tests for the upload storage backends (backend/storage.py).
+
+Every backend must store, stream back and delete files the same way. GridFS
+runs on mongomock-motor; S3 runs against an in-memory stand-in for the boto3
+client (point S3_ENDPOINT_URL at MinIO or moto to exercise the real one).
+CachedStorage, the LRU of small files in front of a backend, is tested on
+LocalStorage.
+
+Run from the repository root:
+    python -m pytest tests/test_storage.py
+"""
+
+import asyncio
+import io
+
+import pytest
+
+from storage import CachedStorage, GridFSStorage, LocalStorage, S3Storage, key_from_url, url_for
+
+
+class StandInS3Error(Exception):
+    def __init__(self, code: str):
+        super().__init__(code)
+        self.response = {"Error": {"Code": code}}
+
+
+class StandInBody:
+    def __init__(self, data: bytes):
+        self._stream = io.BytesIO(data)
+        self.closed = False
+
+    def read(self, amt=None):
+        return self._stream.read(amt)
+
+    def close(self):
+        self.closed = True
+
+
+class StandInS3Client:
+    """The subset of boto3's S3 client used by S3Storage, kept in a dict"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, ContentType):
+        self.objects[(Bucket, Key)] = (bytes(Body), ContentType)
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise StandInS3Error("404")
+        data, content_type = self.objects[(Bucket, Key)]
+        return {"ContentLength": len(data), "ContentType": content_type}
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise StandInS3Error("NoSuchKey")
+        return {"Body": StandInBody(self.objects[(Bucket, Key)][0])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+@pytest.fixture(params=["local", "gridfs", "s3"])
+def storage(request, tmp_path):
+    if request.param == "local":
+        return LocalStorage(tmp_path)
+    if request.param == "gridfs":
+        # Small chunks so that files span several of them
+        return GridFSStorage(request.getfixturevalue("mongo_db"), chunk_size=1000, read_batch=2)
+    return S3Storage("uploads-bucket", client=StandInS3Client())
+
+
+async def read_all(stored) -> bytes:
+    return b"".join([chunk async for chunk in stored.chunks])
+
+
+def test_save_open_delete(storage):
+    data = bytes(range(256)) * 300  # several chunks for every backend
+
+    async def scenario():
+        await storage.save("logos/a.png", data, "image/png")
+        stored = await storage.open("logos/a.png")
+        assert (stored.size, stored.media_type) == (len(data), "image/png")
+        assert await read_all(stored) == data
+
+        assert await storage.delete("logos/a.png") is True
+        assert await storage.open("logos/a.png") is None
+        assert await storage.delete("logos/a.png") is False
+
+    asyncio.run(scenario())
+
+
+def test_save_replaces_existing_file(storage):
+    async def scenario():
+        await storage.save("gallery/b.jpg", b"first version" * 200, "image/jpeg")
+        await storage.save("gallery/b.jpg", b"second", "image/jpeg")
+        assert await read_all(await storage.open("gallery/b.jpg")) == b"second"
+        assert await storage.delete("gallery/b.jpg") is True
+        assert await storage.open("gallery/b.jpg") is None
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("key", ["../secret", "/etc/passwd", "logos//a.png", "logos/./a.png", "", "a\\b"])
+def test_invalid_keys_are_rejected(storage, key):
+    async def scenario():
+        assert await storage.open(key) is None
+        assert await storage.delete(key) is False
+        with pytest.raises(ValueError):
+            await storage.save(key, b"x", "image/png")
+
+    asyncio.run(scenario())
+
+
+def test_upload_urls_round_trip():
+    assert url_for("logos/a.png") == "/api/uploads/logos/a.png"
+    assert key_from_url("/api/uploads/logos/a.png") == "logos/a.png"
+    assert key_from_url("/uploads/gallery/b.jpg") == "gallery/b.jpg"
+    assert key_from_url("https://example.com/a.png") is None
+
+
+def test_cache_serves_small_files_from_memory(tmp_path):
+    lookups = []
+    cache = CachedStorage(LocalStorage(tmp_path), max_bytes=10_000, max_file_bytes=1000, on_lookup=lookups.append)
+
+    async def scenario():
+        await cache.save("logos/a.png", b"a" * 500, "image/png")
+        await cache.save("logos/big.png", b"b" * 2000, "image/png")
+
+        first = await cache.open("logos/a.png")
+        (tmp_path / "logos" / "a.png").unlink()  # later reads must not touch the disk
+        second = await cache.open("logos/a.png")
+        assert second.content == b"a" * 500 and await read_all(second) == b"a" * 500
+        assert second.etag == first.etag and second.media_type == "image/png"
+
+        big = await cache.open("logos/big.png")
+        assert big.content is None and big.etag is None and await read_all(big) == b"b" * 2000
+        assert (cache.entries, cache.bytes) == (1, 500)
+
+    asyncio.run(scenario())
+    assert lookups == ["miss", "hit", "miss"]
+
+
+def test_cache_is_bounded_in_bytes_and_evicts_least_recently_used(tmp_path):
+    cache = CachedStorage(LocalStorage(tmp_path), max_bytes=1000, max_file_bytes=1000)
+
+    async def scenario():
+        for name in ("a", "b", "c"):
+            await cache.save(f"{name}.png", name.encode() * 400, "image/png")
+        await cache.open("a.png")
+        await cache.open("b.png")
+        await cache.open("a.png")  # b is now the least recently used
+        await cache.open("c.png")
+        assert cache.bytes <= 1000
+        assert list(cache._entries) == ["a.png", "c.png"]
+
+    asyncio.run(scenario())
+
+
+def test_cache_is_invalidated_by_save_and_delete(tmp_path):
+    cache = CachedStorage(LocalStorage(tmp_path), max_bytes=10_000, max_file_bytes=1000)
+
+    async def scenario():
+        await cache.save("a.png", b"old", "image/png")
+        assert (await cache.open("a.png")).content == b"old"
+        await cache.save("a.png", b"new", "image/png")
+        assert (await cache.open("a.png")).content == b"new"
+        assert await cache.delete("a.png") is True
+        assert await cache.open("a.png") is None
+        assert (cache.entries, cache.bytes) == (0, 0)
+
+    asyncio.run(scenario())
+
+
+def test_cache_entries_expire(tmp_path):
+    cache = CachedStorage(LocalStorage(tmp_path), max_bytes=10_000, max_file_bytes=1000, ttl=0)
+
+    async def scenario():
+        await cache.save("a.png", b"v1", "image/png")
+        await cache.open("a.png")
+        # Another node replaced the file behind this worker's back
+        await LocalStorage(tmp_path).save("a.png", b"v2", "image/png")
+        assert (await cache.open("a.png")).content == b"v2"
+
+    asyncio.run(scenario())
+
+
+def test_cache_remembers_missing_keys(tmp_path):
+    backend, lookups, opened = LocalStorage(tmp_path), [], []
+    backend_open = backend.open
+
+    async def counting_open(key):
+        opened.append(key)
+        return await backend_open(key)
+
+    backend.open = counting_open
+    cache = CachedStorage(backend, max_bytes=10_000, max_file_bytes=1000, on_lookup=lookups.append, max_missing=2)
+
+    async def scenario():
+        # A precompressed sibling nobody made, probed on every request for the image
+        assert await cache.open("logos/a.png.br") is None
+        assert await cache.open("logos/a.png.br") is None
+        assert (opened, lookups) == (["logos/a.png.br"], ["miss", "hit"])
+
+        await cache.save("logos/a.png.br", b"br", "image/png")
+        assert (await cache.open("logos/a.png.br")).content == b"br"
+
+        # Bounded: the least recently probed missing key is forgotten first
+        for key in ("x.png", "y.png", "z.png"):
+            await cache.open(key)
+        assert list(cache._missing) == ["y.png", "z.png"]
+
+    asyncio.run(scenario())
@@ -0,0 +1,197 @@
+"""
+Tests for login throttling and the bcrypt pool (backend/throttle.py) and
+POST /api/auth/login, on mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_throttle.py
+"""
+
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+import server
+import throttle
+from throttle import LoginThrottle, MemoryBucketBackend, MongoBucketBackend, PasswordHashPool, get_client_ip
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(throttle.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_exhausts_then_refills(clock):
+    backend = MemoryBucketBackend()
+    consume = lambda: asyncio.run(backend.consume("ip:1.2.3.4", capacity=3, refill_per_sec=0.5))
+
+    assert [consume()[0] for _ in range(3)] == [True, True, True]
+    assert consume() == (False, 2.0)
+
+    clock.now += 1
+    assert consume() == (False, 1.0)
+    clock.now += 1
+    assert consume() == (True, 0.0)
+
+    # Refill is capped at the bucket's capacity
+    clock.now += 3600
+    assert [consume()[0] for _ in range(4)] == [True, True, True, False]
+
+
+def test_bucket_keys_are_independent_and_bounded(clock):
+    backend = MemoryBucketBackend(max_keys=2)
+    consume = lambda key: asyncio.run(backend.consume(key, capacity=1, refill_per_sec=1))
+
+    assert consume("a") == (True, 0.0) and consume("a")[0] is False
+    assert consume("b")[0] and consume("c")[0]
+    # "a" was the least recently used bucket, so it was evicted (and is full again)
+    assert consume("a")[0]
+
+
+class UtcClock:
+    """Stands in for throttle.datetime; Mongo keeps milliseconds, so steps are whole seconds"""
+
+    def __init__(self):
+        self.current = datetime(2099, 1, 1, tzinfo=timezone.utc)
+
+    def now(self, tz=None):
+        return self.current
+
+
+def test_shared_bucket_exhausts_then_refills_in_mongo(mongo_db, monkeypatch):
+    clock = UtcClock()
+    monkeypatch.setattr(throttle, "datetime", clock)
+    backend = MongoBucketBackend(mongo_db.login_throttle)
+    consume = lambda: asyncio.run(backend.consume("ip:1.2.3.4", capacity=3, refill_per_sec=0.5))
+
+    assert [consume()[0] for _ in range(3)] == [True, True, True]
+    assert consume() == (False, 2.0)
+    bucket = asyncio.run(mongo_db.login_throttle.find_one({"_id": "ip:1.2.3.4"}))
+    assert bucket["tokens"] == 0 and bucket["allowed"] is False
+    # Expires once it would be full again: a missing bucket is a full one
+    assert bucket["expires_at"].replace(tzinfo=timezone.utc) == clock.current + timedelta(seconds=6)
+
+    clock.current += timedelta(seconds=1)
+    assert consume() == (False, 1.0)
+    clock.current += timedelta(seconds=1)
+    assert consume() == (True, 0.0)
+
+    # Refill is capped at the bucket's capacity
+    clock.current += timedelta(hours=1)
+    assert [consume()[0] for _ in range(4)] == [True, True, True, False]
+    assert asyncio.run(mongo_db.login_throttle.count_documents({})) == 1
+
+
+class CountingContext:
+    """passlib's bcrypt context, counting the hashes it computes"""
+
+    def __init__(self):
+        self.context = server.get_pwd_context()
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.context
+
+
+def test_password_pool_hashes_and_verifies():
+    context = CountingContext()
+    pool = PasswordHashPool(context, max_workers=1)
+    assert pool._executor is None
+
+    async def scenario():
+        hashed = await pool.hash("s3cret")
+        return hashed, await pool.verify("s3cret", hashed), await pool.verify("wrong", hashed), await pool.verify("s3cret", None)
+
+    hashed, good, bad, unknown = asyncio.run(scenario())
+    assert hashed.startswith("$2") and (good, bad, unknown) == (True, False, False)
+    assert context.calls == 4 and pool.queue_depth == 0
+
+    pool.shutdown()
+    assert pool._executor is None
+
+
+def test_password_pool_rejects_beyond_its_queue():
+    release = threading.Event()
+
+    class SlowContext:
+        def hash(self, password):
+            release.wait(5)
+            return "hashed"
+
+    pool = PasswordHashPool(SlowContext, max_workers=1, max_queue=2)
+
+    async def scenario():
+        waiting = [asyncio.ensure_future(pool.hash("x")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert pool.queue_depth == 2
+        with pytest.raises(HTTPException) as rejected:
+            await pool.hash("x")
+        release.set()
+        return rejected.value, await asyncio.gather(*waiting)
+
+    try:
+        rejected, hashes = asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+    assert rejected.status_code == 503 and rejected.headers == {"Retry-After": "1"}
+    assert hashes == ["hashed", "hashed"] and pool.queue_depth == 0
+
+
+def fake_request(forwarded=None, peer="10.0.0.9"):
+    headers = {"x-forwarded-for": forwarded} if forwarded is not None else {}
+    return SimpleNamespace(headers=headers, client=SimpleNamespace(host=peer))
+
+
+def test_client_ip_reads_forwarded_for_from_the_right():
+    spoofed = fake_request("6.6.6.6, 203.0.113.7, 10.0.0.2")
+    assert get_client_ip(spoofed) == "10.0.0.9"
+    assert get_client_ip(spoofed, trust_proxy_headers=True) == "10.0.0.2"
+    assert get_client_ip(spoofed, trust_proxy_headers=True, trusted_hops=2) == "203.0.113.7"
+    # Fewer entries than trusted proxies: the header is not ours, use the peer
+    assert get_client_ip(fake_request("203.0.113.7"), trust_proxy_headers=True, trusted_hops=2) == "10.0.0.9"
+    assert get_client_ip(fake_request(" , "), trust_proxy_headers=True) == "10.0.0.9"
+
+
+@pytest.fixture
+def login(app_db, api, monkeypatch):
+    state = server.app.state
+    pool = PasswordHashPool(CountingContext(), max_workers=1)
+    monkeypatch.setattr(state, "password_pool", pool)
+    monkeypatch.setattr(state, "login_throttle", LoginThrottle(MemoryBucketBackend(), account_burst=2, account_per_minute=1))
+    asyncio.run(app_db.users.insert_one({
+        "id": "u1", "email": "artist@tests.example.com", "role": "artist",
+        "password_hash": server.get_pwd_context().hash("s3cret"),
+    }))
+    yield lambda password: api.post("/api/auth/login", json={"email": "artist@tests.example.com", "password": password})
+    pool.shutdown()
+
+
+def test_throttled_login_is_rejected_before_bcrypt(login):
+    pool = server.app.state.password_pool
+    assert login("wrong").status_code == 401
+    assert login("s3cret").status_code == 200
+    hashes = pool.context_factory.calls
+    assert hashes == 2
+
+    response = login("s3cret")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    assert pool.context_factory.calls == hashes
+
+    counters = server.app.state.login_throttle.counters
+    assert (counters["attempts"], counters["rejected_account"], counters["failed"], counters["succeeded"]) == (3, 1, 1, 1)
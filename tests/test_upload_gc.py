@@ -0,0 +1,129 @@
+"""
+Tests for the orphaned upload garbage collector (backend/upload_gc.py),
+against LocalStorage and mongomock-motor.
+
+Run from the repository root:
+    python -m pytest tests/test_upload_gc.py
+"""
+
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import server
+import upload_gc
+from storage import LocalStorage
+
+FILES = {
+    "logos/kept.png": 100,
+    "logos/kept.png.gz": 40,  # precompressed sibling of a referenced file
+    "logos/orphan.png": 300,
+    "gallery/kept.jpg": 200,
+    "gallery/orphan.jpg": 500,
+}
+ORPHANS = {"logos/orphan.png", "gallery/orphan.jpg"}
+
+
+async def setup(db, tmp_path):
+    storage = LocalStorage(tmp_path)
+    for key, size in FILES.items():
+        await storage.save(key, b"x" * size, "image/png")
+    await db.artist_profiles.insert_many([
+        {"user_id": "a", "logo_url": "/api/uploads/logos/kept.png", "gallery_urls": ["/api/uploads/gallery/kept.jpg"]},
+        {"user_id": "b", "logo_url": None, "gallery_urls": []},
+    ])
+    return db, storage
+
+
+async def keys(storage):
+    return {info.key async for info in storage.list_files()}
+
+
+def test_recent_files_are_kept(mongo_db, tmp_path):
+    async def scenario():
+        db, storage = await setup(mongo_db, tmp_path)
+        report = await upload_gc.collect_garbage(db, storage, grace=timedelta(hours=1), mode="delete")
+        assert report["recent_files"] == len(ORPHANS) and report["deleted_files"] == 0
+        assert await keys(storage) == set(FILES)
+
+    asyncio.run(scenario())
+
+
+def test_dry_run_reports_without_touching_files(mongo_db, tmp_path):
+    async def scenario():
+        db, storage = await setup(mongo_db, tmp_path)
+        later = datetime.now(timezone.utc) + timedelta(days=2)
+        report = await upload_gc.collect_garbage(db, storage, mode="dry-run", now=later)
+        assert report["referenced_files"] == 3
+        assert (report["orphaned_files"], report["orphaned_bytes"], report["reclaimed_bytes"]) == (2, 800, 0)
+        assert await keys(storage) == set(FILES)
+
+    asyncio.run(scenario())
+
+
+def test_delete_reclaims_orphans(mongo_db, tmp_path):
+    async def scenario():
+        db, storage = await setup(mongo_db, tmp_path)
+        later = datetime.now(timezone.utc) + timedelta(days=2)
+        report = await upload_gc.collect_garbage(db, storage, mode="delete", now=later)
+        assert (report["deleted_files"], report["reclaimed_bytes"], report["errors"]) == (2, 800, 0)
+        assert await keys(storage) == set(FILES) - ORPHANS
+
+    asyncio.run(scenario())
+
+
+def test_quarantine_then_purge(mongo_db, tmp_path):
+    async def scenario():
+        db, storage = await setup(mongo_db, tmp_path)
+        later = datetime.now(timezone.utc) + timedelta(days=2)
+        report = await upload_gc.collect_garbage(db, storage, mode="quarantine", now=later)
+        assert (report["quarantined_files"], report["reclaimed_bytes"]) == (2, 0)
+        stamp = later.strftime(upload_gc.STAMP_FORMAT)
+        assert await keys(storage) == (set(FILES) - ORPHANS) | {f"quarantine/{stamp}/{key}" for key in ORPHANS}
+
+        # Still within the retention: quarantined files stay
+        report = await upload_gc.collect_garbage(db, storage, mode="quarantine", now=later + timedelta(days=1))
+        assert report["purged_quarantine_files"] == 0
+
+        report = await upload_gc.collect_garbage(
+            db, storage, mode="quarantine", quarantine_retention=timedelta(days=30), now=later + timedelta(days=31)
+        )
+        assert (report["purged_quarantine_files"], report["reclaimed_bytes"]) == (2, 800)
+        assert await keys(storage) == set(FILES) - ORPHANS
+
+    asyncio.run(scenario())
+
+
+def test_lease_is_held_until_it_expires(mongo_db):
+    async def scenario():
+        leases = mongo_db.job_leases
+        assert await upload_gc.acquire_lease(leases, "upload_gc", timedelta(hours=1)) is True
+        assert await upload_gc.acquire_lease(leases, "upload_gc", timedelta(hours=1)) is False
+        await leases.update_one({"_id": "upload_gc"}, {"$set": {"expires_at": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        assert await upload_gc.acquire_lease(leases, "upload_gc", timedelta(hours=1)) is True
+
+    asyncio.run(scenario())
+
+
+def test_quarantined_files_are_not_served(tmp_path, asgi_client, monkeypatch):
+    app = server.create_app(replace(server.app.state.settings, uploads_dir=tmp_path, storage_backend="local"))
+    monkeypatch.setattr(server, "app", app)  # served by asgi_client
+    storage = LocalStorage(tmp_path)
+    asyncio.run(storage.save("logos/kept.png", b"x" * 10, "image/png"))
+    asyncio.run(storage.save("quarantine/20990101T000000Z/logos/orphan.png", b"x" * 10, "image/png"))
+
+    async def status(url):
+        async with asgi_client() as client:
+            return (await client.get(url)).status_code
+
+    for prefix in ("/api/uploads/", "/uploads/"):
+        assert asyncio.run(status(prefix + "logos/kept.png")) == 200
+        assert asyncio.run(status(prefix + "quarantine/20990101T000000Z/logos/orphan.png")) == 404
+        assert asyncio.run(status(prefix + "logos/../quarantine/20990101T000000Z/logos/orphan.png")) == 404
+
+
+def test_scheduled_runs_are_opt_in():
+    from settings import Settings
+
+    defaults = Settings(mongo_url="mongodb://localhost:27017", db_name="tests")
+    assert (defaults.upload_gc_interval_hours, defaults.upload_gc_mode) == (0, "dry-run")